@@ -0,0 +1,47 @@
+"""add unique words (user_id, lower(word)) index and missing-distractors index
+
+Revision ID: a4f7b1e9c2d6
+Revises: d8a4c2e6f1b9
+Create Date: 2026-10-18 23:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f7b1e9c2d6"
+down_revision: str | None = "d8a4c2e6f1b9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Keep the first saved copy of each duplicate, which has the review history
+    op.execute(
+        "DELETE FROM words WHERE id NOT IN "
+        "(SELECT min(id) FROM words GROUP BY user_id, lower(word))"
+    )
+    op.execute(
+        "UPDATE users SET word_count = (SELECT count(*) FROM words WHERE words.user_id = users.id)"
+    )
+    op.create_index(
+        "ix_words_user_id_lower_word",
+        "words",
+        ["user_id", sa.text("lower(word)")],
+        unique=True,
+    )
+    op.create_index(
+        "ix_words_missing_distractors",
+        "words",
+        ["id"],
+        postgresql_where=sa.text("distractors IS NULL"),
+        sqlite_where=sa.text("distractors IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_words_missing_distractors", table_name="words")
+    op.drop_index("ix_words_user_id_lower_word", table_name="words")
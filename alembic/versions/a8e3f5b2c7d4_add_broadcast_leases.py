@@ -0,0 +1,42 @@
+"""add broadcast leases
+
+Revision ID: a8e3f5b2c7d4
+Revises: f4a1d7c9e3b2
+Create Date: 2026-10-18 19:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8e3f5b2c7d4"
+down_revision: str | None = "f4a1d7c9e3b2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "broadcast_leases",
+        sa.Column("run_key", sa.Text, primary_key=True),
+        sa.Column("shard", sa.Integer, primary_key=True),
+        sa.Column("owner", sa.Text, nullable=True),
+        sa.Column("lease_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("cursor", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_broadcast_leases_created_at", "broadcast_leases", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_leases_created_at", table_name="broadcast_leases")
+    op.drop_table("broadcast_leases")
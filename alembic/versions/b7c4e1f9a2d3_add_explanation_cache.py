@@ -0,0 +1,38 @@
+"""add explanation cache
+
+Revision ID: b7c4e1f9a2d3
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-18 14:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7c4e1f9a2d3"
+down_revision: str | None = "a1b2c3d4e5f6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "explanation_cache",
+        sa.Column("key", sa.Text, primary_key=True),
+        sa.Column("data", sa.JSON, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.create_index("ix_explanation_cache_created_at", "explanation_cache", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_explanation_cache_created_at", table_name="explanation_cache")
+    op.drop_table("explanation_cache")
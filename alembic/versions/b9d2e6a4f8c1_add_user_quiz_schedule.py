@@ -0,0 +1,33 @@
+"""add user quiz schedule
+
+Revision ID: b9d2e6a4f8c1
+Revises: a8e3f5b2c7d4
+Create Date: 2026-10-18 20:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b9d2e6a4f8c1"
+down_revision: str | None = "a8e3f5b2c7d4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("timezone", sa.Text, nullable=False, server_default="UTC"))
+    op.add_column("users", sa.Column("quiz_hours", sa.JSON, nullable=True))
+    # Left NULL: the scheduler assigns every user's first delivery time on its next tick
+    op.add_column("users", sa.Column("next_quiz_at", sa.DateTime(timezone=True), nullable=True))
+    op.create_index("ix_users_next_quiz_at", "users", ["next_quiz_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_next_quiz_at", table_name="users")
+    op.drop_column("users", "next_quiz_at")
+    op.drop_column("users", "quiz_hours")
+    op.drop_column("users", "timezone")
@@ -0,0 +1,26 @@
+"""add word distractors
+
+Revision ID: c3d9a7e2f1b4
+Revises: b7c4e1f9a2d3
+Create Date: 2026-10-18 15:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d9a7e2f1b4"
+down_revision: str | None = "b7c4e1f9a2d3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("words", sa.Column("distractors", sa.JSON, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("words", "distractors")
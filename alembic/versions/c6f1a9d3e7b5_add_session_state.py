@@ -0,0 +1,34 @@
+"""add session state
+
+Revision ID: c6f1a9d3e7b5
+Revises: b9d2e6a4f8c1
+Create Date: 2026-10-18 21:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c6f1a9d3e7b5"
+down_revision: str | None = "b9d2e6a4f8c1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "session_state",
+        sa.Column("namespace", sa.Text, primary_key=True),
+        sa.Column("key", sa.BigInteger, primary_key=True),
+        sa.Column("data", sa.JSON, nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_session_state_expires_at", "session_state", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_session_state_expires_at", table_name="session_state")
+    op.drop_table("session_state")
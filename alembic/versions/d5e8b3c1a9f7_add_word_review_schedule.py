@@ -0,0 +1,43 @@
+"""add word review schedule
+
+Revision ID: d5e8b3c1a9f7
+Revises: c3d9a7e2f1b4
+Create Date: 2026-10-18 16:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5e8b3c1a9f7"
+down_revision: str | None = "c3d9a7e2f1b4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "words",
+        sa.Column(
+            "due_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.add_column("words", sa.Column("ease", sa.Float, nullable=False, server_default="2.5"))
+    op.add_column(
+        "words", sa.Column("interval_days", sa.Integer, nullable=False, server_default="0")
+    )
+
+    # Existing words: never reviewed are due since creation, reviewed ones since last review
+    op.execute("UPDATE words SET due_at = COALESCE(last_reviewed_at, created_at)")
+
+    op.create_index("ix_words_user_id_due_at", "words", ["user_id", "due_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_words_user_id_due_at", table_name="words")
+    op.drop_column("words", "interval_days")
+    op.drop_column("words", "ease")
+    op.drop_column("words", "due_at")
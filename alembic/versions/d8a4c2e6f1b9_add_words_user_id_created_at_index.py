@@ -0,0 +1,24 @@
+"""add words (user_id, created_at, id) index for /words pagination
+
+Revision ID: d8a4c2e6f1b9
+Revises: c6f1a9d3e7b5
+Create Date: 2026-10-18 22:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a4c2e6f1b9"
+down_revision: str | None = "c6f1a9d3e7b5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_words_user_id_created_at_id", "words", ["user_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_words_user_id_created_at_id", table_name="words")
@@ -0,0 +1,24 @@
+"""add words (user_id, id) index for distractor sampling
+
+Revision ID: e2f6c4d8b1a5
+Revises: d5e8b3c1a9f7
+Create Date: 2026-10-18 17:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2f6c4d8b1a5"
+down_revision: str | None = "d5e8b3c1a9f7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_words_user_id_id", "words", ["user_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_words_user_id_id", table_name="words")
@@ -0,0 +1,31 @@
+"""add word distractor attempts
+
+Revision ID: e9b3d5f7a1c8
+Revises: a4f7b1e9c2d6
+Create Date: 2026-10-18 23:30:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e9b3d5f7a1c8"
+down_revision: str | None = "a4f7b1e9c2d6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "words",
+        sa.Column("distractor_attempts", sa.Integer, nullable=False, server_default="0"),
+    )
+    # Words given up on before attempts were counted get another chance
+    op.execute("UPDATE words SET distractors = NULL WHERE distractors::text = '[]'")
+
+
+def downgrade() -> None:
+    op.drop_column("words", "distractor_attempts")
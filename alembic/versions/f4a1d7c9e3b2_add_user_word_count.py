@@ -0,0 +1,31 @@
+"""add user word count
+
+Revision ID: f4a1d7c9e3b2
+Revises: e2f6c4d8b1a5
+Create Date: 2026-10-18 18:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a1d7c9e3b2"
+down_revision: str | None = "e2f6c4d8b1a5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("word_count", sa.Integer, nullable=False, server_default="0"))
+    op.execute(
+        "UPDATE users SET word_count = (SELECT count(*) FROM words WHERE words.user_id = users.id)"
+    )
+    op.create_index("ix_users_word_count", "users", ["word_count"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_word_count", table_name="users")
+    op.drop_column("users", "word_count")
@@ -0,0 +1,91 @@
+"""Compare ORDER BY random() with the indexed sampler used for quiz distractors.
+
+Fills one user's dictionary at several sizes and times both ways of picking
+distractor candidates. Uses a throwaway SQLite file unless --database-url is
+given (point it at an empty Postgres database to get realistic numbers):
+
+    python -m benchmarks.bench_distractor_sampling
+    python -m benchmarks.bench_distractor_sampling --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("BOT_TOKEN", "bench-token")
+os.environ.setdefault("GIGACHAT_CREDENTIALS", "bench-key")
+
+from sqlalchemy import func, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from bot.models import Base, User, Word  # noqa: E402
+from bot.services.dictionary import sample_translations  # noqa: E402
+
+SIZES = [100, 1_000, 10_000, 100_000]
+K = 12  # Distractor pool for a 3-question quiz
+
+
+async def _order_by_random(session: AsyncSession, user_id: int) -> list:
+    result = await session.execute(
+        select(Word.id, Word.translation)
+        .where(Word.user_id == user_id)
+        .order_by(func.random())
+        .limit(K)
+    )
+    return result.all()
+
+
+async def _time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+async def run(database_url: str, repeat: int) -> None:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(f"{'words':>8} {'ORDER BY random() ms':>22} {'sampler ms':>12}")
+    async with sessionmaker() as session:
+        for size in SIZES:
+            user = User(telegram_id=size)
+            session.add(user)
+            await session.commit()
+            # Another user's words interleaved, as in a shared production table
+            rows = []
+            for i in range(size):
+                rows.append({"user_id": user.id, "word": f"w{i}", "translation": f"t{i}"})
+                rows.append({"user_id": user.id + 10_000, "word": f"o{i}", "translation": f"o{i}"})
+            for start in range(0, len(rows), 5_000):
+                await session.execute(insert(Word), rows[start : start + 5_000])
+            await session.commit()
+
+            baseline = await _time(lambda uid=user.id: _order_by_random(session, uid), repeat)
+            sampler = await _time(lambda uid=user.id: sample_translations(session, uid, K), repeat)
+            print(f"{size:>8} {baseline:>22.3f} {sampler:>12.3f}")
+
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        asyncio.run(run(url, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Drive the real dispatcher with thousands of synthetic users.
+
+Every user walks through the bot the way a new user would: /start, the
+onboarding test, a few word lookups (saving most of them) and a /quiz answered
+to the end. Buttons are pressed on the messages the bot actually sent, which
+a fake Bot API server keeps. GigaChat is replaced by a fake with fixed
+latency. Updates go through the same Dispatcher, middlewares and routers as
+in production (dp.feed_update), --concurrency users at a time.
+
+The report lists, per update type, the count, errors, p50/p95/p99 handler
+latency and the average number of DB queries, plus the peak number of pool
+connections checked out at once. Uses a throwaway SQLite file
+unless --database-url is given:
+
+    python -m benchmarks.bench_load --users 2000 --concurrency 200
+    python -m benchmarks.bench_load --llm-latency 2 --vocabulary 200
+    python -m benchmarks.bench_load --database-url postgresql+asyncpg://...
+
+GigaChat rate limits are lifted unless LLM_* variables are set, so the fake's
+latency rather than the limiter decides how long lookups take. SQLite lets one
+writer in at a time, so at high concurrency expect "database is locked" errors
+there; use Postgres for numbers that carry over to production.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+os.environ.setdefault("BOT_TOKEN", "123456:bench-token")
+os.environ.setdefault("GIGACHAT_CREDENTIALS", "bench-key")
+os.environ.setdefault("LLM_MAX_IN_FLIGHT", "1000")
+os.environ.setdefault("LLM_RATE_PER_SECOND", "100000")
+os.environ.setdefault("LLM_BURST", "100000")
+
+from benchmarks.fakes import FakeBotAPI, FakeGigaChat  # noqa: E402
+
+MAX_STEPS = 60  # Button presses per flow, in case a flow never ends
+
+
+def _percentile(values: list[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class Recorder:
+    """Latency, errors and DB queries per update type."""
+
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.queries: dict[str, int] = defaultdict(int)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.error_types: dict[str, int] = defaultdict(int)
+        self.current: ContextVar[str | None] = ContextVar("update_kind", default=None)
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+    def count_query(self, *args) -> None:
+        kind = self.current.get()
+        if kind is not None:
+            self.queries[kind] += 1
+
+    def checkout(self, *args) -> None:
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def checkin(self, *args) -> None:
+        self.checked_out -= 1
+
+    def report(self, elapsed: float) -> None:
+        total = sum(len(v) for v in self.latencies.values())
+        print(f"{total} updates in {elapsed:.1f}s ({total / elapsed:.0f} updates/s)")
+        print(
+            f"{'update':<14} {'count':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>8}"
+        )
+        for kind in sorted(self.latencies, key=lambda k: -len(self.latencies[k])):
+            values = sorted(self.latencies[kind])
+            p50, p95, p99 = (_percentile(values, q) * 1000 for q in (0.5, 0.95, 0.99))
+            print(
+                f"{kind:<14} {len(values):>7} {self.errors[kind]:>7} {p50:>8.1f} {p95:>8.1f} "
+                f"{p99:>8.1f} {self.queries[kind] / len(values):>8.1f}"
+            )
+        print(f"peak pool connections checked out: {self.peak_checked_out}")
+        for error, count in self.error_types.items():
+            print(f"{count} x {error}")
+
+
+class VirtualUser:
+    def __init__(self, telegram_id: int, runner: "LoadRunner") -> None:
+        self.telegram_id = telegram_id
+        self.runner = runner
+        self.profile = {"id": telegram_id, "is_bot": False, "first_name": "Load"}
+
+    def _buttons(self, message: dict | None) -> list[str]:
+        if message is None:
+            return []
+        rows = message.get("reply_markup", {}).get("inline_keyboard", [])
+        return [button["callback_data"] for row in rows for button in row]
+
+    async def send(self, text: str) -> None:
+        kind = text.split()[0] if text.startswith("/") else "text"
+        message = {
+            "message_id": 0,
+            "date": int(time.time()),
+            "chat": {"id": self.telegram_id, "type": "private"},
+            "from": self.profile,
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(kind)}]
+        await self.runner.feed(kind, {"message": message})
+
+    async def press(self, data: str, message: dict) -> None:
+        kind = data.split(":")[0]
+        callback = {
+            "id": str(next(self.runner.update_ids)),
+            "from": self.profile,
+            "chat_instance": str(self.telegram_id),
+            "data": data,
+            "message": message,
+        }
+        await self.runner.feed(kind, {"callback_query": callback})
+
+    def last_message(self) -> dict | None:
+        return self.runner.api.last_message(self.telegram_id)
+
+    async def _click_through(self, pick) -> None:
+        """Keep pressing the button chosen by pick on the last message until none is left."""
+        for _ in range(MAX_STEPS):
+            message = self.last_message()
+            data = pick(self._buttons(message))
+            if data is None:
+                return
+            await self.press(data, message)  # type: ignore[arg-type]
+
+    async def onboarding(self) -> None:
+        await self.send("/start")
+        message = self.last_message()
+        if "onboard_test" not in self._buttons(message):
+            return
+        await self.press("onboard_test", message)  # type: ignore[arg-type]
+
+        def pick(buttons: list[str]) -> str | None:
+            if "onboard_next" in buttons:
+                return "onboard_next"
+            answers = [b for b in buttons if b.startswith("ob_answer:")]
+            return random.choice(answers) if answers else None
+
+        await self._click_through(pick)
+
+    async def look_up(self, word: str, save: bool) -> None:
+        await self.send(word)
+        message = self.last_message()
+        buttons = self._buttons(message)
+        saves = [b for b in buttons if b.startswith("save:")]
+        if saves and save:
+            await self.press(saves[0], message)  # type: ignore[arg-type]
+        elif "skip" in buttons:
+            await self.press("skip", message)  # type: ignore[arg-type]
+
+    async def quiz(self) -> None:
+        await self.send("/quiz")
+
+        def pick(buttons: list[str]) -> str | None:
+            if "quiz_next" in buttons:
+                return "quiz_next"
+            answers = [b for b in buttons if b.startswith("quiz:")]
+            return random.choice(answers) if answers else None
+
+        await self._click_through(pick)
+
+    async def run(self, lookups: int) -> None:
+        await self.onboarding()
+        for _ in range(lookups):
+            await self.look_up(random.choice(self.runner.vocabulary), save=random.random() < 0.8)
+        await self.quiz()
+        await self.send("/stats")
+
+
+class LoadRunner:
+    def __init__(self, bot, dp, api: FakeBotAPI, recorder: Recorder, vocabulary: list[str]):
+        self.bot = bot
+        self.dp = dp
+        self.api = api
+        self.recorder = recorder
+        self.vocabulary = vocabulary
+        self.update_ids = itertools.count(1)
+
+    async def feed(self, kind: str, payload: dict) -> None:
+        from aiogram.types import Update
+
+        update = Update.model_validate(
+            {"update_id": next(self.update_ids), **payload}, context={"bot": self.bot}
+        )
+        token = self.recorder.current.set(kind)
+        started = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.recorder.errors[kind] += 1
+            self.recorder.error_types[f"{kind}: {type(e).__name__}: {e}"[:120]] += 1
+        finally:
+            self.recorder.latencies[kind].append(time.perf_counter() - started)
+            self.recorder.current.reset(token)
+
+
+async def run(args: argparse.Namespace) -> None:
+    from aiogram import Bot
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from sqlalchemy import event
+
+    from bot.__main__ import create_dispatcher
+    from bot.db.session import engine
+    from bot.models import Base
+    from bot.services import llm
+    from bot.services.word_bank import WORD_BANK
+
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    recorder = Recorder()
+    event.listen(engine.sync_engine, "before_cursor_execute", recorder.count_query)
+    event.listen(engine.sync_engine.pool, "checkout", recorder.checkout)
+    event.listen(engine.sync_engine.pool, "checkin", recorder.checkin)
+    gigachat = FakeGigaChat(latency=args.llm_latency)
+    llm._client = gigachat  # type: ignore[assignment]
+
+    api = FakeBotAPI(latency=args.api_latency)
+    api_url = await api.start()
+    bot = Bot(
+        token=os.environ["BOT_TOKEN"],
+        session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)),
+    )
+    # Words from the onboarding bank, so some lookups hit already saved words
+    vocabulary = [entry["word"] for entry in WORD_BANK][: args.vocabulary]
+    runner = LoadRunner(bot, create_dispatcher(), api, recorder, vocabulary)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def user_session(i: int) -> None:
+        async with semaphore:
+            await VirtualUser(5_000_000 + i, runner).run(args.lookups)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(user_session(i) for i in range(args.users)))
+    finally:
+        elapsed = time.perf_counter() - started
+        await bot.session.close()
+        await api.stop()
+        await engine.dispose()
+
+    print(
+        f"users={args.users} concurrency={args.concurrency} llm_latency={args.llm_latency}s "
+        f"db={engine.dialect.name}"
+    )
+    recorder.report(elapsed)
+    calls = ", ".join(f"{method}={n}" for method, n in sorted(api.calls.items()))
+    print(f"Bot API calls: {calls}")
+    print(f"GigaChat calls: {gigachat.calls}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=100, help="Users active at once")
+    parser.add_argument("--lookups", type=int, default=3, help="Words looked up per user")
+    parser.add_argument("--vocabulary", type=int, default=500, help="Distinct words looked up")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per answer")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Seconds per API call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Set before bot modules are imported: the engine is created from it
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Measure the memory held by concurrent quiz and onboarding sessions.
+
+Builds N sessions of each kind (100k by default), halfway through onboarding
+or a 10-question quiz, and reports the bytes they allocate (tracemalloc):
+
+- "before": plain dataclasses with the onboarding word bank copied as dicts,
+  the layout used before sessions were slotted;
+- "objects": the current slotted session objects;
+- "memory store": the entries kept by the in-memory session store.
+
+    python -m benchmarks.bench_session_memory
+    python -m benchmarks.bench_session_memory --sessions 10000
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+
+os.environ.setdefault("BOT_TOKEN", "bench-token")
+os.environ.setdefault("GIGACHAT_CREDENTIALS", "bench-key")
+
+from bot.services.onboarding import OnboardingSession, get_next_word_with_options  # noqa: E402
+from bot.services.quiz import QuizQuestion, QuizSession  # noqa: E402
+from bot.services.state_store import MemoryStore  # noqa: E402
+from bot.services.word_bank import WORD_BANK  # noqa: E402
+
+QUESTIONS = 10
+SHOWN_WORDS = 5
+
+
+@dataclass
+class LegacyOnboardingSession:
+    user_id: int
+    target_unknown: int = 10
+    unknown_count: int = 0
+    shown_words: list[str] = field(default_factory=list)
+    word_bank: list[dict] = field(default_factory=list)
+    current_word: str | None = None
+    current_options: list[str] = field(default_factory=list)
+    correct_index: int = 0
+    current_translation: str | None = None
+
+
+@dataclass
+class LegacyQuizQuestion:
+    word_id: int
+    word: str
+    correct_answer: str
+    all_correct: list[str]
+    options: list[str]
+
+
+@dataclass
+class LegacyQuizSession:
+    user_id: int
+    total_questions: int = 10
+    current_question: int = 0
+    correct_count: int = 0
+    score: int = 0
+    streak: int = 0
+    questions: list[LegacyQuizQuestion] = field(default_factory=list)
+
+
+def _legacy_onboarding(user_id: int) -> LegacyOnboardingSession:
+    bank = [dict(entry) for entry in random.sample(WORD_BANK, 30)]
+    session = LegacyOnboardingSession(user_id=user_id, word_bank=bank)
+    for _ in range(SHOWN_WORDS):
+        entry = session.word_bank.pop(0)
+        session.shown_words.append(entry["word"])
+        session.current_word = entry["word"]
+        session.current_translation = entry["translation"]
+        session.current_options = [entry["translation"], *entry["distractors"]]
+    return session
+
+
+def _onboarding(user_id: int) -> OnboardingSession:
+    session = OnboardingSession(user_id=user_id)
+    for _ in range(SHOWN_WORDS):
+        get_next_word_with_options(session)
+    return session
+
+
+def _questions(user_id: int, cls) -> list:
+    # Distinct strings per user, as loaded from each user's own dictionary
+    return [
+        cls(
+            word_id=user_id * 100 + i,
+            word=f"word-{user_id}-{i}",
+            correct_answer=f"перевод-{user_id}-{i}",
+            all_correct=[f"перевод-{user_id}-{i}"],
+            options=[f"вариант-{user_id}-{i}-{j}" for j in range(4)],
+        )
+        for i in range(QUESTIONS)
+    ]
+
+
+def _legacy_quiz(user_id: int) -> LegacyQuizSession:
+    questions = _questions(user_id, LegacyQuizQuestion)[QUESTIONS // 2 :]
+    return LegacyQuizSession(user_id=user_id, current_question=QUESTIONS // 2, questions=questions)
+
+
+def _quiz(user_id: int) -> QuizSession:
+    questions = _questions(user_id, QuizQuestion)[QUESTIONS // 2 :]
+    return QuizSession(user_id=user_id, current_question=QUESTIONS // 2, questions=questions)
+
+
+def _measure(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = [build(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size
+
+
+async def _fill_store(store: MemoryStore, payloads: list[dict]) -> None:
+    for user_id, payload in enumerate(payloads):
+        await store.set(user_id, payload)
+
+
+def _measure_store(build, to_dict, count: int) -> int:
+    # Sessions are built before tracing starts, so only what the store keeps is counted
+    payloads = [to_dict(build(i)) for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    store = MemoryStore(ttl=3600, max_entries=count)
+    asyncio.run(_fill_store(store, payloads))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.sessions
+
+    rows = [
+        ("onboarding", "before", _measure(_legacy_onboarding, n)),
+        ("onboarding", "objects", _measure(_onboarding, n)),
+        ("onboarding", "memory store", _measure_store(_onboarding, OnboardingSession.to_dict, n)),
+        ("quiz", "before", _measure(_legacy_quiz, n)),
+        ("quiz", "objects", _measure(_quiz, n)),
+        ("quiz", "memory store", _measure_store(_quiz, asdict, n)),
+    ]
+    print(f"{n} sessions each")
+    print(f"{'kind':<12} {'layout':<14} {'MiB':>9} {'bytes/session':>14}")
+    for kind, layout, size in rows:
+        print(f"{kind:<12} {layout:<14} {size / 2**20:>9.1f} {size / n:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
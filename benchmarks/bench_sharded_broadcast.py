@@ -0,0 +1,156 @@
+"""Run the sharded quiz broadcast from several processes against one database.
+
+Each process plays a bot replica with a fake Telegram API that only records
+who it sent to. One replica can be killed halfway through to check that the
+others take over its shard. The script reports every user that got no quiz or
+more than one. Uses a throwaway SQLite file unless --database-url is given:
+
+    python -m benchmarks.bench_sharded_broadcast --workers 3 --users 2000
+    python -m benchmarks.bench_sharded_broadcast --kill-one
+    python -m benchmarks.bench_sharded_broadcast --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import collections
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("BOT_TOKEN", "bench-token")
+os.environ.setdefault("GIGACHAT_CREDENTIALS", "bench-key")
+
+SEND_LATENCY = 0.005  # Seconds per fake Bot API call
+
+
+class FakeBot:
+    """Stands in for aiogram's Bot and appends every recipient to a file."""
+
+    def __init__(self, log_path: Path, latency: float) -> None:
+        self._log = log_path.open("a")
+        self._latency = latency
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        await asyncio.sleep(self._latency)
+        self._log.write(f"{chat_id}\n")
+        self._log.flush()
+
+
+async def _setup(database_url: str, users: int) -> None:
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from bot.models import Base, User, Word
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Each worker keeps a read cursor open while it checkpoints; without WAL
+            # those readers would block every other process's lease updates
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [{"id": i, "telegram_id": 1_000 + i, "word_count": 2} for i in range(1, users + 1)],
+        )
+        await conn.execute(
+            insert(Word),
+            [
+                {"user_id": i, "word": f"w{i}-{j}", "translation": f"t{i}-{j}"}
+                for i in range(1, users + 1)
+                for j in range(2)
+            ],
+        )
+    await engine.dispose()
+
+
+async def _work(database_url: str, run_key: str, log_path: Path, latency: float) -> None:
+    from sqlalchemy import func, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from bot.db.session import async_sessionmaker
+    from bot.models import BroadcastLease
+    from bot.scheduler.broadcast import run_sharded_broadcast
+
+    engine = create_async_engine(database_url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    bot = FakeBot(log_path, latency)
+
+    # Same as the scheduler: one pass at the scheduled time, then keep picking up
+    # shards whose owner stopped renewing until the whole run is finished
+    while True:
+        await run_sharded_broadcast(bot, run_key, sessionmaker)
+        async with sessionmaker() as session:
+            unfinished = await session.scalar(
+                select(func.count())
+                .select_from(BroadcastLease)
+                .where(BroadcastLease.run_key == run_key, BroadcastLease.finished_at.is_(None))
+            )
+        if not unfinished:
+            break
+        await asyncio.sleep(0.5)
+    await engine.dispose()
+
+
+def _worker(database_url: str, run_key: str, log_path: Path, latency: float) -> None:
+    asyncio.run(_work(database_url, run_key, log_path, latency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--kill-one", action="store_true", help="Kill one worker mid-run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        os.environ["DATABASE_URL"] = url
+        os.environ["BROADCAST_SHARDS"] = str(args.shards)
+        os.environ["BROADCAST_LEASE_SECONDS"] = "3"
+        os.environ["BROADCAST_CHUNK_SIZE"] = "50"
+        os.environ["BROADCAST_RATE_PER_SECOND"] = "100000"
+        os.environ["BROADCAST_BURST"] = "1000"
+        asyncio.run(_setup(url, args.users))
+
+        ctx = multiprocessing.get_context("spawn")
+        logs = [Path(tmp) / f"worker-{i}.log" for i in range(args.workers)]
+        started = time.perf_counter()
+        processes = [
+            ctx.Process(
+                target=_worker,
+                args=(url, "quiz:bench", log, SEND_LATENCY * 5 if i == 0 else SEND_LATENCY),
+            )
+            for i, log in enumerate(logs)
+        ]
+        for process in processes:
+            process.start()
+        if args.kill_one:
+            # Worker 0 is the slow one, so it still holds a shard when killed
+            while not logs[0].exists() or len(logs[0].read_text().split()) < 20:
+                time.sleep(0.05)
+            processes[0].kill()
+            print(f"killed worker 0 (pid {processes[0].pid})")
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        per_worker = [log.read_text().split() if log.exists() else [] for log in logs]
+        counts = collections.Counter(chat_id for sent in per_worker for chat_id in sent)
+
+    expected = {str(1_000 + i) for i in range(1, args.users + 1)}
+    missing = expected - counts.keys()
+    duplicates = sum(1 for n in counts.values() if n > 1)
+    for i, sent in enumerate(per_worker):
+        print(f"worker {i}: {len(sent)} messages")
+    print(f"users={args.users} sent={sum(counts.values())} elapsed={elapsed:.1f}s")
+    print(f"missing={len(missing)} duplicated={duplicates}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Measure webhook throughput with synthetic Telegram updates.
+
+Starts a fake Bot API server and --workers bot processes in webhook mode that
+share one port. Then it POSTs --updates synthetic messages from distinct users,
+--concurrency at a time, the way Telegram would. An update counts as done
+when the bot's reply reaches the fake Bot API, so the numbers cover the whole
+path: HTTP, dispatcher, handler (and DB, for commands that use it) and the
+outgoing API call. Uses a throwaway SQLite file unless --database-url is given:
+
+    python -m benchmarks.bench_webhook --workers 4 --updates 5000
+    python -m benchmarks.bench_webhook --text /stats --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession
+
+from benchmarks.fakes import FakeBotAPI
+
+BOT_TOKEN = "123456:bench-token"
+SECRET = "bench-secret"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _update(update_id: int, user_id: int, text: str) -> dict:
+    entities = []
+    if text.startswith("/"):
+        entities.append({"type": "bot_command", "offset": 0, "length": len(text.split()[0])})
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "text": text,
+            "entities": entities,
+        },
+    }
+
+
+async def _create_tables(database_url: str) -> None:
+    os.environ.setdefault("BOT_TOKEN", BOT_TOKEN)
+    os.environ.setdefault("GIGACHAT_CREDENTIALS", "bench-key")
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from bot.models import Base
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+async def _wait_for_port(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.2)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return
+    raise TimeoutError(f"Webhook port {port} did not open")
+
+
+async def run(args: argparse.Namespace, database_url: str) -> None:
+    await _create_tables(database_url)
+
+    api = FakeBotAPI()
+    api_url = await api.start()
+
+    webhook_port = _free_port()
+    env = {
+        **os.environ,
+        "BOT_TOKEN": BOT_TOKEN,
+        "GIGACHAT_CREDENTIALS": os.environ.get("GIGACHAT_CREDENTIALS", "bench-key"),
+        "DATABASE_URL": database_url,
+        "TELEGRAM_API_URL": api_url,
+        "WEBHOOK_URL": f"http://127.0.0.1:{webhook_port}",
+        "WEBHOOK_HOST": "127.0.0.1",
+        "WEBHOOK_PORT": str(webhook_port),
+        "WEBHOOK_SECRET": SECRET,
+        "SESSION_STORE": "sql",
+    }
+    workers = [
+        subprocess.Popen([sys.executable, "-m", "bot"], env=env, stderr=subprocess.DEVNULL)
+        for _ in range(args.workers)
+    ]
+    try:
+        await _wait_for_port(webhook_port)
+        await asyncio.sleep(1)  # Let the other workers bind the port too
+
+        api.expected_chats = args.updates
+        url = f"http://127.0.0.1:{webhook_port}/webhook"
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        semaphore = asyncio.Semaphore(args.concurrency)
+        posted: dict[int, float] = {}
+
+        async def post(http: ClientSession, i: int) -> None:
+            user_id = 1_000_000 + i
+            async with semaphore:
+                posted[user_id] = time.perf_counter()
+                async with http.post(
+                    url, json=_update(i + 1, user_id, args.text), headers=headers
+                ) as resp:
+                    resp.raise_for_status()
+
+        started = time.perf_counter()
+        async with ClientSession() as http:
+            await asyncio.gather(*(post(http, i) for i in range(args.updates)))
+        posted_in = time.perf_counter() - started
+        try:
+            await asyncio.wait_for(api.replied.wait(), timeout=args.timeout)
+        except TimeoutError:
+            print(f"timed out: {len(api.first_reply)}/{args.updates} replies")
+        elapsed = time.perf_counter() - started
+
+        replied = len(api.first_reply)
+        latencies = sorted(t - posted[u] for u, t in api.first_reply.items() if u in posted)
+        print(f"workers={args.workers} updates={args.updates} concurrency={args.concurrency}")
+        print(f"posted in {posted_in:.2f}s ({args.updates / posted_in:.0f} req/s)")
+        print(f"replied {replied} in {elapsed:.2f}s ({replied / elapsed:.0f} updates/s)")
+        if latencies:
+            median = statistics.median(latencies) * 1000
+            p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+            print(f"latency ms: median={median:.1f} p95={p95:.1f}")
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        await api.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--updates", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--text", default="/help", help="Message text of every update")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        asyncio.run(run(args, url))
+
+
+if __name__ == "__main__":
+    main()
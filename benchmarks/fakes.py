@@ -0,0 +1,132 @@
+"""Stand-ins for the Telegram Bot API and GigaChat used by the load benchmarks."""
+
+import asyncio
+import json
+import time
+import zlib
+from collections import defaultdict
+from types import SimpleNamespace
+
+from aiohttp import web
+
+# Methods that return the sent or edited message
+MESSAGE_METHODS = {"sendMessage", "editMessageText", "editMessageReplyMarkup"}
+
+
+class FakeBotAPI:
+    """A Bot API server that keeps every chat's messages, buttons included.
+
+    Other methods (answerCallbackQuery, setWebhook, ...) just return True.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: dict[str, int] = defaultdict(int)
+        self.messages: dict[int, dict[int, dict]] = defaultdict(dict)  # chat -> id -> message
+        self.first_reply: dict[int, float] = {}  # chat -> perf_counter of the first message
+        self.replied = asyncio.Event()
+        self.expected_chats = 0
+        self._next_id = 0
+        self._runner: web.AppRunner | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on the given port (any free one by default) and return the base URL."""
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def last_message(self, chat_id: int) -> dict | None:
+        chat = self.messages.get(chat_id)
+        return chat[max(chat)] if chat else None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        form = await request.post()
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method not in MESSAGE_METHODS:
+            return web.json_response({"ok": True, "result": True})
+
+        chat_id = int(form["chat_id"])  # type: ignore[arg-type]
+        chat = self.messages[chat_id]
+        if method == "sendMessage":
+            self._next_id += 1
+            message = {
+                "message_id": self._next_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": "",
+            }
+            chat[self._next_id] = message
+            if chat_id not in self.first_reply:
+                self.first_reply[chat_id] = time.perf_counter()
+                if self.expected_chats and len(self.first_reply) >= self.expected_chats:
+                    self.replied.set()
+        else:
+            message = chat[int(form["message_id"])]  # type: ignore[arg-type]
+
+        if "text" in form:
+            message["text"] = form["text"]
+        markup = json.loads(form.get("reply_markup", "null"))  # type: ignore[arg-type]
+        # Like Telegram, only inline keyboards are attached to the returned message
+        if markup and "inline_keyboard" in markup:
+            message["reply_markup"] = markup
+        elif method != "sendMessage":
+            message.pop("reply_markup", None)
+        return web.json_response({"ok": True, "result": message})
+
+
+class FakeGigaChat:
+    """Answers explanation requests after a fixed delay, streamed or not.
+
+    Translations are derived from the word, so every word always gets the same one.
+    """
+
+    def __init__(self, latency: float = 0.5, chunks: int = 5) -> None:
+        self.latency = latency
+        self.chunks = chunks
+        self.calls = 0
+
+    def _content(self, chat) -> str:
+        word = chat.messages[-1].content
+        n = zlib.crc32(word.encode())
+        translations = [f"перевод-{(n + i) % 100_000}" for i in range(3)]
+        return json.dumps(
+            {
+                "translation": translations[0],
+                "translations": translations,
+                "distractors": [f"ложный-{(n + i) % 100_000}" for i in range(3)],
+                "meanings": [{"meaning": translations[0], "explanation": "…"}],
+                "examples": [{"en": f"An example with {word}.", "ru": "Пример."}],
+                "collocations": [],
+            },
+            ensure_ascii=False,
+        )
+
+    async def achat(self, chat):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content=self._content(chat))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def astream(self, chat):
+        self.calls += 1
+        content = self._content(chat)
+        step = -(-len(content) // self.chunks)
+        for start in range(0, len(content), step):
+            await asyncio.sleep(self.latency / self.chunks)
+            delta = SimpleNamespace(content=content[start : start + step])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    async def aclose(self) -> None:
+        pass
@@ -3,13 +3,22 @@ import logging
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 from bot.config import settings
 from bot.db.session import engine
-from bot.handlers import dictionary, donate, onboarding, quiz, start, word
+from bot.handlers import dictionary, donate, onboarding, quiz, schedule, start, word
 from bot.middlewares.db import DbSessionMiddleware
+from bot.middlewares.metrics import MetricsMiddleware
+from bot.middlewares.user import UserIdMiddleware
 from bot.scheduler import setup_scheduler
+from bot.services.answer_buffer import answer_buffer
+from bot.services.llm import close_client, get_client
+from bot.utils.metrics import metrics_view
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,32 +27,113 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main() -> None:
-    bot = Bot(
+def create_bot() -> Bot:
+    session = None
+    if settings.telegram_api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(settings.telegram_api_url))
+    return Bot(
         token=settings.bot_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
-    dp = Dispatcher()
 
-    dp.update.middleware(DbSessionMiddleware())
 
+def create_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+    metrics = MetricsMiddleware()
+    db = DbSessionMiddleware()
+    user_id = UserIdMiddleware()
+    for observer in (dp.message, dp.callback_query, dp.pre_checkout_query):
+        observer.middleware(metrics)
+        observer.middleware(db)
+        observer.middleware(user_id)
     dp.include_routers(
         start.router,
         onboarding.router,
         quiz.router,
         dictionary.router,
+        schedule.router,
         donate.router,
         word.router,  # Must be last — catches all text messages
     )
+    return dp
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Serve updates over HTTP until cancelled.
+
+    The port is bound with SO_REUSEPORT, so several processes started with the
+    same settings share it and the kernel spreads requests between them.
+    """
+    await bot.set_webhook(
+        f"{settings.webhook_url.rstrip('/')}{settings.webhook_path}",
+        secret_token=settings.webhook_secret or None,
+        max_connections=settings.webhook_max_connections,
+    )
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=settings.webhook_secret or None
+    ).register(app, path=settings.webhook_path)
+    app.router.add_get("/metrics", metrics_view)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port, reuse_port=True)
+    await site.start()
+    logger.info(
+        "Listening for webhook updates on %s:%d%s",
+        settings.webhook_host,
+        settings.webhook_port,
+        settings.webhook_path,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        # Leave the webhook registered: other workers may still be serving it
+        await runner.cleanup()
+
+
+async def start_metrics_server() -> web.AppRunner:
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_view)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, port=settings.metrics_port).start()
+    logger.info("Serving metrics on port %d", settings.metrics_port)
+    return runner
+
+
+async def main() -> None:
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    # Create the shared GigaChat client up front so all handlers reuse its pool
+    get_client()
 
     scheduler = setup_scheduler(bot)
     scheduler.start()
+    if settings.answer_write_behind:
+        answer_buffer.start()
+
+    metrics_runner = None
+    if settings.metrics_port and not settings.webhook_url:
+        metrics_runner = await start_metrics_server()
 
     logger.info("Bot started")
     try:
-        await dp.start_polling(bot)
+        if settings.webhook_url:
+            await run_webhook(bot, dp)
+        else:
+            await dp.start_polling(bot)
     finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
         scheduler.shutdown()
+        await answer_buffer.close()
+        await close_client()
+        await bot.session.close()
         await engine.dispose()
 
 
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,11 +9,91 @@ class Settings(BaseSettings):
     bot_token: str
     gigachat_credentials: str
     database_url: str = "postgresql+asyncpg://localhost:5432/english_words_bot"
+    telegram_api_url: str = ""  # Custom Bot API server, e.g. a local telegram-bot-api
+
+    # Connection pool per process for handlers and background jobs. Sessions are only
+    # opened for handlers that take one and connections are not held while waiting for
+    # GigaChat, so a small pool suffices; the quiz broadcast gets connections of its
+    # own on top of it (see bot.db.session).
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    user_id_cache_size: int = 100_000  # telegram_id -> users.id entries kept per process
+
+    # Webhook mode, used instead of long polling when webhook_url is set. Any number of
+    # processes may serve it (use session_store="sql" so they share conversation state).
+    webhook_url: str = ""  # Public base URL Telegram posts to, e.g. https://bot.example.com
+    webhook_path: str = "/webhook"
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_secret: str = ""  # Checked against X-Telegram-Bot-Api-Secret-Token
+    webhook_max_connections: int = 40  # Concurrent requests Telegram may open to us
+
+    # Handler metrics, served at /metrics on the webhook port, or on metrics_port
+    # when polling (0 disables the endpoint in polling mode)
+    metrics_port: int = 0
+    slow_update_seconds: float = 1.0  # Updates slower than this are logged with their queries
+
+    # GigaChat client settings (one pooled client is shared by the whole app)
+    gigachat_timeout: float = 30.0
+    gigachat_max_connections: int = 20
+
+    # LLM call limiter
+    llm_max_in_flight: int = 8  # Concurrent GigaChat requests
+    llm_rate_per_second: float = 5.0
+    llm_burst: int = 10
+
+    # LLM retries and circuit breaker
+    llm_deadline_seconds: float = 20.0  # Total time budget per call, including retries
+    llm_retry_attempts: int = 3
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 4.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+
+    # Stream explanations into the "searching" message as they are generated
+    llm_streaming: bool = True
+    stream_edit_interval: float = 1.0  # Min seconds between message edits (Telegram limits)
+
+    # Cross-user cache of word explanations
+    explanation_cache_ttl_days: int = 30
+    explanation_cache_memory_size: int = 2000  # Entries kept in the in-process LRU
+    explanation_cache_max_rows: int = 100_000  # Rows kept in the DB table
+
+    # Per-user conversation state (quiz in progress, onboarding, word waiting to be saved).
+    # "memory" keeps it in-process; "sql" stores it in the DB, shared by all replicas.
+    session_store: Literal["memory", "sql"] = "memory"
+    session_ttl_hours: int = 24
+    session_memory_max_entries: int = 10_000  # Per namespace, least recently used evicted
 
     # Quiz scheduler settings
-    quiz_hours: list[int] = [10, 14, 19]  # Hours (UTC) to send quizzes
+    quiz_hours: list[int] = [10, 14, 19]  # Default local hours for users who haven't chosen
+    quiz_spread_minutes: int = 60  # Users of one hour are spread over this many minutes
     quiz_words_per_session: int = 5
 
+    # Buffer quiz answers in memory and write them in batches (see bot.services.answer_buffer)
+    answer_write_behind: bool = False
+    answer_flush_ms: int = 500
+    answer_flush_max_events: int = 200
+    answer_flush_max_retries: int = 3  # Failed flushes are retried this often, then dropped
+    distractors_batch_size: int = 20  # Words per LLM call when backfilling distractors
+    distractors_max_attempts: int = 3  # Backfill runs a word may be skipped in before we give up
+
+    # Scheduled quiz broadcast
+    broadcast_concurrency: int = 16  # Users processed in parallel
+    # Telegram allows ~30 messages/s per bot; the bucket is per process, so split
+    # it between replicas when several of them broadcast
+    broadcast_rate_per_second: float = 25.0
+    broadcast_burst: int = 25
+    broadcast_chunk_size: int = 500  # Users fetched per round trip from the audience cursor
+    quiz_audience_from_counter: bool = False  # Use users.word_count instead of counting words
+
+    # Every replica runs the scheduler; DB leases decide which one sends to which shard.
+    # All replicas must use the same number of shards.
+    broadcast_shards: int = 4  # Users are split by telegram_id % broadcast_shards
+    broadcast_lease_seconds: float = 120.0  # A shard is taken over if not renewed in time
+    broadcast_resume_minutes: int = 60  # Abandoned shards of older runs are not resumed
+    worker_id: str = ""  # Lease owner name, defaults to hostname:pid
+
 
 def get_settings() -> Settings:
     return Settings()  # type: ignore[call-arg]
@@ -1,7 +1,32 @@
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from bot.config import settings
+from bot.utils.metrics import instrument_engine
 
-engine = create_async_engine(settings.database_url, echo=False)
+
+def broadcast_connections() -> int:
+    """Connections a running broadcast holds at most.
+
+    One per worker plus the audience cursor; chunk checkpoints run while the
+    workers are idle.
+    """
+    return settings.broadcast_concurrency + 1
+
+
+def _pool_options(url: str) -> dict:
+    # SQLite engines (tests, benchmarks) keep SQLAlchemy's own pool choice
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size + broadcast_connections(),
+        "max_overflow": settings.db_max_overflow,
+    }
+
+
+engine = create_async_engine(
+    settings.database_url, echo=False, **_pool_options(settings.database_url)
+)
+instrument_engine(engine.sync_engine)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
@@ -1,14 +1,40 @@
+from datetime import UTC, datetime, timedelta
+
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.services.dictionary import delete_word, get_or_create_user, get_stats, get_words
+from bot.models.word import Word
+from bot.services.dictionary import WordCursor, delete_word, get_stats, get_words
 
 router = Router()
 
 WORDS_PER_PAGE = 10
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+# Page buttons carry a keyset cursor instead of an offset:
+#   words_page:<page>                          first page
+#   words_page:<page>:a:<micros>:<word_id>     the page after this word
+#   words_page:<page>:b:<micros>:<word_id>     the page before this word
+# where <micros> is the word's created_at in microseconds since the epoch.
+def _page_data(page: int, direction: str, word: Word) -> str:
+    created_at = word.created_at
+    if created_at.tzinfo is None:  # SQLite returns naive UTC values
+        created_at = created_at.replace(tzinfo=UTC)
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    return f"words_page:{page}:{direction}:{micros}:{word.id}"
+
+
+def _parse_page_data(data: str) -> tuple[int, str | None, WordCursor | None]:
+    _, page, *cursor = data.split(":")
+    if len(cursor) != 3:
+        return 0, None, None
+    direction, micros, word_id = cursor
+    return int(page), direction, (_EPOCH + timedelta(microseconds=int(micros)), int(word_id))
+
 
 def words_page_keyboard(words, page: int, has_next: bool) -> InlineKeyboardMarkup:
     buttons = []
@@ -23,10 +49,16 @@ def words_page_keyboard(words, page: int, has_next: bool) -> InlineKeyboardMarku
         )
 
     nav = []
-    if page > 0:
-        nav.append(InlineKeyboardButton(text="⬅️", callback_data=f"words_page:{page - 1}"))
+    if page == 1:
+        nav.append(InlineKeyboardButton(text="⬅️", callback_data="words_page:0"))
+    elif page > 1:
+        nav.append(
+            InlineKeyboardButton(text="⬅️", callback_data=_page_data(page - 1, "b", words[0]))
+        )
     if has_next:
-        nav.append(InlineKeyboardButton(text="➡️", callback_data=f"words_page:{page + 1}"))
+        nav.append(
+            InlineKeyboardButton(text="➡️", callback_data=_page_data(page + 1, "a", words[-1]))
+        )
     if nav:
         buttons.append(nav)
 
@@ -34,39 +66,42 @@ def words_page_keyboard(words, page: int, has_next: bool) -> InlineKeyboardMarku
 
 
 @router.message(Command("words"))
-async def cmd_words(message: Message, session: AsyncSession) -> None:
-    telegram_id = message.from_user.id  # type: ignore[union-attr]
-    user = await get_or_create_user(session, telegram_id)
-    await show_words_page(message.answer, session, user.id, page=0)
+async def cmd_words(message: Message, session: AsyncSession, user_id: int) -> None:
+    await show_words_page(message.answer, session, user_id)
+
 
+async def load_words_page(
+    session: AsyncSession,
+    user_id: int,
+    direction: str | None = None,
+    cursor: WordCursor | None = None,
+) -> tuple[list[Word], bool]:
+    """Words of one page and whether a next page exists."""
+    if direction == "b":
+        # Coming back from a later page, so there is a next one
+        return await get_words(session, user_id, limit=WORDS_PER_PAGE, before=cursor), True
+    words = await get_words(session, user_id, limit=WORDS_PER_PAGE + 1, after=cursor)
+    return words[:WORDS_PER_PAGE], len(words) > WORDS_PER_PAGE
 
-async def show_words_page(send_func, session: AsyncSession, user_id: int, page: int) -> None:
-    offset = page * WORDS_PER_PAGE
-    words = await get_words(session, user_id, limit=WORDS_PER_PAGE + 1, offset=offset)
 
-    has_next = len(words) > WORDS_PER_PAGE
-    words = words[:WORDS_PER_PAGE]
+async def show_words_page(send_func, session: AsyncSession, user_id: int) -> None:
+    words, has_next = await load_words_page(session, user_id)
 
-    if not words and page == 0:
+    if not words:
         await send_func("Твой словарь пуст. Отправь мне слово на английском, чтобы начать!")
         return
 
     await send_func(
-        f"📚 <b>Твой словарь</b> (стр. {page + 1}):\n\nНажми на слово, чтобы удалить.",
-        reply_markup=words_page_keyboard(words, page, has_next),
+        "📚 <b>Твой словарь</b> (стр. 1):\n\nНажми на слово, чтобы удалить.",
+        reply_markup=words_page_keyboard(words, 0, has_next),
     )
 
 
 @router.callback_query(F.data.startswith("words_page:"))
-async def handle_words_page(callback: CallbackQuery, session: AsyncSession) -> None:
-    page = int(callback.data.split(":")[1])  # type: ignore[union-attr]
-    telegram_id = callback.from_user.id
-    user = await get_or_create_user(session, telegram_id)
+async def handle_words_page(callback: CallbackQuery, session: AsyncSession, user_id: int) -> None:
+    page, direction, cursor = _parse_page_data(callback.data)  # type: ignore[arg-type]
 
-    offset = page * WORDS_PER_PAGE
-    words = await get_words(session, user.id, limit=WORDS_PER_PAGE + 1, offset=offset)
-    has_next = len(words) > WORDS_PER_PAGE
-    words = words[:WORDS_PER_PAGE]
+    words, has_next = await load_words_page(session, user_id, direction, cursor)
 
     if not words:
         await callback.answer("Нет больше слов.")
@@ -80,21 +115,17 @@ async def handle_words_page(callback: CallbackQuery, session: AsyncSession) -> N
 
 
 @router.callback_query(F.data.startswith("delword:"))
-async def handle_delete_word(callback: CallbackQuery, session: AsyncSession) -> None:
+async def handle_delete_word(callback: CallbackQuery, session: AsyncSession, user_id: int) -> None:
     word_id = int(callback.data.split(":")[1])  # type: ignore[union-attr]
-    telegram_id = callback.from_user.id
-    user = await get_or_create_user(session, telegram_id)
 
-    deleted = await delete_word(session, word_id, user.id)
+    deleted = await delete_word(session, word_id, user_id)
     if deleted:
         await callback.answer("Слово удалено.")
     else:
         await callback.answer("Слово не найдено.")
 
     # Refresh the list
-    words = await get_words(session, user.id, limit=WORDS_PER_PAGE + 1)
-    has_next = len(words) > WORDS_PER_PAGE
-    words = words[:WORDS_PER_PAGE]
+    words, has_next = await load_words_page(session, user_id)
 
     if not words:
         await callback.message.edit_text("Твой словарь пуст.")  # type: ignore[union-attr]
@@ -106,10 +137,8 @@ async def handle_delete_word(callback: CallbackQuery, session: AsyncSession) ->
 
 
 @router.message(Command("stats"))
-async def cmd_stats(message: Message, session: AsyncSession) -> None:
-    telegram_id = message.from_user.id  # type: ignore[union-attr]
-    user = await get_or_create_user(session, telegram_id)
-    stats = await get_stats(session, user.id)
+async def cmd_stats(message: Message, session: AsyncSession, user_id: int) -> None:
+    stats = await get_stats(session, user_id)
 
     await message.answer(
         f"📊 <b>Статистика</b>\n\n"
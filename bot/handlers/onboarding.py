@@ -9,12 +9,13 @@ from bot.keyboards.onboarding import (
     onboarding_next_keyboard,
     onboarding_quiz_keyboard,
 )
-from bot.services.dictionary import add_word, get_or_create_user
+from bot.services.dictionary import add_word
 from bot.services.onboarding import (
     create_session,
     get_next_word_with_options,
     get_session,
     remove_session,
+    save_session,
 )
 
 logger = logging.getLogger(__name__)
@@ -40,21 +41,20 @@ def _format_quiz_message(word: str) -> str:
 
 
 @router.callback_query(F.data == "onboard_test")
-async def on_test_start(callback: CallbackQuery, session: AsyncSession) -> None:
+async def on_test_start(callback: CallbackQuery, user_id: int) -> None:
     telegram_id = callback.from_user.id
-    user = await get_or_create_user(session, telegram_id)
-
-    ob_session = create_session(telegram_id, user.id)
+    ob_session = await create_session(telegram_id, user_id)
     quiz_data = get_next_word_with_options(ob_session)
 
     if not quiz_data:
         await callback.message.edit_text(  # type: ignore[union-attr]
             "Не удалось загрузить слова. Попробуй позже или отправь слово сам."
         )
-        remove_session(telegram_id)
+        await remove_session(telegram_id)
         await callback.answer()
         return
 
+    await save_session(telegram_id, ob_session)
     await callback.message.edit_text(  # type: ignore[union-attr]
         _format_quiz_message(quiz_data["word"]),
         reply_markup=onboarding_quiz_keyboard(quiz_data["options"]),
@@ -65,7 +65,7 @@ async def on_test_start(callback: CallbackQuery, session: AsyncSession) -> None:
 @router.callback_query(F.data.startswith("ob_answer:"))
 async def on_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None:
     telegram_id = callback.from_user.id
-    ob_session = get_session(telegram_id)
+    ob_session = await get_session(telegram_id, session)
 
     if not ob_session or not ob_session.current_word:
         await callback.answer("Сессия не найдена. Начни заново с /start.")
@@ -87,10 +87,11 @@ async def on_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None
                 "Используй кнопки внизу для навигации 👇",
                 reply_markup=main_keyboard(),
             )
-            remove_session(telegram_id)
+            await remove_session(telegram_id, session)
             await callback.answer()
             return
 
+        await save_session(telegram_id, ob_session, session)
         await callback.message.edit_text(  # type: ignore[union-attr]
             f"✅ Верно!\n\n{_format_quiz_message(quiz_data['word'])}",
             reply_markup=onboarding_quiz_keyboard(quiz_data["options"]),
@@ -99,6 +100,7 @@ async def on_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None
         # User doesn't know — save word from bank instantly (no LLM)
         word = ob_session.current_word
         correct_answer = ob_session.current_options[ob_session.correct_index]
+        distractors = [o for o in ob_session.current_options if o != correct_answer]
 
         await add_word(
             session=session,
@@ -106,6 +108,7 @@ async def on_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None
             word=word,
             translation=correct_answer,
             explanation="",
+            distractors=distractors,
         )
 
         ob_session.unknown_count += 1
@@ -123,8 +126,9 @@ async def on_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None
                 "Используй кнопки внизу для навигации 👇",
                 reply_markup=main_keyboard(),
             )
-            remove_session(telegram_id)
+            await remove_session(telegram_id, session)
         else:
+            await save_session(telegram_id, ob_session, session)
             await callback.message.edit_text(  # type: ignore[union-attr]
                 f"❌ Правильный ответ: <b>{correct_answer}</b>\n\n"
                 f"<b>{word}</b> — {correct_answer}\n"
@@ -139,7 +143,7 @@ async def on_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None
 @router.callback_query(F.data == "onboard_next")
 async def on_next(callback: CallbackQuery) -> None:
     telegram_id = callback.from_user.id
-    ob_session = get_session(telegram_id)
+    ob_session = await get_session(telegram_id)
 
     if not ob_session:
         await callback.answer("Сессия не найдена. Начни заново с /start.")
@@ -154,10 +158,11 @@ async def on_next(callback: CallbackQuery) -> None:
             "Используй кнопки внизу для навигации 👇",
             reply_markup=main_keyboard(),
         )
-        remove_session(telegram_id)
+        await remove_session(telegram_id)
         await callback.answer()
         return
 
+    await save_session(telegram_id, ob_session)
     await callback.message.edit_text(  # type: ignore[union-attr]
         _format_quiz_message(quiz_data["word"]),
         reply_markup=onboarding_quiz_keyboard(quiz_data["options"]),
@@ -3,18 +3,19 @@ import logging
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.config import settings
 from bot.keyboards.quiz import next_question_keyboard, quiz_keyboard
-from bot.models.word import Word
-from bot.services.dictionary import get_or_create_user, update_user_score, update_word_review
+from bot.services.answer_buffer import answer_buffer
+from bot.services.dictionary import Answer, record_answer
 from bot.services.quiz import (
+    QuizSession,
     calculate_points,
-    create_session,
-    generate_quiz,
     get_session,
     remove_session,
+    save_session,
+    start_session,
 )
 
 logger = logging.getLogger(__name__)
@@ -35,25 +36,28 @@ def _result_summary(correct: int, total: int, score: int) -> str:
 
 
 async def send_quiz_question(
-    session: AsyncSession,
     telegram_id: int,
     edit_message=None,
     send_func=None,
+    quiz_session: QuizSession | None = None,
+    db: AsyncSession | None = None,
 ) -> bool:
-    """Generate and send/edit a quiz question. Returns True if sent."""
-    quiz_session = get_session(telegram_id)
+    """Send/edit the next planned quiz question. Returns True if sent.
+
+    Questions are planned when the session starts, so apart from loading and
+    saving the session no DB access happens here.
+    """
+    if quiz_session is None:
+        quiz_session = await get_session(telegram_id, db)
     if quiz_session is None:
         return False
 
-    quiz = await generate_quiz(
-        session, quiz_session.user_id, exclude_word_ids=quiz_session.asked_word_ids
-    )
-    if quiz is None:
+    if not quiz_session.questions:
         # No more words available — finish early
         total_score = quiz_session.score
         correct = quiz_session.correct_count
         total = quiz_session.current_question
-        remove_session(telegram_id)
+        await remove_session(telegram_id, db)
         text = _result_summary(correct, total, total_score)
         if edit_message:
             await edit_message.edit_text(text)
@@ -61,13 +65,15 @@ async def send_quiz_question(
             await send_func(text)
         return False
 
+    question = quiz_session.questions.pop(0)
+    quiz_session.asked = question
     quiz_session.current_question += 1
-    quiz_session.asked_word_ids.append(quiz["word_id"])
+    await save_session(telegram_id, quiz_session, db)
 
     text = _question_text(
-        quiz["word"], quiz_session.current_question, quiz_session.total_questions
+        question.word, quiz_session.current_question, quiz_session.total_questions
     )
-    keyboard = quiz_keyboard(quiz["word_id"], quiz["options"])
+    keyboard = quiz_keyboard(question.word_id, question.options)
 
     if edit_message:
         await edit_message.edit_text(text, reply_markup=keyboard)
@@ -78,24 +84,25 @@ async def send_quiz_question(
 
 
 @router.message(Command("quiz"))
-async def cmd_quiz(message: Message, session: AsyncSession) -> None:
+async def cmd_quiz(message: Message, session: AsyncSession, user_id: int) -> None:
     telegram_id = message.from_user.id  # type: ignore[union-attr]
-    user = await get_or_create_user(session, telegram_id)
 
     # Remove any existing session
-    remove_session(telegram_id)
-    create_session(telegram_id, user.id, total_questions=10)
+    await remove_session(telegram_id, session)
+    quiz_session = await start_session(session, telegram_id, user_id, total_questions=10)
 
-    sent = await send_quiz_question(session, telegram_id, send_func=message.answer)
+    sent = quiz_session is not None and await send_quiz_question(
+        telegram_id, send_func=message.answer, quiz_session=quiz_session, db=session
+    )
     if not sent:
-        remove_session(telegram_id)
+        await remove_session(telegram_id, session)
         await message.answer(
             "В твоём словаре пока мало слов для теста. Добавь хотя бы 2 слова, отправив их мне."
         )
 
 
 @router.callback_query(F.data.startswith("quiz:"))
-async def handle_quiz_answer(callback: CallbackQuery, session: AsyncSession) -> None:
+async def handle_quiz_answer(callback: CallbackQuery, session: AsyncSession, user_id: int) -> None:
     parts = callback.data.split(":")  # type: ignore[union-attr]
     if len(parts) != 3:
         await callback.answer("Ошибка данных.")
@@ -105,75 +112,64 @@ async def handle_quiz_answer(callback: CallbackQuery, session: AsyncSession) ->
     chosen_idx = int(parts[2])
 
     telegram_id = callback.from_user.id
-    quiz_session = get_session(telegram_id)
+    quiz_session = await get_session(telegram_id, session)
 
-    # Get the options from the keyboard
-    keyboard = callback.message.reply_markup  # type: ignore[union-attr]
-    if keyboard is None:
+    # The answer is checked against the planned question, with no query for the word
+    question = quiz_session.asked if quiz_session else None
+    if quiz_session is None or question is None or question.word_id != word_id:
         await callback.answer("Тест уже завершён.")
+        await callback.message.edit_reply_markup(reply_markup=None)  # type: ignore[union-attr]
         return
-
-    options = [row[0].text for row in keyboard.inline_keyboard]
-    chosen_answer = options[chosen_idx]
-
-    # Get the correct answer from the word
-    result = await session.execute(select(Word).where(Word.id == word_id))
-    word = result.scalar_one_or_none()
-
-    if word is None:
-        await callback.answer("Слово не найдено.")
+    if not 0 <= chosen_idx < len(question.options):
+        await callback.answer("Ошибка данных.")
         return
 
-    # Check against all translations
-    all_correct = word.translations or [word.translation]
-    is_correct = chosen_answer in all_correct
-    await update_word_review(session, word_id, is_correct)
+    chosen_answer = question.options[chosen_idx]
+    is_correct = chosen_answer in question.all_correct
+    quiz_session.asked = None
 
     points_earned = 0
-    if quiz_session:
-        if is_correct:
-            quiz_session.streak += 1
-            points_earned = calculate_points(quiz_session.streak)
-            quiz_session.score += points_earned
-            quiz_session.correct_count += 1
-            user = await get_or_create_user(session, telegram_id)
-            await update_user_score(session, user.id, points_earned)
-        else:
-            quiz_session.streak = 0
+    if is_correct:
+        quiz_session.streak += 1
+        points_earned = calculate_points(quiz_session.streak)
+        quiz_session.score += points_earned
+        quiz_session.correct_count += 1
+    else:
+        quiz_session.streak = 0
+    if settings.answer_write_behind:
+        answer_buffer.add(Answer(user_id, word_id, is_correct, points_earned))
+    else:
+        await record_answer(session, user_id, word_id, is_correct, points_earned)
 
     points_text = f"\n+{points_earned} очков!" if points_earned > 0 else ""
+    shown = f"<b>{question.word}</b> — {question.correct_answer}"
 
     if is_correct:
-        text = f"✅ Правильно! <b>{word.word}</b> — {word.translation}{points_text}"
+        text = f"✅ Правильно! {shown}{points_text}"
     else:
-        text = (
-            f"❌ Неправильно. <b>{word.word}</b> — {word.translation}\nТы выбрал: {chosen_answer}"
-        )
+        text = f"❌ Неправильно. {shown}\nТы выбрал: {chosen_answer}"
 
     # Check if quiz continues
-    is_last = not quiz_session or quiz_session.current_question >= quiz_session.total_questions
-    if is_last and quiz_session:
+    if quiz_session.current_question >= quiz_session.total_questions:
         total_score = quiz_session.score
         correct = quiz_session.correct_count
         total = quiz_session.total_questions
-        remove_session(telegram_id)
+        await remove_session(telegram_id, session)
         text += f"\n\n{_result_summary(correct, total, total_score)}"
         await callback.message.edit_text(text, reply_markup=None)  # type: ignore[union-attr]
-    elif quiz_session:
+    else:
+        await save_session(telegram_id, quiz_session, session)
         await callback.message.edit_text(  # type: ignore[union-attr]
             text, reply_markup=next_question_keyboard()
         )
-    else:
-        # No session (old-style single quiz or expired)
-        await callback.message.edit_text(text, reply_markup=None)  # type: ignore[union-attr]
 
     await callback.answer()
 
 
 @router.callback_query(F.data == "quiz_next")
-async def handle_next_question(callback: CallbackQuery, session: AsyncSession) -> None:
+async def handle_next_question(callback: CallbackQuery) -> None:
     telegram_id = callback.from_user.id
-    quiz_session = get_session(telegram_id)
+    quiz_session = await get_session(telegram_id)
 
     if quiz_session is None:
         await callback.answer("Квиз уже завершён.")
@@ -181,8 +177,8 @@ async def handle_next_question(callback: CallbackQuery, session: AsyncSession) -
         return
 
     await send_quiz_question(
-        session,
         telegram_id,
         edit_message=callback.message,  # type: ignore[arg-type]
+        quiz_session=quiz_session,
     )
     await callback.answer()
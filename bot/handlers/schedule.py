@@ -0,0 +1,56 @@
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import settings
+from bot.services.dictionary import get_or_create_user
+from bot.services.quiz_schedule import get_zone, is_valid_timezone, set_quiz_preferences
+
+router = Router()
+
+
+def _format_hours(hours: list[int]) -> str:
+    return ", ".join(f"{h:02d}:00" for h in hours)
+
+
+async def _answer_schedule(message: Message, user) -> None:
+    hours = user.quiz_hours or settings.quiz_hours
+    next_at = user.next_quiz_at.astimezone(get_zone(user.timezone))
+    await message.answer(
+        f"⏰ Часовой пояс: <b>{user.timezone}</b>\n"
+        f"Тесты приходят в течение часа после: {_format_hours(hours)}\n"
+        f"Следующий тест: {next_at:%d.%m %H:%M}"
+    )
+
+
+@router.message(Command("timezone"))
+async def cmd_timezone(message: Message, command: CommandObject, session: AsyncSession) -> None:
+    name = (command.args or "").strip()
+    if not is_valid_timezone(name):
+        await message.answer(
+            "Укажи часовой пояс в формате IANA, например:\n<code>/timezone Europe/Moscow</code>"
+        )
+        return
+
+    user = await get_or_create_user(session, message.from_user.id)  # type: ignore[union-attr]
+    await set_quiz_preferences(session, user, timezone=name)
+    await _answer_schedule(message, user)
+
+
+@router.message(Command("hours"))
+async def cmd_hours(message: Message, command: CommandObject, session: AsyncSession) -> None:
+    try:
+        hours = [int(h) for h in (command.args or "").replace(",", " ").split()]
+    except ValueError:
+        hours = []
+    if not hours or any(not 0 <= h <= 23 for h in hours):
+        await message.answer(
+            "Укажи часы от 0 до 23, в которые присылать тесты, например:\n"
+            "<code>/hours 9 13 20</code>"
+        )
+        return
+
+    user = await get_or_create_user(session, message.from_user.id)  # type: ignore[union-attr]
+    await set_quiz_preferences(session, user, hours=hours)
+    await _answer_schedule(message, user)
@@ -49,29 +49,31 @@ async def cmd_help(message: Message) -> None:
         "/words — твой словарь\n"
         "/stats — статистика изучения\n"
         "/quiz — начать тест прямо сейчас\n"
+        "/timezone — твой часовой пояс\n"
+        "/hours — когда присылать тесты\n"
         "/help — эта справка"
     )
 
 
 @router.message(F.text == BTN_DICTIONARY)
-async def btn_dictionary(message: Message, session: AsyncSession) -> None:
+async def btn_dictionary(message: Message, session: AsyncSession, user_id: int) -> None:
     from bot.handlers.dictionary import cmd_words
 
-    await cmd_words(message, session)
+    await cmd_words(message, session, user_id)
 
 
 @router.message(F.text == BTN_QUIZ)
-async def btn_quiz(message: Message, session: AsyncSession) -> None:
+async def btn_quiz(message: Message, session: AsyncSession, user_id: int) -> None:
     from bot.handlers.quiz import cmd_quiz
 
-    await cmd_quiz(message, session)
+    await cmd_quiz(message, session, user_id)
 
 
 @router.message(F.text == BTN_STATS)
-async def btn_stats(message: Message, session: AsyncSession) -> None:
+async def btn_stats(message: Message, session: AsyncSession, user_id: int) -> None:
     from bot.handlers.dictionary import cmd_stats
 
-    await cmd_stats(message, session)
+    await cmd_stats(message, session, user_id)
 
 
 @router.message(F.text == BTN_DONATE)
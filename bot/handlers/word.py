@@ -1,79 +1,118 @@
 import logging
+import time
 
 from aiogram import F, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.config import settings
 from bot.keyboards.main import BUTTON_TEXTS
 from bot.keyboards.word import correction_keyboard, save_word_keyboard
-from bot.services.dictionary import add_word, get_or_create_user, word_exists
-from bot.services.llm import explain_word
+from bot.services.dictionary import add_word, word_exists
+from bot.services.explanation_cache import explain_word_cached, stream_explanation_cached
+from bot.services.llm import WordExplanation
+from bot.services.state_store import create_store
 
 logger = logging.getLogger(__name__)
 
 router = Router()
 
-# Temporary storage for pending explanations (user_id -> explanation)
-_pending: dict[int, dict] = {}
+# Explanations waiting for the user to save or skip them (telegram_id -> word data)
+_pending = create_store("pending_word")
 
 
 @router.message(F.text & ~F.text.startswith("/") & ~F.text.in_(BUTTON_TEXTS))
-async def handle_word(message: Message, session: AsyncSession) -> None:
+async def handle_word(message: Message, session: AsyncSession, user_id: int) -> None:
     word = message.text.strip()  # type: ignore[union-attr]
     if not word or len(word) > 200:
         await message.answer("Отправь слово или короткую фразу на английском (до 200 символов).")
         return
 
     telegram_id = message.from_user.id  # type: ignore[union-attr]
-    await message.answer("🔍 Ищу информацию...")
+    placeholder = await message.answer("🔍 Ищу информацию...")
 
     try:
-        explanation = await explain_word(word)
+        if settings.llm_streaming:
+            explanation = await _stream_into(placeholder, session, word, telegram_id)
+        else:
+            explanation = await explain_word_cached(session, word, telegram_id)
     except Exception:
         logger.exception("Failed to explain word: %s", word)
-        await message.answer("Не удалось получить объяснение. Попробуй ещё раз позже.")
+        await placeholder.edit_text("Не удалось получить объяснение. Попробуй ещё раз позже.")
         return
 
     display_word = explanation.corrected_word or word
-    user = await get_or_create_user(session, telegram_id)
-    already_saved = await word_exists(session, user.id, display_word)
+    already_saved = await word_exists(session, user_id, display_word)
 
-    _pending[telegram_id] = {
+    pending = {
         "word": display_word,
         "original_word": word,
         "translation": explanation.translation,
         "translations": explanation.translations,
+        "distractors": explanation.distractors,
         "explanation": explanation.raw_text,
     }
+    if already_saved:
+        await _pending.pop(telegram_id, session)
+    else:
+        await _pending.set(telegram_id, pending, session)
 
     # If spell-check detected a correction, ask user first
     if explanation.corrected_word:
         if already_saved:
-            await message.answer(
+            await placeholder.edit_text(
                 f"Возможно, вы имели в виду <b>{explanation.corrected_word}</b>?\n\n"
                 f"{explanation.raw_text}\n\n"
                 "ℹ️ Это слово уже есть в твоём словаре.",
             )
-            _pending.pop(telegram_id, None)
         else:
-            await message.answer(
+            await placeholder.edit_text(
                 f"Возможно, вы имели в виду <b>{explanation.corrected_word}</b>?",
                 reply_markup=correction_keyboard(explanation.corrected_word, word),
             )
         return
 
     if already_saved:
-        await message.answer(f"{explanation.raw_text}\n\nℹ️ Это слово уже есть в твоём словаре.")
-        _pending.pop(telegram_id, None)
+        await placeholder.edit_text(
+            f"{explanation.raw_text}\n\nℹ️ Это слово уже есть в твоём словаре."
+        )
     else:
-        await message.answer(explanation.raw_text, reply_markup=save_word_keyboard(word))
+        await placeholder.edit_text(explanation.raw_text, reply_markup=save_word_keyboard(word))
+
+
+async def _stream_into(
+    placeholder: Message, session: AsyncSession, word: str, telegram_id: int
+) -> WordExplanation:
+    """Show partial explanations in the placeholder message while they stream in.
+
+    Edits are throttled to settings.stream_edit_interval; the caller renders the
+    final explanation (with buttons) itself.
+    """
+    explanation: WordExplanation | None = None
+    shown = placeholder.text
+    last_edit = 0.0
+    async for explanation in stream_explanation_cached(session, word, telegram_id):
+        now = time.monotonic()
+        if now - last_edit < settings.stream_edit_interval or explanation.raw_text == shown:
+            continue
+        try:
+            await placeholder.edit_text(explanation.raw_text)
+        except TelegramBadRequest:
+            logger.debug("Skipped streaming edit for %s", word, exc_info=True)
+        shown = explanation.raw_text
+        last_edit = now
+
+    if explanation is None:
+        raise RuntimeError(f"No explanation produced for {word!r}")
+    return explanation
 
 
 @router.callback_query(F.data.startswith("correct_yes:"))
 async def accept_correction(callback: CallbackQuery) -> None:
     """User accepts the spelling correction."""
     telegram_id = callback.from_user.id
-    pending = _pending.get(telegram_id)
+    pending = await _pending.get(telegram_id)
     if pending is None:
         await callback.answer("Устарело.", show_alert=True)
         return
@@ -90,13 +129,14 @@ async def accept_correction(callback: CallbackQuery) -> None:
 async def reject_correction(callback: CallbackQuery) -> None:
     """User rejects correction, keeps original word."""
     telegram_id = callback.from_user.id
-    pending = _pending.get(telegram_id)
+    pending = await _pending.get(telegram_id)
     if pending is None:
         await callback.answer("Устарело.", show_alert=True)
         return
 
     # Revert to original word
     pending["word"] = pending["original_word"]
+    await _pending.set(telegram_id, pending)
     await callback.message.edit_text(  # type: ignore[union-attr]
         pending["explanation"],
         reply_markup=save_word_keyboard(pending["original_word"]),
@@ -105,22 +145,22 @@ async def reject_correction(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("save:"))
-async def save_word_callback(callback: CallbackQuery, session: AsyncSession) -> None:
+async def save_word_callback(callback: CallbackQuery, session: AsyncSession, user_id: int) -> None:
     telegram_id = callback.from_user.id
-    pending = _pending.pop(telegram_id, None)
+    pending = await _pending.pop(telegram_id, session)
 
     if pending is None:
         await callback.answer("Слово уже сохранено или устарело.", show_alert=True)
         return
 
-    user = await get_or_create_user(session, telegram_id)
     await add_word(
         session=session,
-        user_id=user.id,
+        user_id=user_id,
         word=pending["word"],
         translation=pending["translation"],
         explanation=pending["explanation"],
         translations=pending.get("translations"),
+        distractors=pending.get("distractors"),
     )
 
     await callback.answer("Слово сохранено! ✅")
@@ -129,6 +169,6 @@ async def save_word_callback(callback: CallbackQuery, session: AsyncSession) ->
 
 @router.callback_query(F.data == "skip")
 async def skip_word_callback(callback: CallbackQuery) -> None:
-    _pending.pop(callback.from_user.id, None)
+    await _pending.pop(callback.from_user.id)
     await callback.answer("Окей, пропускаем.")
     await callback.message.edit_reply_markup(reply_markup=None)  # type: ignore[union-attr]
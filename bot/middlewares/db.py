@@ -2,18 +2,35 @@ from collections.abc import Awaitable, Callable
 from typing import Any
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
 from aiogram.types import TelegramObject
 
 from bot.db.session import async_session
 
 
+def wants_session(handler: HandlerObject) -> bool:
+    """Whether the handler declares a ``session`` argument (or takes **kwargs)."""
+    return "session" in handler.params or handler.varkw
+
+
 class DbSessionMiddleware(BaseMiddleware):
+    """Opens an AsyncSession for handlers that declare a ``session`` argument.
+
+    Register as an inner middleware (``dp.message.middleware(...)``), where the
+    matched handler is known. Updates handled without the DB, such as /help or
+    donate callbacks, get no session at all.
+    """
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        if handler_object is not None and not wants_session(handler_object):
+            return await handler(event, data)
+
         async with async_session() as session:
             data["session"] = session
             return await handler(event, data)
@@ -0,0 +1,36 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from bot.config import settings
+from bot.utils.metrics import UpdateTrace, current_trace, record_update
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Times each handler and counts the DB queries it runs.
+
+    Register as an inner middleware (``dp.message.middleware(...)``), where the
+    matched handler is known.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        name = handler_object.callback.__name__ if handler_object else "unknown"
+        trace = UpdateTrace(handler=name)
+        token = current_trace.set(trace)
+        failed = True
+        try:
+            result = await handler(event, data)
+            failed = False
+            return result
+        finally:
+            current_trace.reset(token)
+            record_update(trace, failed, settings.slow_update_seconds)
@@ -0,0 +1,37 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, User
+
+from bot.db.session import async_session
+from bot.services.dictionary import get_user_id
+
+
+class UserIdMiddleware(BaseMiddleware):
+    """Passes ``user_id`` (users.id of the sender) to handlers that declare it.
+
+    Register as an inner middleware after DbSessionMiddleware. The id comes
+    from a process-wide cache, so usually no query is needed. On a miss the
+    handler's session is used, or a short-lived one if the handler has none.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        handler_object: HandlerObject | None = data.get("handler")
+        from_user: User | None = data.get("event_from_user")
+        if handler_object is None or from_user is None or "user_id" not in handler_object.params:
+            return await handler(event, data)
+
+        session = data.get("session")
+        if session is not None:
+            data["user_id"] = await get_user_id(session, from_user.id)
+        else:
+            async with async_session() as session:
+                data["user_id"] = await get_user_id(session, from_user.id)
+        return await handler(event, data)
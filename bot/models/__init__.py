@@ -1,5 +1,8 @@
 from bot.models.base import Base
+from bot.models.broadcast_lease import BroadcastLease
+from bot.models.explanation_cache import ExplanationCache
+from bot.models.session_state import SessionState
 from bot.models.user import User
 from bot.models.word import Word
 
-__all__ = ["Base", "User", "Word"]
+__all__ = ["Base", "BroadcastLease", "ExplanationCache", "SessionState", "User", "Word"]
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, BigInteger, DateTime, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bot.models.base import Base
+
+
+class SessionState(Base):
+    """Short-lived per-user conversation state (quiz, onboarding, pending word)."""
+
+    __tablename__ = "session_state"
+
+    namespace: Mapped[str] = mapped_column(Text, primary_key=True)
+    key: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    data: Mapped[dict] = mapped_column(JSON)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, func
+from sqlalchemy import JSON, BigInteger, DateTime, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from bot.models.base import Base
@@ -16,6 +16,17 @@ class User(Base):
     )
 
     score: Mapped[int] = mapped_column(default=0)
+    # Denormalized number of saved words, maintained by add_word/delete_word
+    word_count: Mapped[int] = mapped_column(default=0, index=True)
+
+    # Scheduled quiz delivery (see bot.services.quiz_schedule). quiz_hours are local
+    # hours in the user's timezone; NULL means settings.quiz_hours.
+    timezone: Mapped[str] = mapped_column(Text, default="UTC", server_default="UTC")
+    quiz_hours: Mapped[list[int] | None] = mapped_column(JSON(none_as_null=True), nullable=True)
+    # NULL until the scheduler assigns the next delivery time
+    next_quiz_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
 
     words: Mapped[list["Word"]] = relationship(  # noqa: F821
         back_populates="user", cascade="all, delete-orphan"
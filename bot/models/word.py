@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import JSON, DateTime, ForeignKey, Text, func
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from bot.models.base import Base
@@ -8,12 +8,30 @@ from bot.models.base import Base
 
 class Word(Base):
     __tablename__ = "words"
+    __table_args__ = (
+        Index("ix_words_user_id_due_at", "user_id", "due_at"),
+        Index("ix_words_user_id_id", "user_id", "id"),
+        Index("ix_words_user_id_created_at_id", "user_id", "created_at", "id"),
+        # One entry per word and user, whatever the case; also serves word_exists
+        Index("ix_words_user_id_lower_word", "user_id", text("lower(word)"), unique=True),
+        # Words still waiting for generated distractors
+        Index(
+            "ix_words_missing_distractors",
+            "id",
+            postgresql_where=text("distractors IS NULL"),
+            sqlite_where=text("distractors IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     word: Mapped[str] = mapped_column(Text)
     translation: Mapped[str] = mapped_column(Text)
     translations: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    # Wrong quiz options; NULL until generated, empty if the LLM never produced them
+    distractors: Mapped[list | None] = mapped_column(JSON(none_as_null=True), nullable=True)
+    # Backfill runs whose LLM response skipped this word
+    distractor_attempts: Mapped[int] = mapped_column(default=0)
     explanation: Mapped[str] = mapped_column(Text, default="")
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
@@ -24,4 +42,9 @@ class Word(Base):
     review_count: Mapped[int] = mapped_column(default=0)
     correct_count: Mapped[int] = mapped_column(default=0)
 
+    # Spaced repetition state (see bot.services.srs)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    ease: Mapped[float] = mapped_column(default=2.5)
+    interval_days: Mapped[int] = mapped_column(default=0)
+
     user: Mapped["User"] = relationship(back_populates="words")  # noqa: F821
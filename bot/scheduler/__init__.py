@@ -1,66 +1,197 @@
 import logging
+from datetime import UTC, datetime, timedelta
 
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import select
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.config import settings
 from bot.db.session import async_session
-from bot.handlers.quiz import send_quiz_question
-from bot.models.user import User
-from bot.services.dictionary import get_word_count
-from bot.services.quiz import create_session, remove_session
+from bot.scheduler.broadcast import run_sharded_broadcast
+from bot.scheduler.leases import (
+    QUIZ_RUN_PREFIX,
+    abandoned_runs,
+    claim_singleton,
+    default_owner,
+    finish_shard,
+    prune_leases,
+    run_key_for,
+    slot_for_run_key,
+    started_runs,
+)
+from bot.services.dictionary import (
+    get_words_without_distractors,
+    quiz_audience_query,
+    record_skipped_distractors,
+    set_word_distractors,
+)
+from bot.services.explanation_cache import prune_explanation_cache
+from bot.services.llm import generate_distractors_batch
+from bot.services.quiz_schedule import SLOT, reschedule_users, schedule_pending_users, slot_bounds
+from bot.services.state_store import prune_session_state
 
 logger = logging.getLogger(__name__)
 
+DISTRACTORS_INTERVAL_MINUTES = 5
 
-async def send_scheduled_quizzes(bot: Bot) -> None:
-    """Send first quiz question to all users who have enough words.
 
-    Users continue the quiz interactively by clicking "Next question".
+async def send_slot_quizzes(bot: Bot, slot: datetime) -> None:
+    """Send the first quiz question to users due in the minute ending at ``slot``.
+
+    Users continue the quiz interactively by clicking "Next question". Each
+    sent chunk moves its users on to their next delivery time.
     """
-    async with async_session() as session:
-        result = await session.execute(select(User))
-        users = result.scalars().all()
+    audience = quiz_audience_query(
+        from_counter=settings.quiz_audience_from_counter, due=slot_bounds(slot)
+    )
 
-        for user in users:
-            try:
-                count = await get_word_count(session, user.id)
-                if count < 2:
-                    continue
-
-                # Clean up any leftover session
-                remove_session(user.telegram_id)
-                create_session(
-                    user.telegram_id, user.id, total_questions=settings.quiz_words_per_session
-                )
+    async def reschedule(session: AsyncSession, rows: list[Row]) -> None:
+        await reschedule_users(session, rows, slot)
+
+    stats = await run_sharded_broadcast(
+        bot, run_key_for(slot), audience=audience, on_chunk=reschedule
+    )
+    if stats.scanned:
+        logger.info("Scheduled quizzes for %s from this worker: %s", slot, stats.summary())
 
-                chat_id = user.telegram_id
 
-                async def send_func(text, *, _chat_id=chat_id, **kwargs):
-                    await bot.send_message(
-                        chat_id=_chat_id, text=text, parse_mode="HTML", **kwargs
-                    )
+async def skipped_slots(session: AsyncSession, slot: datetime) -> list[datetime]:
+    """Recent slots before ``slot`` whose tick no replica ran, oldest first.
 
-                sent = await send_quiz_question(session, user.telegram_id, send_func=send_func)
-                if not sent:
-                    remove_session(user.telegram_id)
-            except Exception:
-                logger.exception("Failed to send quiz to user %s", user.telegram_id)
+    A dropped tick leaves no broadcast leases for resume_broadcasts to find.
+    Older slots are left to schedule_pending_users.
+    """
+    slots = [slot - SLOT * n for n in range(settings.broadcast_resume_minutes - 1, 0, -1)]
+    started = await started_runs(session, [run_key_for(s) for s in slots])
+    return [s for s in slots if run_key_for(s) not in started]
+
+
+async def send_scheduled_quizzes(bot: Bot) -> None:
+    """Runs every minute on every replica; they share each slot through leases."""
+    now = datetime.now(UTC)
+    slot = now.replace(second=0, microsecond=0)
+    try:
+        async with async_session() as session:
+            scheduled = await schedule_pending_users(session, now)
+            skipped = await skipped_slots(session, slot)
+        if scheduled:
+            logger.info("Assigned quiz times to %d users", scheduled)
+        await send_slot_quizzes(bot, slot)
+        for earlier in skipped:
+            logger.info("Sending quizzes of skipped slot %s", earlier)
+            await send_slot_quizzes(bot, earlier)
+    except Exception:
+        logger.exception("Failed to send scheduled quizzes")
+
+
+async def resume_broadcasts(bot: Bot) -> None:
+    """Finish shards of recent runs whose worker died or never showed up."""
+    since = datetime.now(UTC) - timedelta(minutes=settings.broadcast_resume_minutes)
+    try:
+        async with async_session() as session:
+            run_keys = await abandoned_runs(session, since, QUIZ_RUN_PREFIX)
+        for run_key in run_keys:
+            logger.info("Resuming abandoned broadcast %s", run_key)
+            await send_slot_quizzes(bot, slot_for_run_key(run_key))
+    except Exception:
+        logger.exception("Failed to resume broadcasts")
+
+
+async def prune_caches() -> None:
+    async with async_session() as session:
+        try:
+            await prune_explanation_cache(session)
+            await prune_leases(session, datetime.now(UTC) - timedelta(days=7))
+            await prune_session_state(session)
+        except Exception:
+            logger.exception("Failed to prune caches")
+
+
+async def backfill_distractors() -> None:
+    """Generate distractors for saved words that have none, one LLM call per batch.
+
+    Every replica runs this job at the same time; a one-shard lease per run lets
+    only one of them call the LLM.
+    """
+    now = datetime.now(UTC)
+    window = now.replace(
+        minute=now.minute - now.minute % DISTRACTORS_INTERVAL_MINUTES, second=0, microsecond=0
+    )
+    async with async_session() as session:
+        try:
+            lease = await claim_singleton(
+                session,
+                f"distractors:{window:%Y-%m-%dT%H:%M}",
+                default_owner(),
+                settings.broadcast_lease_seconds,
+            )
+            if lease is None:
+                return
+            try:
+                words = await get_words_without_distractors(
+                    session, limit=settings.distractors_batch_size
+                )
+                if not words:
+                    return
+                # Ends the read's transaction, so the pool connection is not held
+                # for the seconds the LLM takes
+                await session.commit()
+                generated = await generate_distractors_batch(
+                    [(w.word, w.translation) for w in words]
+                )
+                paired = list(zip(words, generated, strict=True))
+                await set_word_distractors(session, {w.id: d for w, d in paired if d})
+                # Words the LLM skipped stay NULL and are retried by the next runs
+                await record_skipped_distractors(session, [w.id for w, d in paired if not d])
+                logger.info("Generated distractors for %d words", sum(1 for d in generated if d))
+            finally:
+                await finish_shard(session, lease)
+        except Exception:
+            logger.exception("Failed to backfill distractors")
 
 
 def setup_scheduler(bot: Bot) -> AsyncIOScheduler:
     scheduler = AsyncIOScheduler()
 
-    for hour in settings.quiz_hours:
-        scheduler.add_job(
-            send_scheduled_quizzes,
-            "cron",
-            hour=hour,
-            minute=0,
-            args=[bot],
-            id=f"quiz_{hour}",
-            replace_existing=True,
-        )
+    # One run at a time per replica. A tick that is late, e.g. because the previous
+    # broadcast ran over a minute, still runs (once) instead of being dropped;
+    # slots whose tick never ran anywhere are sent by a later one (see skipped_slots).
+    broadcast_options = {"max_instances": 1, "coalesce": True, "misfire_grace_time": None}
+
+    scheduler.add_job(
+        send_scheduled_quizzes,
+        "cron",
+        second=0,
+        args=[bot],
+        id="scheduled_quizzes",
+        replace_existing=True,
+        **broadcast_options,
+    )
+
+    scheduler.add_job(
+        resume_broadcasts,
+        "interval",
+        minutes=1,
+        args=[bot],
+        id="resume_broadcasts",
+        replace_existing=True,
+        **broadcast_options,
+    )
+    scheduler.add_job(
+        prune_caches,
+        "interval",
+        hours=1,
+        id="prune_caches",
+        replace_existing=True,
+    )
+    # Cron rather than interval, so replicas agree on the lease window of a run
+    scheduler.add_job(
+        backfill_distractors,
+        "cron",
+        minute=f"*/{DISTRACTORS_INTERVAL_MINUTES}",
+        id="backfill_distractors",
+        replace_existing=True,
+    )
 
     return scheduler
@@ -0,0 +1,249 @@
+"""Fan-out of scheduled quizzes to all users.
+
+Users with enough words are streamed from the DB in chunks and handed to a
+fixed pool of workers. With several replicas the audience is split into
+``telegram_id % shards`` slices that replicas claim through DB leases (see
+``bot.scheduler.leases``). All sends share one token bucket that keeps us under
+Telegram's global bot limit (~30 messages/second). Each user gets one message
+per run, so the per-chat limit (about 1 message/second) holds without extra
+pacing.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import Row, Select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import settings
+from bot.db.session import async_session
+from bot.handlers.quiz import send_quiz_question
+from bot.models.user import User
+from bot.scheduler.leases import (
+    LeaseLostError,
+    checkpoint,
+    claim_shard,
+    default_owner,
+    ensure_run,
+    finish_shard,
+)
+from bot.services.dictionary import quiz_audience_query
+from bot.services.quiz import remove_session, start_session
+from bot.utils.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BroadcastStats:
+    scanned: int = 0
+    sent: int = 0
+    skipped: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def summary(self) -> str:
+        rate = self.sent / self.duration if self.duration > 0 else 0.0
+        return (
+            f"scanned={self.scanned} sent={self.sent} skipped={self.skipped} "
+            f"failed={self.failed} duration={self.duration:.1f}s rate={rate:.1f} msg/s"
+        )
+
+    def add(self, other: "BroadcastStats") -> None:
+        self.scanned += other.scanned
+        self.sent += other.sent
+        self.skipped += other.skipped
+        self.failed += other.failed
+
+
+async def iter_quiz_audience(
+    sessionmaker: async_sessionmaker[AsyncSession],
+    chunk_size: int,
+    audience: Select | None = None,
+    shard: int = 0,
+    shards: int = 1,
+    after_user_id: int = 0,
+) -> AsyncIterator[list[Row]]:
+    """Yield chunks of quiz_audience_query rows, by default all users with enough words.
+
+    The whole audience comes from a single query read through a server-side
+    cursor, ``chunk_size`` rows at a time. Only users of the given shard with
+    an id above ``after_user_id`` are included.
+    """
+    query = audience
+    if query is None:
+        query = quiz_audience_query(from_counter=settings.quiz_audience_from_counter)
+    if shards > 1:
+        query = query.where(User.telegram_id % shards == shard)
+    if after_user_id:
+        query = query.where(User.id > after_user_id)
+    async with sessionmaker() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield list(partition)
+
+
+async def send_quiz_to_user(
+    bot: Bot,
+    sessionmaker: async_sessionmaker[AsyncSession],
+    user_id: int,
+    telegram_id: int,
+    bucket: TokenBucket,
+) -> bool:
+    """Start a quiz for one user and send its first question. Returns True if sent."""
+    async with sessionmaker() as session:
+        # Clean up any leftover session
+        await remove_session(telegram_id, session)
+        quiz_session = await start_session(
+            session, telegram_id, user_id, total_questions=settings.quiz_words_per_session
+        )
+    if quiz_session is None:
+        return False
+
+    async def send_func(text, **kwargs):
+        await bucket.acquire()
+        try:
+            await bot.send_message(chat_id=telegram_id, text=text, parse_mode="HTML", **kwargs)
+        except TelegramRetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+            await bot.send_message(chat_id=telegram_id, text=text, parse_mode="HTML", **kwargs)
+
+    sent = await send_quiz_question(telegram_id, send_func=send_func, quiz_session=quiz_session)
+    if not sent:
+        await remove_session(telegram_id)
+    return sent
+
+
+async def run_broadcast(
+    bot: Bot,
+    sessionmaker: async_sessionmaker[AsyncSession] = async_session,
+    audience: Select | None = None,
+    shard: int = 0,
+    shards: int = 1,
+    after_user_id: int = 0,
+    on_checkpoint: Callable[[list[Row]], Awaitable[None]] | None = None,
+) -> BroadcastStats:
+    """Send the first quiz question to every user of the audience.
+
+    With ``on_checkpoint`` the pool is drained after every chunk and the callback
+    gets the chunk's rows, so an interrupted run can resume after the last one.
+    """
+    stats = BroadcastStats()
+    bucket = TokenBucket(settings.broadcast_rate_per_second, settings.broadcast_burst)
+    queue: asyncio.Queue[Row | None] = asyncio.Queue(maxsize=settings.broadcast_concurrency * 4)
+
+    async def worker() -> None:
+        while (item := await queue.get()) is not None:
+            user_id, telegram_id = item.id, item.telegram_id
+            try:
+                if await send_quiz_to_user(bot, sessionmaker, user_id, telegram_id, bucket):
+                    stats.sent += 1
+                else:
+                    stats.skipped += 1
+            except TelegramForbiddenError:
+                # User blocked the bot
+                await remove_session(telegram_id)
+                stats.skipped += 1
+            except Exception:
+                await remove_session(telegram_id)
+                stats.failed += 1
+                logger.exception("Failed to send quiz to user %s", telegram_id)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(settings.broadcast_concurrency)]
+    chunks = iter_quiz_audience(
+        sessionmaker, settings.broadcast_chunk_size, audience, shard, shards, after_user_id
+    )
+    try:
+        async for chunk in chunks:
+            for item in chunk:
+                stats.scanned += 1
+                await queue.put(item)
+            if on_checkpoint is not None and chunk:
+                await queue.join()
+                await on_checkpoint(chunk)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+
+    stats.finished_at = time.monotonic()
+    logger.info("Quiz broadcast finished: %s", stats.summary())
+    return stats
+
+
+async def run_sharded_broadcast(
+    bot: Bot,
+    run_key: str,
+    sessionmaker: async_sessionmaker[AsyncSession] = async_session,
+    owner: str | None = None,
+    audience: Select | None = None,
+    on_chunk: Callable[[AsyncSession, list[Row]], Awaitable[None]] | None = None,
+) -> BroadcastStats:
+    """Claim shards of the run one at a time and broadcast to them until none are left.
+
+    ``on_chunk`` runs after every sent chunk in the same transaction as the
+    checkpoint. Every worker of a run must pass the same ``audience``.
+
+    Safe to call from every replica at once: each shard is sent by whichever
+    worker holds its lease, and a shard whose owner stopped renewing is resumed
+    from its last checkpoint. Users of the chunk that was in progress when a
+    worker died may get the quiz twice; nobody is skipped.
+    """
+    owner = owner or default_owner()
+    lease_seconds = settings.broadcast_lease_seconds
+    async with sessionmaker() as session:
+        await ensure_run(session, run_key, settings.broadcast_shards)
+
+    total = BroadcastStats()
+    while True:
+        async with sessionmaker() as session:
+            lease = await claim_shard(session, run_key, owner, lease_seconds)
+        if lease is None:
+            break
+        logger.info(
+            "Broadcasting %s shard %d/%d after user %d",
+            run_key,
+            lease.shard,
+            lease.shards,
+            lease.cursor,
+        )
+
+        async def save_progress(chunk: list[Row], lease=lease) -> None:
+            async with sessionmaker() as session:
+                if on_chunk is not None:
+                    await on_chunk(session, chunk)
+                await checkpoint(session, lease, chunk[-1].id, lease_seconds)
+
+        try:
+            stats = await run_broadcast(
+                bot,
+                sessionmaker,
+                audience=audience,
+                shard=lease.shard,
+                shards=lease.shards,
+                after_user_id=lease.cursor,
+                on_checkpoint=save_progress,
+            )
+            async with sessionmaker() as session:
+                await finish_shard(session, lease)
+        except LeaseLostError:
+            logger.warning("Lost lease on %s shard %d, moving on", run_key, lease.shard)
+            continue
+        total.add(stats)
+
+    total.finished_at = time.monotonic()
+    return total
@@ -0,0 +1,180 @@
+"""DB leases that split a scheduled broadcast between bot replicas.
+
+Each run (the quizzes of one scheduler minute) gets one ``broadcast_leases`` row per shard.
+Jobs that must run on a single replica use a run with one shard (see claim_singleton).
+A worker owns a shard while its lease is fresh and renews it together with a
+progress cursor; if the worker dies, the lease expires and any other worker
+can claim the shard and resume after the cursor. Every state change is a
+single conditional UPDATE, so this works the same on SQLite and Postgres.
+"""
+
+import os
+import random
+import socket
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import settings
+from bot.models.broadcast_lease import BroadcastLease
+
+
+class LeaseLostError(Exception):
+    """Raised when another worker has taken over a shard we were processing."""
+
+
+@dataclass
+class ShardLease:
+    run_key: str
+    shard: int
+    shards: int
+    owner: str
+    cursor: int
+
+
+def default_owner() -> str:
+    return settings.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+
+QUIZ_RUN_PREFIX = "quiz:"
+
+
+def run_key_for(slot: datetime) -> str:
+    return f"{QUIZ_RUN_PREFIX}{slot:%Y-%m-%dT%H:%M}"
+
+
+def slot_for_run_key(run_key: str) -> datetime:
+    return datetime.strptime(run_key, "quiz:%Y-%m-%dT%H:%M").replace(tzinfo=UTC)
+
+
+def _claimable(now: datetime):
+    return (
+        BroadcastLease.finished_at.is_(None),
+        or_(BroadcastLease.owner.is_(None), BroadcastLease.lease_until < now),
+    )
+
+
+async def ensure_run(session: AsyncSession, run_key: str, shards: int) -> None:
+    """Create the shard rows of a run unless another worker already did."""
+    result = await session.execute(
+        select(BroadcastLease.shard).where(BroadcastLease.run_key == run_key)
+    )
+    existing = set(result.scalars())
+    missing = [shard for shard in range(shards) if shard not in existing]
+    if not missing:
+        return
+    now = datetime.now(UTC)
+    session.add_all(
+        BroadcastLease(run_key=run_key, shard=shard, created_at=now) for shard in missing
+    )
+    try:
+        await session.commit()
+    except IntegrityError:
+        # Another worker created them at the same time
+        await session.rollback()
+
+
+async def claim_shard(
+    session: AsyncSession, run_key: str, owner: str, lease_seconds: float
+) -> ShardLease | None:
+    """Take over one unfinished shard that nobody holds a live lease on."""
+    now = datetime.now(UTC)
+    shards = await session.scalar(
+        select(func.count()).select_from(BroadcastLease).where(BroadcastLease.run_key == run_key)
+    )
+    result = await session.execute(
+        select(BroadcastLease.shard).where(BroadcastLease.run_key == run_key, *_claimable(now))
+    )
+    candidates = list(result.scalars())
+    # Start at a random shard so workers starting together don't all race for shard 0
+    random.shuffle(candidates)
+
+    for shard in candidates:
+        claimed = await session.execute(
+            update(BroadcastLease)
+            .where(BroadcastLease.run_key == run_key, BroadcastLease.shard == shard)
+            .where(*_claimable(now))
+            .values(owner=owner, lease_until=now + timedelta(seconds=lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        if claimed.rowcount == 1:
+            cursor = await session.scalar(
+                select(BroadcastLease.cursor).where(
+                    BroadcastLease.run_key == run_key, BroadcastLease.shard == shard
+                )
+            )
+            return ShardLease(run_key, shard, shards or 0, owner, cursor or 0)
+    return None
+
+
+async def claim_singleton(
+    session: AsyncSession, run_key: str, owner: str, lease_seconds: float
+) -> ShardLease | None:
+    """Become the only worker of a one-shard run, or None if another one already is."""
+    await ensure_run(session, run_key, 1)
+    return await claim_shard(session, run_key, owner, lease_seconds)
+
+
+async def _update_owned(session: AsyncSession, lease: ShardLease, **values) -> None:
+    result = await session.execute(
+        update(BroadcastLease)
+        .where(
+            BroadcastLease.run_key == lease.run_key,
+            BroadcastLease.shard == lease.shard,
+            BroadcastLease.owner == lease.owner,
+            BroadcastLease.finished_at.is_(None),
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    if result.rowcount != 1:
+        raise LeaseLostError(f"Lost lease on {lease.run_key} shard {lease.shard}")
+
+
+async def checkpoint(
+    session: AsyncSession, lease: ShardLease, cursor: int, lease_seconds: float
+) -> None:
+    """Record progress and renew the lease. Raises LeaseLostError if it was taken over."""
+    lease_until = datetime.now(UTC) + timedelta(seconds=lease_seconds)
+    await _update_owned(session, lease, cursor=cursor, lease_until=lease_until)
+    lease.cursor = cursor
+
+
+async def finish_shard(session: AsyncSession, lease: ShardLease) -> None:
+    await _update_owned(session, lease, finished_at=datetime.now(UTC))
+
+
+async def started_runs(session: AsyncSession, run_keys: list[str]) -> set[str]:
+    """The runs among ``run_keys`` that some worker has already created."""
+    result = await session.execute(
+        select(BroadcastLease.run_key).where(BroadcastLease.run_key.in_(run_keys)).distinct()
+    )
+    return set(result.scalars())
+
+
+async def abandoned_runs(session: AsyncSession, since: datetime, prefix: str = "") -> list[str]:
+    """Runs started after ``since`` that still have shards nobody is working on."""
+    now = datetime.now(UTC)
+    result = await session.execute(
+        select(BroadcastLease.run_key)
+        .where(
+            BroadcastLease.created_at >= since,
+            BroadcastLease.run_key.startswith(prefix, autoescape=True),
+            *_claimable(now),
+        )
+        .distinct()
+    )
+    return list(result.scalars())
+
+
+async def prune_leases(session: AsyncSession, older_than: datetime) -> int:
+    result = await session.execute(
+        delete(BroadcastLease).where(BroadcastLease.created_at < older_than)
+    )
+    await session.commit()
+    return result.rowcount or 0
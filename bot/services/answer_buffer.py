@@ -0,0 +1,108 @@
+"""Write-behind buffer for quiz answers.
+
+With ``settings.answer_write_behind`` the quiz handler acknowledges an answer
+right away and leaves the review and score updates here. They are written
+together by ``apply_answers`` every ``answer_flush_ms`` or as soon as
+``answer_flush_max_events`` answers are waiting, whichever comes first. The
+price is that /stats lags by up to one flush interval, and a crash loses the
+answers of the last interval. Answers that still fail to be written after
+``answer_flush_max_retries`` retries are dropped. The buffer is flushed on
+shutdown.
+"""
+
+import asyncio
+import contextlib
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import settings
+from bot.db.session import async_session
+from bot.services.dictionary import Answer, apply_answers
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerBuffer:
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession] = async_session,
+        interval: float | None = None,
+        max_events: int | None = None,
+        max_retries: int | None = None,
+    ) -> None:
+        self.interval = interval if interval is not None else settings.answer_flush_ms / 1000
+        self.max_events = max_events or settings.answer_flush_max_events
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.answer_flush_max_retries
+        )
+        self._sessionmaker = sessionmaker
+        self._pending: list[Answer] = []
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._failures = 0  # Failed flushes in a row
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, answer: Answer) -> None:
+        self._pending.append(answer)
+        if len(self._pending) >= self.max_events:
+            self._full.set()
+
+    async def flush(self) -> int:
+        """Write all buffered answers. Returns how many were written.
+
+        On failure the answers are kept and written with the next flush, unless
+        ``max_retries`` flushes in a row have failed already: then they are dropped,
+        so that a DB outage or a bad answer can't grow the buffer forever.
+        """
+        async with self._lock:
+            answers, self._pending = self._pending, []
+            self._full.clear()
+            if not answers:
+                return 0
+            try:
+                async with self._sessionmaker() as session:
+                    await apply_answers(session, answers)
+            except Exception:
+                if self._failures >= self.max_retries:
+                    logger.exception(
+                        "Dropping %d buffered quiz answers after %d failed writes",
+                        len(answers),
+                        self._failures + 1,
+                    )
+                    self._failures = 0
+                    return 0
+                self._failures += 1
+                logger.exception("Failed to write %d buffered quiz answers", len(answers))
+                self._pending[:0] = answers
+                return 0
+            self._failures = 0
+            return len(answers)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write what is left."""
+        if self._task is not None:
+            # Let a flush in progress finish instead of cancelling it halfway
+            self._stopping = True
+            self._full.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+
+answer_buffer = AnswerBuffer()
@@ -1,10 +1,54 @@
-from datetime import UTC, datetime
+import functools
+import itertools
+import random
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 
-from sqlalchemy import case, func, select
+from sqlalchemy import (
+    CompoundSelect,
+    DateTime,
+    Integer,
+    Interval,
+    Select,
+    bindparam,
+    case,
+    cast,
+    func,
+    select,
+    tuple_,
+    type_coerce,
+    union_all,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from bot.config import settings
 from bot.models.user import User
 from bot.models.word import Word
+from bot.services.srs import (
+    FIRST_INTERVAL,
+    MIN_EASE,
+    RELEARN_DELAY,
+    SECOND_INTERVAL,
+    ease_change,
+)
+
+# Process-wide LRU of telegram_id -> users.id. Users are never deleted or
+# re-keyed, so entries cannot go stale.
+_user_ids: OrderedDict[int, int] = OrderedDict()
+
+
+def clear_user_id_cache() -> None:
+    _user_ids.clear()
+
+
+def _remember_user_id(telegram_id: int, user_id: int) -> None:
+    _user_ids[telegram_id] = user_id
+    _user_ids.move_to_end(telegram_id)
+    while len(_user_ids) > settings.user_id_cache_size:
+        _user_ids.popitem(last=False)
 
 
 async def get_or_create_user(session: AsyncSession, telegram_id: int) -> User:
@@ -15,9 +59,23 @@ async def get_or_create_user(session: AsyncSession, telegram_id: int) -> User:
         session.add(user)
         await session.commit()
         await session.refresh(user)
+    _remember_user_id(telegram_id, user.id)
     return user
 
 
+async def get_user_id(session: AsyncSession, telegram_id: int) -> int:
+    """users.id of the Telegram user, creating the user on first contact.
+
+    Only the first lookup per process goes to the DB.
+    """
+    user_id = _user_ids.get(telegram_id)
+    if user_id is not None:
+        _user_ids.move_to_end(telegram_id)
+        return user_id
+    user = await get_or_create_user(session, telegram_id)
+    return user.id
+
+
 async def add_word(
     session: AsyncSession,
     user_id: int,
@@ -25,30 +83,68 @@ async def add_word(
     translation: str,
     explanation: str,
     translations: list[str] | None = None,
+    distractors: list[str] | None = None,
 ) -> Word:
+    """Save a word to the user's dictionary.
+
+    If the user already has it (in any case), nothing changes and the saved
+    word is returned.
+    """
     db_word = Word(
         user_id=user_id,
         word=word,
         translation=translation,
         translations=translations or [translation],
+        distractors=distractors or None,
         explanation=explanation,
+        # Set here rather than by the server default so that the stored value
+        # round-trips exactly through a page cursor, on SQLite too
+        created_at=datetime.now(UTC),
+    )
+    try:
+        async with session.begin_nested():
+            session.add(db_word)
+    except IntegrityError:
+        # Saved meanwhile, e.g. by a double-tapped save button
+        result = await session.execute(
+            select(Word).where(Word.user_id == user_id, func.lower(Word.word) == func.lower(word))
+        )
+        return result.scalar_one()
+    await session.execute(
+        update(User).where(User.id == user_id).values(word_count=User.word_count + 1)
     )
-    session.add(db_word)
     await session.commit()
     await session.refresh(db_word)
     return db_word
 
 
+# Position in a user's word list: (created_at, id) of a word
+WordCursor = tuple[datetime, int]
+
+
 async def get_words(
-    session: AsyncSession, user_id: int, limit: int = 20, offset: int = 0
+    session: AsyncSession,
+    user_id: int,
+    limit: int = 20,
+    after: WordCursor | None = None,
+    before: WordCursor | None = None,
 ) -> list[Word]:
-    result = await session.execute(
-        select(Word)
-        .where(Word.user_id == user_id)
-        .order_by(Word.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-    )
+    """A page of the user's words, newest first.
+
+    Keyset pagination: ``after`` returns the words that come after the cursor
+    in the list, ``before`` the ones right before it. Every page is a range read
+    of the (user_id, created_at, id) index, however deep it is.
+    """
+    key = tuple_(Word.created_at, Word.id)
+    query = select(Word).where(Word.user_id == user_id).limit(limit)
+    if before is not None:
+        result = await session.execute(
+            query.where(key > before).order_by(Word.created_at, Word.id)
+        )
+        return list(reversed(result.scalars().all()))
+    if after is not None:
+        query = query.where(key < after)
+    result = await session.execute(query.order_by(Word.created_at.desc(), Word.id.desc()))
     return list(result.scalars().all())
 
 
@@ -57,12 +153,44 @@ async def get_word_count(session: AsyncSession, user_id: int) -> int:
     return result.scalar_one()
 
 
+def quiz_audience_query(
+    min_words: int = 2,
+    from_counter: bool = False,
+    due: tuple[datetime, datetime] | None = None,
+) -> Select:
+    """Users with at least ``min_words`` saved words, in id order.
+
+    Rows carry what the scheduler needs: id, telegram_id, timezone and quiz_hours.
+    By default counts words with one grouped join; with ``from_counter`` it reads
+    the maintained users.word_count column instead (an index scan, no join).
+    ``due=(start, end)`` keeps only users with ``start < next_quiz_at <= end``.
+    """
+    columns = (User.id, User.telegram_id, User.timezone, User.quiz_hours)
+    if from_counter:
+        query = select(*columns).where(User.word_count >= min_words)
+    else:
+        # Grouping by the primary key alone lets the other user columns be selected
+        query = (
+            select(*columns)
+            .join(Word, Word.user_id == User.id)
+            .group_by(User.id)
+            .having(func.count(Word.id) >= min_words)
+        )
+    if due is not None:
+        start, end = due
+        query = query.where(User.next_quiz_at > start, User.next_quiz_at <= end)
+    return query.order_by(User.id)
+
+
 async def delete_word(session: AsyncSession, word_id: int, user_id: int) -> bool:
     result = await session.execute(select(Word).where(Word.id == word_id, Word.user_id == user_id))
     word = result.scalar_one_or_none()
     if word is None:
         return False
     await session.delete(word)
+    await session.execute(
+        update(User).where(User.id == user_id).values(word_count=User.word_count - 1)
+    )
     await session.commit()
     return True
 
@@ -84,51 +212,233 @@ async def get_words_for_review(
     limit: int = 5,
     exclude_word_ids: list[int] | None = None,
 ) -> list[Word]:
-    """Get words that need review, prioritizing low accuracy and least reviewed.
+    """Get the words that are most due for review (earliest due_at first).
 
-    Priority order:
-    1. Never reviewed words first (last_reviewed_at IS NULL)
-    2. Low accuracy words (correct_count / review_count ASC)
-    3. Oldest reviewed words
-    4. Random tie-breaking
+    New words are due from the moment they are saved; see bot.services.srs
+    for how due_at moves after each answer. Served by the (user_id, due_at) index.
     """
-    safe_review_count = case((Word.review_count > 0, Word.review_count), else_=1)
-    accuracy = Word.correct_count * 1.0 / safe_review_count
     query = select(Word).where(Word.user_id == user_id)
     if exclude_word_ids:
         query = query.where(Word.id.notin_(exclude_word_ids))
+    result = await session.execute(query.order_by(Word.due_at, Word.id).limit(limit))
+    return list(result.scalars().all())
+
+
+# Dictionaries up to this size are sampled from a single bounded index range read
+SAMPLE_SCAN_LIMIT = 64
+
+
+async def sample_translations(
+    session: AsyncSession, user_id: int, k: int
+) -> list[tuple[int, str]]:
+    """Sample up to ``k`` distinct (word_id, translation) pairs of a user's words.
+
+    Avoids ``ORDER BY random()``, which scans and sorts all of the user's words.
+    Small dictionaries are read whole (at most SAMPLE_SCAN_LIMIT rows) and
+    sampled uniformly in memory. Larger ones are sampled by probing the
+    (user_id, id) index at ``k`` random points between the user's first and
+    last word id, so the cost stays O(k log n) regardless of dictionary size.
+    Words that follow larger id gaps are picked somewhat more often, which is
+    fine for quiz distractors.
+    """
+    if k <= 0:
+        return []
+
+    head = await session.execute(
+        select(Word.id, Word.translation)
+        .where(Word.user_id == user_id)
+        .order_by(Word.id)
+        .limit(SAMPLE_SCAN_LIMIT + 1)
+    )
+    rows = [(row.id, row.translation) for row in head]
+    if len(rows) <= SAMPLE_SCAN_LIMIT:
+        return random.sample(rows, min(k, len(rows)))
+
+    last = await session.execute(select(func.max(Word.id)).where(Word.user_id == user_id))
+    low, high = rows[0][0], last.scalar_one()
+
+    params = {f"pivot_{i}": random.randint(low, high) for i in range(k)}
+    result = await session.execute(_probe_statement(k), {"user_id": user_id, **params})
+    return list({row.id: (row.id, row.translation) for row in result}.values())
+
+
+@functools.lru_cache(maxsize=32)
+def _probe_statement(k: int) -> CompoundSelect:
+    """UNION ALL of ``k`` single-row index probes, built once per ``k``."""
+    probes = [
+        select(Word.id, Word.translation)
+        .where(Word.user_id == bindparam("user_id"), Word.id >= bindparam(f"pivot_{i}"))
+        .order_by(Word.id)
+        .limit(1)
+        .subquery()
+        for i in range(k)
+    ]
+    return union_all(*(select(probe.c.id, probe.c.translation) for probe in probes))
+
+
+async def get_words_without_distractors(session: AsyncSession, limit: int = 20) -> list[Word]:
     result = await session.execute(
-        query.order_by(
-            Word.last_reviewed_at.asc().nulls_first(),
-            accuracy.asc(),
-            Word.last_reviewed_at.asc(),
-            func.random(),
-        ).limit(limit)
+        select(Word).where(Word.distractors.is_(None)).order_by(Word.id).limit(limit)
     )
     return list(result.scalars().all())
 
 
-async def update_word_review(session: AsyncSession, word_id: int, is_correct: bool) -> None:
-    result = await session.execute(select(Word).where(Word.id == word_id))
-    word = result.scalar_one_or_none()
-    if word is None:
+async def set_word_distractors(session: AsyncSession, distractors: dict[int, list[str]]) -> None:
+    """Store generated distractors: word_id -> list of wrong translations."""
+    if not distractors:
+        return
+    await session.execute(
+        update(Word),
+        [{"id": word_id, "distractors": values} for word_id, values in distractors.items()],
+    )
+    await session.commit()
+
+
+async def record_skipped_distractors(session: AsyncSession, word_ids: list[int]) -> None:
+    """Count a backfill run that got no distractors for these words.
+
+    They stay NULL, so the next run retries them, until they have been skipped
+    ``settings.distractors_max_attempts`` times; then they get an empty list and
+    quizzes fall back to the user's other words for them.
+    """
+    if not word_ids:
         return
-    word.review_count += 1
-    if is_correct:
-        word.correct_count += 1
-    word.last_reviewed_at = datetime.now(UTC)
+    await session.execute(
+        update(Word)
+        .where(Word.id.in_(word_ids))
+        .values(distractor_attempts=Word.distractor_attempts + 1)
+    )
+    await session.execute(
+        update(Word)
+        .where(
+            Word.id.in_(word_ids),
+            Word.distractor_attempts >= settings.distractors_max_attempts,
+        )
+        .values(distractors=[])
+    )
     await session.commit()
 
 
+def _plus_days(dialect: str, now: datetime, days):
+    start = bindparam("now", now, type_=DateTime(timezone=True))
+    if dialect == "postgresql":
+        return start + type_coerce(func.make_interval(0, 0, 0, days), Interval)
+    return func.datetime(start, func.printf("+%d days", days), type_=DateTime(timezone=True))
+
+
+def _review_values(dialect: str, is_correct: bool, now: datetime) -> dict:
+    """SET clause that applies schedule_review to the row, in SQL.
+
+    Every expression reads the row's values from before the update.
+    """
+    change = ease_change(is_correct)
+    values = {
+        "review_count": Word.review_count + 1,
+        "correct_count": Word.correct_count + int(is_correct),
+        "last_reviewed_at": now,
+        "ease": case((Word.ease + change < MIN_EASE, MIN_EASE), else_=Word.ease + change),
+    }
+    if not is_correct:
+        return values | {"interval_days": 0, "due_at": now + RELEARN_DELAY}
+
+    grown = cast(func.round(Word.interval_days * Word.ease), Integer)
+    return values | {
+        "interval_days": case(
+            (Word.interval_days == 0, FIRST_INTERVAL),
+            (Word.interval_days == 1, SECOND_INTERVAL),
+            else_=grown,
+        ),
+        "due_at": case(
+            (Word.interval_days == 0, now + timedelta(days=FIRST_INTERVAL)),
+            (Word.interval_days == 1, now + timedelta(days=SECOND_INTERVAL)),
+            else_=_plus_days(dialect, now, grown),
+        ),
+    }
+
+
+async def update_word_review(
+    session: AsyncSession, word_id: int, is_correct: bool, user_id: int | None = None
+) -> bool:
+    """Count an answer and reschedule the word in a single UPDATE. Does not commit.
+
+    With ``user_id`` only that user's word is updated. Returns False if no word matched.
+    """
+    dialect = session.get_bind().dialect.name
+    query = (
+        update(Word)
+        .where(Word.id == word_id)
+        .values(_review_values(dialect, is_correct, datetime.now(UTC)))
+        .returning(Word.id)
+    )
+    if user_id is not None:
+        query = query.where(Word.user_id == user_id)
+    result = await session.execute(query)
+    return result.scalar_one_or_none() is not None
+
+
 async def update_user_score(session: AsyncSession, user_id: int, points: int) -> int:
-    """Add points to user's score. Returns new total score."""
-    result = await session.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None:
-        return 0
-    user.score += points
+    """Add points to the user's score in a single UPDATE. Does not commit.
+
+    Returns the new total score (0 if there is no such user).
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(score=User.score + points)
+        .returning(User.score)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def record_answer(
+    session: AsyncSession, user_id: int, word_id: int, is_correct: bool, points: int
+) -> None:
+    """Apply a quiz answer to the word's schedule and the user's score in one transaction."""
+    await update_word_review(session, word_id, is_correct, user_id=user_id)
+    if points:
+        await update_user_score(session, user_id, points)
+    await session.commit()
+
+
+@dataclass(frozen=True, slots=True)
+class Answer:
+    user_id: int
+    word_id: int
+    is_correct: bool
+    points: int
+
+
+async def apply_answers(session: AsyncSession, answers: list[Answer]) -> None:
+    """Apply many quiz answers with a few executemany UPDATEs and one commit.
+
+    Reviews are written in their original order, one statement per run of
+    equally graded answers, so repeated answers to one word chain as in
+    record_answer. Points are summed per user first.
+    """
+    dialect = session.get_bind().dialect.name
+    now = datetime.now(UTC)
+    words = Word.__table__
+    for is_correct, run in itertools.groupby(answers, key=lambda a: a.is_correct):
+        await session.execute(
+            update(words)
+            .where(words.c.id == bindparam("b_word_id"), words.c.user_id == bindparam("b_user_id"))
+            .values(_review_values(dialect, is_correct, now)),
+            [{"b_word_id": a.word_id, "b_user_id": a.user_id} for a in run],
+        )
+
+    points: dict[int, int] = defaultdict(int)
+    for answer in answers:
+        if answer.points:
+            points[answer.user_id] += answer.points
+    if points:
+        users = User.__table__
+        await session.execute(
+            update(users)
+            .where(users.c.id == bindparam("b_user_id"))
+            .values(score=users.c.score + bindparam("b_points")),
+            [{"b_user_id": user_id, "b_points": n} for user_id, n in points.items()],
+        )
     await session.commit()
-    return user.score
 
 
 async def get_stats(session: AsyncSession, user_id: int) -> dict:
@@ -0,0 +1,281 @@
+"""Cross-user cache for LLM word explanations.
+
+Lookups go through a small in-process LRU first, then the ``explanation_cache``
+table, and only fall back to the LLM on a miss in both. When the LLM is
+unavailable, expired cache entries and the onboarding word bank are used instead.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import settings
+from bot.models.explanation_cache import ExplanationCache
+from bot.services.llm import (
+    WordExplanation,
+    explain_word,
+    format_explanation,
+    normalize_word,
+    stream_explain_word,
+)
+from bot.services.word_bank import lookup_word
+from bot.utils.metrics import register_metric
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    db_hits: int = 0
+    misses: int = 0
+    fallbacks: int = 0  # Served from stale cache or word bank while the LLM failed
+
+    def as_dict(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        hits = self.memory_hits + self.db_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "fallbacks": self.fallbacks,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_size": len(_memory),
+        }
+
+
+stats = CacheStats()
+
+# In-process LRU: normalized word -> (expires_at monotonic seconds, explanation)
+_memory: OrderedDict[str, tuple[float, WordExplanation]] = OrderedDict()
+
+
+def get_cache_stats() -> dict:
+    return stats.as_dict()
+
+
+def _register_metrics() -> None:
+    for field in ("memory_hits", "db_hits", "misses", "fallbacks"):
+        register_metric(
+            f"bot_explanation_cache_{field}_total",
+            "counter",
+            f"Explanation cache lookups: {field.replace('_', ' ')}",
+            lambda field=field: getattr(stats, field),
+        )
+    register_metric(
+        "bot_explanation_cache_memory_size",
+        "gauge",
+        "Explanations held in the in-process LRU",
+        lambda: len(_memory),
+    )
+
+
+_register_metrics()
+
+
+def clear_memory_cache() -> None:
+    _memory.clear()
+
+
+def _ttl() -> timedelta:
+    return timedelta(days=settings.explanation_cache_ttl_days)
+
+
+def _remember(key: str, explanation: WordExplanation, created_at: datetime | None = None) -> None:
+    """Keep an explanation in memory until its DB row expires (``created_at`` + TTL)."""
+    ttl = _ttl()
+    if created_at is not None:
+        if created_at.tzinfo is None:  # SQLite returns naive UTC values
+            created_at = created_at.replace(tzinfo=UTC)
+        ttl -= datetime.now(UTC) - created_at
+    if ttl <= timedelta(0):
+        return
+    _memory[key] = (time.monotonic() + ttl.total_seconds(), explanation)
+    _memory.move_to_end(key)
+    while len(_memory) > settings.explanation_cache_memory_size:
+        _memory.popitem(last=False)
+
+
+def _recall(key: str) -> WordExplanation | None:
+    entry = _memory.get(key)
+    if entry is None:
+        return None
+    expires_at, explanation = entry
+    if time.monotonic() > expires_at:
+        del _memory[key]
+        return None
+    _memory.move_to_end(key)
+    return explanation
+
+
+async def get_cached_explanation(
+    session: AsyncSession, word: str, allow_stale: bool = False
+) -> WordExplanation | None:
+    """Return a cached explanation for the word, or None on a miss.
+
+    With ``allow_stale`` expired DB entries are returned as well.
+    """
+    key = normalize_word(word)
+
+    explanation = _recall(key)
+    if explanation is not None:
+        stats.memory_hits += 1
+        return explanation
+
+    query = select(ExplanationCache.data, ExplanationCache.created_at).where(
+        ExplanationCache.key == key
+    )
+    if not allow_stale:
+        query = query.where(ExplanationCache.created_at >= datetime.now(UTC) - _ttl())
+    result = await session.execute(query)
+    row = result.one_or_none()
+    if row is None:
+        stats.misses += 1
+        return None
+
+    stats.db_hits += 1
+    explanation = WordExplanation(**row.data)
+    _remember(key, explanation, row.created_at)
+    return explanation
+
+
+def _upsert(dialect: str):
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(ExplanationCache)
+    return stmt.on_conflict_do_update(
+        index_elements=[ExplanationCache.key],
+        set_={"data": stmt.excluded.data, "created_at": stmt.excluded.created_at},
+    )
+
+
+async def store_explanation(
+    session: AsyncSession, word: str, explanation: WordExplanation
+) -> None:
+    key = normalize_word(word)
+    _remember(key, explanation)
+    # Upsert, since another user may have stored the same word in the meantime
+    await session.execute(
+        _upsert(session.get_bind().dialect.name),
+        {"key": key, "data": asdict(explanation), "created_at": datetime.now(UTC)},
+    )
+    await session.commit()
+
+
+async def _release_connection(session: AsyncSession) -> None:
+    # Ends the cache lookup's transaction, so the pool connection is not held
+    # for the seconds the LLM takes
+    if session.in_transaction():
+        await session.commit()
+
+
+async def explain_word_cached(
+    session: AsyncSession, word: str, telegram_id: int | None = None
+) -> WordExplanation:
+    """Explain a word, serving repeated lookups from the cache.
+
+    On a miss the session is committed before the LLM is called.
+    """
+    explanation = await get_cached_explanation(session, word)
+    if explanation is not None:
+        return explanation
+
+    await _release_connection(session)
+    try:
+        explanation = await explain_word(word, telegram_id)
+    except Exception:
+        fallback = await _fallback_explanation(session, word)
+        if fallback is None:
+            raise
+        logger.warning("LLM unavailable, serving fallback explanation for %r", word)
+        stats.fallbacks += 1
+        return fallback
+
+    await store_explanation(session, word, explanation)
+    return explanation
+
+
+async def stream_explanation_cached(
+    session: AsyncSession, word: str, telegram_id: int | None = None
+) -> AsyncIterator[WordExplanation]:
+    """Like explain_word_cached, but yields partial explanations while the LLM streams.
+
+    Cache hits and words already being explained for another user are yielded
+    once, complete. If streaming fails, the non-streaming path (with retries and
+    fallbacks) is used instead.
+    """
+    explanation = await get_cached_explanation(session, word)
+    if explanation is not None:
+        yield explanation
+        return
+
+    await _release_connection(session)
+    try:
+        async for partial in stream_explain_word(word, telegram_id):
+            explanation = partial
+            yield partial
+    except Exception:
+        logger.warning("Streaming failed for %r, retrying without streaming", word, exc_info=True)
+        explanation = None
+
+    if explanation is None:
+        yield await explain_word_cached(session, word, telegram_id)
+        return
+    await store_explanation(session, word, explanation)
+
+
+async def _fallback_explanation(session: AsyncSession, word: str) -> WordExplanation | None:
+    stale = await get_cached_explanation(session, word, allow_stale=True)
+    if stale is not None:
+        return stale
+
+    entry = lookup_word(word)
+    if entry is None:
+        return None
+    translation = entry["translation"]
+    return WordExplanation(
+        translation=translation,
+        translations=[translation],
+        distractors=list(entry["distractors"]),
+        corrected_word=None,
+        meanings=[],
+        examples=[],
+        collocations=[],
+        raw_text=format_explanation(entry["word"], translation, [], [], []),
+    )
+
+
+async def prune_explanation_cache(session: AsyncSession) -> int:
+    """Delete expired rows and the oldest rows beyond the size limit.
+
+    Returns the number of deleted rows.
+    """
+    cutoff = datetime.now(UTC) - _ttl()
+    expired = await session.execute(
+        delete(ExplanationCache).where(ExplanationCache.created_at < cutoff)
+    )
+    deleted = expired.rowcount or 0
+
+    oldest_kept = await session.execute(
+        select(ExplanationCache.created_at)
+        .order_by(ExplanationCache.created_at.desc())
+        .offset(settings.explanation_cache_max_rows - 1)
+        .limit(1)
+    )
+    threshold = oldest_kept.scalar_one_or_none()
+    if threshold is not None:
+        overflow = await session.execute(
+            delete(ExplanationCache).where(ExplanationCache.created_at < threshold)
+        )
+        deleted += overflow.rowcount or 0
+
+    await session.commit()
+    if deleted:
+        logger.info("Pruned %d explanation cache rows", deleted)
+    return deleted
@@ -1,14 +1,111 @@
+import asyncio
+import contextlib
 import json
 import logging
+from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass
 
+import httpx
 from gigachat import GigaChat
-from gigachat.models import Chat, Messages, MessagesRole
+from gigachat.exceptions import ResponseError
+from gigachat.models import Chat, ChatCompletion, Messages, MessagesRole
 
 from bot.config import settings
+from bot.utils.metrics import register_metric
+from bot.utils.ratelimit import FairLimiter
+from bot.utils.resilience import CircuitBreaker, CircuitState, retry_with_backoff
+from bot.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Application-scoped client: keeps the HTTP connection pool and OAuth token alive
+# between calls instead of re-authenticating for every request.
+_client: GigaChat | None = None
+
+
+def get_client() -> GigaChat:
+    """Return the shared GigaChat client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = GigaChat(
+            credentials=settings.gigachat_credentials,
+            model="GigaChat-2-Max",
+            scope="GIGACHAT_API_PERS",
+            verify_ssl_certs=False,
+            timeout=settings.gigachat_timeout,
+            max_connections=settings.gigachat_max_connections,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its connection pool (call on shutdown)."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+# Every GigaChat call goes through the limiter; requests are queued fairly per telegram_id
+limiter = FairLimiter(
+    max_in_flight=settings.llm_max_in_flight,
+    rate=settings.llm_rate_per_second,
+    burst=settings.llm_burst,
+)
+
+
+def get_limiter_stats() -> dict:
+    return limiter.stats.as_dict()
+
+
+# Opens after repeated failures so requests fail fast while GigaChat is down
+breaker = CircuitBreaker(
+    failure_threshold=settings.llm_breaker_failure_threshold,
+    reset_timeout=settings.llm_breaker_reset_seconds,
+)
+
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, TimeoutError | httpx.TransportError):
+        return True
+    if isinstance(exc, ResponseError):
+        # Older gigachat versions only keep the status code in args
+        status = getattr(exc, "status_code", None)
+        if status is None and len(exc.args) > 1:
+            status = exc.args[1]
+        return status in _RETRYABLE_STATUS_CODES
+    return False
+
+
+async def _chat(chat: Chat, telegram_id: int | None = None) -> ChatCompletion:
+    """Send a chat request through the circuit breaker, limiter and retry policy.
+
+    Raises CircuitOpenError without touching the network while the circuit is open.
+    """
+    breaker.before_call()
+
+    async def attempt() -> ChatCompletion:
+        async with limiter.slot(telegram_id):
+            return await get_client().achat(chat)
+
+    try:
+        async with asyncio.timeout(settings.llm_deadline_seconds):
+            response = await retry_with_backoff(
+                attempt,
+                attempts=settings.llm_retry_attempts,
+                base_delay=settings.llm_retry_base_delay,
+                max_delay=settings.llm_retry_max_delay,
+                is_retryable=_is_transient,
+            )
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return response
+
+
 RANDOM_WORDS_PROMPT = """\
 Generate a list of {count} random English words at B2-C1 level (upper-intermediate to advanced).
 The words should be diverse: mix nouns, verbs, adjectives, and adverbs.
@@ -71,25 +168,22 @@ class WordExplanation:
     raw_text: str  # Formatted text for display
 
 
-async def generate_random_words(count: int = 20, exclude: list[str] | None = None) -> list[str]:
+async def generate_random_words(
+    count: int = 20, exclude: list[str] | None = None, telegram_id: int | None = None
+) -> list[str]:
     """Generate a batch of random English words at B1-B2 level via LLM."""
     exclude_str = ", ".join(exclude) if exclude else "none"
     prompt = RANDOM_WORDS_PROMPT.format(count=count, exclude=exclude_str)
 
-    async with GigaChat(
-        credentials=settings.gigachat_credentials,
-        model="GigaChat-2-Max",
-        scope="GIGACHAT_API_PERS",
-        verify_ssl_certs=False,
-    ) as client:
-        response = await client.achat(
-            Chat(
-                messages=[
-                    Messages(role=MessagesRole.USER, content=prompt),
-                ],
-                temperature=0.9,
-            )
-        )
+    response = await _chat(
+        Chat(
+            messages=[
+                Messages(role=MessagesRole.USER, content=prompt),
+            ],
+            temperature=0.9,
+        ),
+        telegram_id,
+    )
 
     content = response.choices[0].message.content or "[]"
     # Strip markdown fences if present
@@ -116,26 +210,143 @@ async def generate_random_words(count: int = 20, exclude: list[str] | None = Non
     return []
 
 
-async def explain_word(word: str) -> WordExplanation:
-    async with GigaChat(
-        credentials=settings.gigachat_credentials,
-        model="GigaChat-2-Max",
-        scope="GIGACHAT_API_PERS",
-        verify_ssl_certs=False,
-    ) as client:
-        response = await client.achat(
-            Chat(
-                messages=[
-                    Messages(role=MessagesRole.SYSTEM, content=EXPLAIN_PROMPT),
-                    Messages(role=MessagesRole.USER, content=word),
-                ],
-                temperature=0.3,
-            )
+def normalize_word(word: str) -> str:
+    return word.strip().lower()
+
+
+# Concurrent requests for the same word share one LLM call
+_explain_flights: SingleFlight[WordExplanation] = SingleFlight()
+
+
+def _register_metrics() -> None:
+    limiter_metrics = [
+        ("bot_llm_in_flight", "gauge", "GigaChat calls holding a limiter slot", "in_flight"),
+        ("bot_llm_queue_depth", "gauge", "GigaChat calls waiting for a slot", "queue_depth"),
+        ("bot_llm_max_queue_depth", "gauge", "Deepest the queue has been", "max_queue_depth"),
+        ("bot_llm_acquired_total", "counter", "Limiter slots handed out", "acquired"),
+        ("bot_llm_wait_seconds_total", "counter", "Time spent waiting for slots", "total_wait"),
+        ("bot_llm_max_wait_seconds", "gauge", "Longest wait for a slot", "max_wait"),
+    ]
+    for name, kind, help_text, attribute in limiter_metrics:
+        # Read through the module global, which tests replace
+        register_metric(name, kind, help_text, lambda a=attribute: getattr(limiter.stats, a))
+    for state in CircuitState:
+        register_metric(
+            "bot_llm_circuit_state",
+            "gauge",
+            "Circuit breaker state, 1 for the current one",
+            lambda state=state: int(breaker.state is state),
+            labels={"state": state},
         )
+    register_metric(
+        "bot_llm_breaker_failures",
+        "gauge",
+        "Consecutive failed GigaChat calls",
+        lambda: breaker.failures,
+    )
+    register_metric(
+        "bot_llm_coalesced_total",
+        "counter",
+        "Explanation requests served by a call already in flight",
+        lambda: _explain_flights.coalesced,
+    )
+
+
+_register_metrics()
+
+
+async def explain_word(word: str, telegram_id: int | None = None) -> WordExplanation:
+    """Explain a word, coalescing concurrent requests for the same normalized word."""
+    return await _explain_flights.do(
+        normalize_word(word), lambda: _explain_word(word, telegram_id)
+    )
+
+
+def _explain_chat(word: str, stream: bool = False) -> Chat:
+    return Chat(
+        messages=[
+            Messages(role=MessagesRole.SYSTEM, content=EXPLAIN_PROMPT),
+            Messages(role=MessagesRole.USER, content=word),
+        ],
+        temperature=0.3,
+        stream=stream,
+    )
 
-    content = response.choices[0].message.content or "{}"
-    data = _parse_json(content)
 
+async def _explain_word(word: str, telegram_id: int | None) -> WordExplanation:
+    response = await _chat(_explain_chat(word), telegram_id)
+
+    content = response.choices[0].message.content or "{}"
+    return _build_explanation(word, _parse_json(content))
+
+
+async def stream_explain_word(
+    word: str, telegram_id: int | None = None
+) -> AsyncIterator[WordExplanation]:
+    """Explain a word, yielding a growing explanation as the response streams in.
+
+    A new explanation is yielded each time another top-level field of the JSON
+    answer is complete (once the translation is known); the last one is final.
+    The stream runs as the shared explain_word call for the word, so concurrent
+    requests wait for it instead of starting their own; a caller that joins a
+    call already in flight only gets the final explanation. Streamed calls are
+    not retried: the caller falls back to explain_word.
+    """
+    partials: asyncio.Queue[WordExplanation] = asyncio.Queue()
+    flight = asyncio.ensure_future(
+        _explain_flights.do(
+            normalize_word(word), lambda: _stream_word(word, telegram_id, partials.put_nowait)
+        )
+    )
+    last = get = None
+    try:
+        # The stream runs in the flight task, which holds the limiter slot and the
+        # deadline, so neither spans the time the caller spends between items
+        while True:
+            while not partials.empty():
+                last = partials.get_nowait()
+                yield last
+            if flight.done():
+                break
+            get = asyncio.ensure_future(partials.get())
+            await asyncio.wait({get, flight}, return_when=asyncio.FIRST_COMPLETED)
+            if not get.done():
+                get.cancel()
+                continue
+            last = get.result()
+            yield last
+    finally:
+        if get is not None:
+            get.cancel()
+        flight.cancel()
+
+    explanation = flight.result()
+    if explanation != last:
+        yield explanation
+
+
+async def _stream_word(
+    word: str, telegram_id: int | None, on_partial: Callable[[WordExplanation], None]
+) -> WordExplanation:
+    breaker.before_call()
+    content = ""
+    fields: dict = {}
+    try:
+        async with limiter.slot(telegram_id), asyncio.timeout(settings.llm_deadline_seconds):
+            async for chunk in get_client().astream(_explain_chat(word, stream=True)):
+                content += chunk.choices[0].delta.content or ""
+                parsed = _parse_partial_json(content)
+                if len(parsed) > len(fields) and "translation" in parsed:
+                    fields = parsed
+                    on_partial(_build_explanation(word, fields))
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return _build_explanation(word, _parse_json(content or "{}"))
+
+
+def _build_explanation(word: str, data: dict) -> WordExplanation:
     translation = data.get("translation", "—")
     translations = data.get("translations", [translation])
     if not translations:
@@ -216,26 +427,23 @@ Respond ONLY with a JSON array of {count} strings, for example:
 """
 
 
-async def generate_distractors(word: str, correct_translation: str, count: int = 3) -> list[str]:
+async def generate_distractors(
+    word: str, correct_translation: str, count: int = 3, telegram_id: int | None = None
+) -> list[str]:
     """Generate plausible wrong translations for a quiz."""
     prompt = DISTRACTORS_PROMPT.format(
         word=word, correct_translation=correct_translation, count=count
     )
 
-    async with GigaChat(
-        credentials=settings.gigachat_credentials,
-        model="GigaChat-2-Max",
-        scope="GIGACHAT_API_PERS",
-        verify_ssl_certs=False,
-    ) as client:
-        response = await client.achat(
-            Chat(
-                messages=[
-                    Messages(role=MessagesRole.USER, content=prompt),
-                ],
-                temperature=0.7,
-            )
-        )
+    response = await _chat(
+        Chat(
+            messages=[
+                Messages(role=MessagesRole.USER, content=prompt),
+            ],
+            temperature=0.7,
+        ),
+        telegram_id,
+    )
 
     content = response.choices[0].message.content or "[]"
     parsed = _parse_json_array(content)
@@ -248,6 +456,69 @@ async def generate_distractors(word: str, correct_translation: str, count: int =
     return parsed
 
 
+BATCH_DISTRACTORS_PROMPT = """\
+You are an English language tutor. For each numbered English word below with its \
+correct Russian translation, generate {count} WRONG but plausible Russian translations \
+(distractors).
+
+The distractors should:
+- Be real Russian words (nouns, verbs, adjectives as appropriate)
+- Be somewhat related or similar-sounding to the correct translation, but clearly wrong
+- Be the same part of speech as the correct translation when possible
+- NOT be synonyms of the correct translation
+
+Words:
+{words}
+
+Respond ONLY with a JSON object mapping each number to an array of {count} strings, \
+for example:
+{{"1": ["неправильный1", "неправильный2", "неправильный3"], "2": ["...", "...", "..."]}}
+"""
+
+
+async def generate_distractors_batch(
+    items: list[tuple[str, str]], count: int = 3, telegram_id: int | None = None
+) -> list[list[str]]:
+    """Generate distractors for many (word, correct_translation) pairs in one LLM call.
+
+    Returns one list per item, in input order. A list is empty if the LLM
+    skipped that item; the backfill job retries those words in its next runs
+    (see record_skipped_distractors).
+    """
+    if not items:
+        return []
+    words = "\n".join(
+        f"{i}. {word} — {translation}" for i, (word, translation) in enumerate(items, 1)
+    )
+    prompt = BATCH_DISTRACTORS_PROMPT.format(words=words, count=count)
+
+    response = await _chat(
+        Chat(
+            messages=[
+                Messages(role=MessagesRole.USER, content=prompt),
+            ],
+            temperature=0.7,
+        ),
+        telegram_id,
+    )
+
+    content = response.choices[0].message.content or "{}"
+    try:
+        data = _parse_json(content)
+    except json.JSONDecodeError:
+        logger.error("Failed to parse batch distractors response: %s", content)
+        data = {}
+
+    result = []
+    for i, (_, translation) in enumerate(items, 1):
+        options = data.get(str(i), []) if isinstance(data, dict) else []
+        if not isinstance(options, list):
+            options = []
+        distractors = [d for d in options if isinstance(d, str) and d != translation]
+        result.append(distractors[:count] if len(distractors) >= count else [])
+    return result
+
+
 def _parse_json_array(text: str) -> list[str]:
     """Extract and parse a JSON array from LLM response."""
     if "```" in text:
@@ -312,3 +583,59 @@ def _parse_json(text: str) -> dict:
         return json.loads(text[start : end + 1])
 
     return {}
+
+
+def _parse_partial_json(text: str) -> dict:
+    """Parse the completed top-level fields of a possibly truncated JSON object.
+
+    Used while streaming: ``{"a": 1, "b": [1, 2`` gives ``{"a": 1}``.
+    """
+    start = text.find("{")
+    if start == -1:
+        return {}
+
+    fields: dict = {}
+    depth = 0
+    in_string = escape = in_value = False
+    key: str | None = None
+    token_start = start
+
+    def finish_value(end: int) -> None:
+        nonlocal in_value, key
+        if in_value and key is not None:
+            with contextlib.suppress(json.JSONDecodeError):
+                fields[json.loads(key)] = json.loads(text[token_start:end])
+        in_value = False
+        key = None
+
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+                if depth == 1 and not in_value:
+                    key = text[token_start : i + 1]
+            continue
+
+        if ch == '"':
+            in_string = True
+            if depth == 1 and not in_value:
+                token_start = i
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                finish_value(i)
+                break
+        elif ch == ":" and depth == 1 and not in_value:
+            in_value = True
+            token_start = i + 1
+        elif ch == "," and depth == 1:
+            finish_value(i)
+
+    return fields
@@ -1,42 +1,105 @@
 import logging
 import random
+from array import array
 from dataclasses import dataclass, field
 
-from bot.services.llm import WordExplanation
-from bot.services.word_bank import get_random_words
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.services.state_store import create_store
+from bot.services.word_bank import WORD_BANK, random_indices
 
 logger = logging.getLogger(__name__)
 
+OPTIONS_PER_WORD = 4  # The translation and three distractors
+
 
-@dataclass
+@dataclass(slots=True)
 class OnboardingSession:
+    """Onboarding progress. Words are kept as indices into WORD_BANK, not copies."""
+
     user_id: int
     target_unknown: int = 10
     unknown_count: int = 0
-    shown_words: list[str] = field(default_factory=list)
-    word_bank: list[dict] = field(default_factory=list)
-    current_word: str | None = None
-    current_options: list[str] = field(default_factory=list)
-    correct_index: int = 0
-    current_translation: str | None = None
-    current_explanation: WordExplanation | None = None
-
-
-_onboarding_sessions: dict[int, OnboardingSession] = {}
-
-
-def create_session(telegram_id: int, user_id: int) -> OnboardingSession:
+    shown: array = field(default_factory=lambda: array("H"))  # In order, last is current
+    queue: array = field(default_factory=lambda: array("H"))  # Words still to show
+    # Option order of the current word: 0 is the translation, 1-3 its distractors
+    option_order: array = field(default_factory=lambda: array("B"))
+
+    @property
+    def current_word(self) -> str | None:
+        return WORD_BANK[self.shown[-1]]["word"] if self.shown else None  # type: ignore[return-value]
+
+    @property
+    def current_translation(self) -> str | None:
+        return WORD_BANK[self.shown[-1]]["translation"] if self.shown else None  # type: ignore[return-value]
+
+    @property
+    def current_options(self) -> list[str]:
+        if not self.shown:
+            return []
+        entry = WORD_BANK[self.shown[-1]]
+        choices = [entry["translation"], *entry["distractors"]]
+        return [choices[i] for i in self.option_order]  # type: ignore[misc]
+
+    @property
+    def correct_index(self) -> int:
+        return self.option_order.index(0)
+
+    @property
+    def shown_words(self) -> list[str]:
+        return [WORD_BANK[i]["word"] for i in self.shown]  # type: ignore[misc]
+
+    def to_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "target_unknown": self.target_unknown,
+            "unknown_count": self.unknown_count,
+            "shown": self.shown.tolist(),
+            "queue": self.queue.tolist(),
+            "option_order": self.option_order.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OnboardingSession":
+        return cls(
+            user_id=data["user_id"],
+            target_unknown=data["target_unknown"],
+            unknown_count=data["unknown_count"],
+            shown=array("H", data["shown"]),
+            queue=array("H", data["queue"]),
+            option_order=array("B", data["option_order"]),
+        )
+
+
+# Onboarding sessions: telegram_id -> OnboardingSession (stored as a dict). Functions
+# that touch the store take the caller's DB session as ``db``, if it has one.
+_store = create_store("onboarding")
+
+
+async def create_session(
+    telegram_id: int, user_id: int, db: AsyncSession | None = None
+) -> OnboardingSession:
     session = OnboardingSession(user_id=user_id)
-    _onboarding_sessions[telegram_id] = session
+    await save_session(telegram_id, session, db)
     return session
 
 
-def get_session(telegram_id: int) -> OnboardingSession | None:
-    return _onboarding_sessions.get(telegram_id)
+async def get_session(
+    telegram_id: int, db: AsyncSession | None = None
+) -> OnboardingSession | None:
+    data = await _store.get(telegram_id, db)
+    return OnboardingSession.from_dict(data) if data is not None else None
+
+
+async def save_session(
+    telegram_id: int, session: OnboardingSession, db: AsyncSession | None = None
+) -> None:
+    """Persist changes made to a session returned by get_session."""
+    await _store.set(telegram_id, session.to_dict(), db)
 
 
-def remove_session(telegram_id: int) -> None:
-    _onboarding_sessions.pop(telegram_id, None)
+async def remove_session(telegram_id: int, db: AsyncSession | None = None) -> None:
+    await _store.pop(telegram_id, db)
 
 
 def get_next_word_with_options(session: OnboardingSession) -> dict | None:
@@ -44,32 +107,20 @@ def get_next_word_with_options(session: OnboardingSession) -> dict | None:
 
     No LLM calls — everything is pre-defined.
     """
-    if not session.word_bank:
-        session.word_bank = get_random_words(count=30, exclude=session.shown_words)
+    if not session.queue:
+        session.queue = array("H", random_indices(count=30, exclude=session.shown))
 
-    if not session.word_bank:
+    if not session.queue:
         return None
 
-    entry = session.word_bank.pop(0)
-    word = entry["word"]
-    correct = entry["translation"]
-    distractors = list(entry["distractors"])
-
-    session.shown_words.append(word)
-    session.current_word = word
-    session.current_translation = correct
-    session.current_explanation = None
-
-    options = [correct] + distractors
-    random.shuffle(options)
-    correct_index = options.index(correct)
-
-    session.current_options = options
-    session.correct_index = correct_index
+    session.shown.append(session.queue.pop())
+    order = list(range(OPTIONS_PER_WORD))
+    random.shuffle(order)
+    session.option_order = array("B", order)
 
     return {
-        "word": word,
-        "correct": correct,
-        "options": options,
-        "correct_index": correct_index,
+        "word": session.current_word,
+        "correct": session.current_translation,
+        "options": session.current_options,
+        "correct_index": session.correct_index,
     }
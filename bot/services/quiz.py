@@ -1,18 +1,27 @@
 import random
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from bot.models.word import Word
-from bot.services.dictionary import get_words_for_review
+from bot.services.dictionary import get_words_for_review, sample_translations
+from bot.services.state_store import create_store
 
 POINTS_CORRECT = 10
 POINTS_STREAK_BONUS = 5
 STREAK_THRESHOLD = 3
+DISTRACTORS_PER_QUESTION = 3
 
 
-@dataclass
+@dataclass(slots=True)
+class QuizQuestion:
+    word_id: int
+    word: str
+    correct_answer: str
+    all_correct: list[str]
+    options: list[str]
+
+
+@dataclass(slots=True)
 class QuizSession:
     user_id: int
     total_questions: int = 10
@@ -20,25 +29,65 @@ class QuizSession:
     correct_count: int = 0
     score: int = 0
     streak: int = 0
-    asked_word_ids: list[int] = field(default_factory=list)
+    # Questions planned up front by start_session, asked in order
+    questions: list[QuizQuestion] = field(default_factory=list)
+    # The question on screen, taken off ``questions`` when it was sent
+    asked: QuizQuestion | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuizSession":
+        questions = [QuizQuestion(**q) for q in data.get("questions", [])]
+        asked = QuizQuestion(**data["asked"]) if data.get("asked") else None
+        return cls(**{**data, "questions": questions, "asked": asked})
+
 
+# Quiz sessions: telegram_id -> QuizSession (stored as a dict). Functions that
+# touch the store take the caller's DB session as ``db``, if it has one.
+_store = create_store("quiz")
 
-# In-memory quiz sessions: telegram_id -> QuizSession
-_quiz_sessions: dict[int, QuizSession] = {}
 
+async def get_session(telegram_id: int, db: AsyncSession | None = None) -> QuizSession | None:
+    data = await _store.get(telegram_id, db)
+    return QuizSession.from_dict(data) if data is not None else None
 
-def get_session(telegram_id: int) -> QuizSession | None:
-    return _quiz_sessions.get(telegram_id)
 
+async def save_session(
+    telegram_id: int, session: QuizSession, db: AsyncSession | None = None
+) -> None:
+    """Persist changes made to a session returned by get_session."""
+    await _store.set(telegram_id, asdict(session), db)
 
-def create_session(telegram_id: int, user_id: int, total_questions: int = 10) -> QuizSession:
-    session = QuizSession(user_id=user_id, total_questions=total_questions)
-    _quiz_sessions[telegram_id] = session
+
+async def create_session(
+    telegram_id: int,
+    user_id: int,
+    total_questions: int = 10,
+    questions: list[QuizQuestion] | None = None,
+    db: AsyncSession | None = None,
+) -> QuizSession:
+    session = QuizSession(
+        user_id=user_id, total_questions=total_questions, questions=list(questions or [])
+    )
+    await save_session(telegram_id, session, db)
     return session
 
 
-def remove_session(telegram_id: int) -> QuizSession | None:
-    return _quiz_sessions.pop(telegram_id, None)
+async def start_session(
+    session: AsyncSession, telegram_id: int, user_id: int, total_questions: int = 10
+) -> QuizSession | None:
+    """Plan the whole quiz and register the session.
+
+    Returns None (and registers nothing) if the user has too few words.
+    """
+    questions = await build_quiz_plan(session, user_id, total_questions)
+    if not questions:
+        return None
+    return await create_session(telegram_id, user_id, len(questions), questions, db=session)
+
+
+async def remove_session(telegram_id: int, db: AsyncSession | None = None) -> QuizSession | None:
+    data = await _store.pop(telegram_id, db)
+    return QuizSession.from_dict(data) if data is not None else None
 
 
 def calculate_points(streak: int) -> int:
@@ -49,48 +98,72 @@ def calculate_points(streak: int) -> int:
     return points
 
 
-async def generate_quiz(
+async def build_quiz_plan(
     session: AsyncSession,
     user_id: int,
+    count: int,
     exclude_word_ids: list[int] | None = None,
-) -> dict | None:
-    """Generate a quiz question for the user.
+) -> list[QuizQuestion]:
+    """Build up to ``count`` quiz questions with two queries.
 
-    Returns dict with keys: word_id, word, correct_answer, all_correct, options
-    or None if user has fewer than 2 words.
+    One query picks the most due words, the other samples a random pool of the
+    user's translations used as distractors (after each word's stored
+    distractors). Words for which no distractor can be found are skipped.
     """
-    words = await get_words_for_review(
-        session, user_id, limit=1, exclude_word_ids=exclude_word_ids
+    targets = await get_words_for_review(
+        session, user_id, limit=count, exclude_word_ids=exclude_word_ids
     )
-    if not words:
-        return None
-
-    target = words[0]
-
-    # Pick a random translation for the correct answer display
-    all_translations = target.translations or [target.translation]
-    correct_answer = random.choice(all_translations)
+    if not targets:
+        return []
 
-    # Get distractors from user's other words
-    result = await session.execute(
-        select(Word.translation)
-        .where(Word.user_id == user_id, Word.id != target.id)
-        .order_by(func.random())
-        .limit(3)
+    pool = await sample_translations(
+        session, user_id, count * DISTRACTORS_PER_QUESTION + len(targets)
     )
-    distractors = [row[0] for row in result.all()]
 
-    # If user doesn't have enough words for distractors, skip quiz
-    if len(distractors) < 1:
-        return None
+    questions = []
+    for target in targets:
+        all_translations = target.translations or [target.translation]
+        # Pick a random translation for the correct answer display
+        correct_answer = random.choice(all_translations)
+
+        stored = [d for d in target.distractors or [] if d not in all_translations]
+        random.shuffle(stored)
+        distractors = stored[:DISTRACTORS_PER_QUESTION]
+        for word_id, translation in random.sample(pool, len(pool)):
+            if len(distractors) >= DISTRACTORS_PER_QUESTION:
+                break
+            if word_id != target.id and translation not in distractors + all_translations:
+                distractors.append(translation)
+
+        # If user doesn't have enough words for distractors, skip the question
+        if not distractors:
+            continue
+
+        options = [correct_answer] + distractors
+        random.shuffle(options)
+        questions.append(
+            QuizQuestion(
+                word_id=target.id,
+                word=target.word,
+                correct_answer=correct_answer,
+                all_correct=all_translations,
+                options=options,
+            )
+        )
+    return questions
 
-    options = [correct_answer] + distractors
-    random.shuffle(options)
 
-    return {
-        "word_id": target.id,
-        "word": target.word,
-        "correct_answer": correct_answer,
-        "all_correct": all_translations,
-        "options": options,
-    }
+async def generate_quiz(
+    session: AsyncSession,
+    user_id: int,
+    exclude_word_ids: list[int] | None = None,
+) -> dict | None:
+    """Generate a single quiz question for the user.
+
+    Returns dict with keys: word_id, word, correct_answer, all_correct, options
+    or None if user has fewer than 2 words.
+    """
+    questions = await build_quiz_plan(session, user_id, 1, exclude_word_ids)
+    if not questions:
+        return None
+    return asdict(questions[0])
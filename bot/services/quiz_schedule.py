@@ -0,0 +1,132 @@
+"""When each user gets their scheduled quiz.
+
+Users pick hours in their own timezone. Within each hour a user always gets
+the quiz at the same offset, derived from their telegram_id and spread over
+``quiz_spread_minutes``, so the users of one hour arrive evenly across it
+instead of all at minute 0. The scheduler ticks every minute and picks the
+users whose ``next_quiz_at`` falls into the minute that just ended; a minute
+whose tick never ran is sent late under its own run. Sent users move on to
+their next time right away; users overdue by more than
+``broadcast_resume_minutes`` are rescheduled unsent.
+"""
+
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Row, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import settings
+from bot.models.user import User
+
+SLOT = timedelta(minutes=1)
+RESCHEDULE_BATCH = 5_000
+
+
+def get_zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def spread_offset(telegram_id: int) -> timedelta:
+    """Stable per-user offset within the spread window (multiplicative hashing)."""
+    window = settings.quiz_spread_minutes * 60
+    bucket = (telegram_id * 2654435761) % 2**32
+    return timedelta(seconds=bucket * window // 2**32)
+
+
+def next_quiz_time(
+    now: datetime, telegram_id: int, timezone: str, hours: Sequence[int] | None
+) -> datetime:
+    """The first delivery time strictly after ``now``, in UTC."""
+    zone = get_zone(timezone)
+    hours = sorted(set(hours or settings.quiz_hours))
+    offset = spread_offset(telegram_id)
+    today = now.astimezone(zone).date()
+    for days in range(3):
+        day = today + timedelta(days=days)
+        for hour in hours:
+            local = datetime.combine(day, time(hour), tzinfo=zone) + offset
+            at = local.astimezone(UTC)
+            if at > now:
+                return at
+    raise ValueError(f"No quiz hours for user {telegram_id}")
+
+
+def slot_bounds(slot: datetime) -> tuple[datetime, datetime]:
+    """Users with ``start < next_quiz_at <= end`` belong to the slot ending at ``slot``.
+
+    Slots don't overlap, so runs of different slots never send to the same user,
+    even while an earlier run is still going on another replica.
+    """
+    return slot - SLOT, slot
+
+
+def _next_times(rows: Iterable[Row], now: datetime) -> list[dict]:
+    return [
+        {
+            "id": row.id,
+            "next_quiz_at": next_quiz_time(now, row.telegram_id, row.timezone, row.quiz_hours),
+        }
+        for row in rows
+    ]
+
+
+async def reschedule_users(session: AsyncSession, rows: Sequence[Row], now: datetime) -> None:
+    """Move the given users (id, telegram_id, timezone, quiz_hours) to their next slot.
+
+    Does not commit, so it can share a transaction with the caller's bookkeeping.
+    """
+    if rows:
+        await session.execute(update(User), _next_times(rows, now))
+
+
+async def schedule_pending_users(session: AsyncSession, now: datetime) -> int:
+    """Assign a delivery time to users who have none or whose time passed unsent.
+
+    That covers new users, changed preferences, users without enough words to be
+    sent a quiz, and slots missed while no scheduler was running.
+    """
+    stale = now - timedelta(minutes=settings.broadcast_resume_minutes)
+    query = (
+        select(User.id, User.telegram_id, User.timezone, User.quiz_hours)
+        .where(or_(User.next_quiz_at.is_(None), User.next_quiz_at < stale))
+        .limit(RESCHEDULE_BATCH)
+    )
+    total = 0
+    while rows := (await session.execute(query)).all():
+        await reschedule_users(session, rows, now)
+        await session.commit()
+        total += len(rows)
+        if len(rows) < RESCHEDULE_BATCH:
+            break
+    return total
+
+
+async def set_quiz_preferences(
+    session: AsyncSession,
+    user: User,
+    timezone: str | None = None,
+    hours: Sequence[int] | None = None,
+) -> datetime:
+    """Update the user's timezone and/or hours and return their next quiz time."""
+    if timezone is not None:
+        user.timezone = timezone
+    if hours is not None:
+        user.quiz_hours = sorted(set(hours))
+    user.next_quiz_at = next_quiz_time(
+        datetime.now(UTC), user.telegram_id, user.timezone, user.quiz_hours
+    )
+    await session.commit()
+    return user.next_quiz_at
@@ -0,0 +1,48 @@
+"""SM-2 style spaced repetition scheduling.
+
+Quiz answers are binary, so a correct answer is graded 4 ("correct after some
+hesitation") and a wrong one 2 ("incorrect, but familiar") on the SM-2 scale.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+GRADE_CORRECT = 4
+GRADE_WRONG = 2
+RELEARN_DELAY = timedelta(minutes=10)  # Wrong answers come back within the same day
+FIRST_INTERVAL = 1  # Days after the first correct answer
+SECOND_INTERVAL = 6  # Days after the second one; later intervals grow by the ease
+
+
+@dataclass(frozen=True)
+class ReviewSchedule:
+    ease: float
+    interval_days: int
+    due_at: datetime
+
+
+def ease_change(is_correct: bool) -> float:
+    """How much an answer moves the ease factor, before clamping at MIN_EASE."""
+    grade = GRADE_CORRECT if is_correct else GRADE_WRONG
+    return 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02)
+
+
+def schedule_review(
+    ease: float, interval_days: int, is_correct: bool, now: datetime
+) -> ReviewSchedule:
+    new_ease = max(MIN_EASE, ease + ease_change(is_correct))
+
+    if not is_correct:
+        return ReviewSchedule(ease=new_ease, interval_days=0, due_at=now + RELEARN_DELAY)
+
+    if interval_days == 0:
+        new_interval = FIRST_INTERVAL
+    elif interval_days == 1:
+        new_interval = SECOND_INTERVAL
+    else:
+        new_interval = round(interval_days * ease)
+    return ReviewSchedule(
+        ease=new_ease, interval_days=new_interval, due_at=now + timedelta(days=new_interval)
+    )
@@ -0,0 +1,158 @@
+"""Storage for per-user conversation state: running quizzes, onboarding, pending words.
+
+State is kept as JSON-compatible dicts keyed by telegram_id, one store per
+namespace. The memory backend bounds itself with a TTL and an LRU limit; the
+SQL backend keeps state in the ``session_state`` table so it survives restarts
+and is shared by all bot replicas. ``settings.session_store`` picks the backend.
+
+Callers that already hold a DB session pass it along, so the SQL backend runs on
+that session's connection instead of checking out a second one from the pool.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Protocol
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import settings
+from bot.db.session import async_session
+from bot.models.session_state import SessionState
+
+
+class StateStore(Protocol):
+    async def get(self, key: int, session: AsyncSession | None = None) -> dict | None: ...
+
+    async def set(self, key: int, value: dict, session: AsyncSession | None = None) -> None: ...
+
+    async def pop(self, key: int, session: AsyncSession | None = None) -> dict | None: ...
+
+
+class MemoryStore:
+    """In-process store; entries expire ``ttl`` seconds after their last write.
+
+    Values are kept JSON-encoded: one compact string per entry instead of a tree
+    of objects, and every get() returns a fresh copy.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._items: OrderedDict[int, tuple[float, str]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def get(self, key: int, session: AsyncSession | None = None) -> dict | None:
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return json.loads(value)
+
+    async def set(self, key: int, value: dict, session: AsyncSession | None = None) -> None:
+        encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        self._items[key] = (time.monotonic() + self.ttl, encoded)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    async def pop(self, key: int, session: AsyncSession | None = None) -> dict | None:
+        entry = self._items.pop(key, None)
+        if entry is None or time.monotonic() >= entry[0]:
+            return None
+        return json.loads(entry[1])
+
+
+def _upsert(dialect: str):
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(SessionState)
+    return stmt.on_conflict_do_update(
+        index_elements=[SessionState.namespace, SessionState.key],
+        set_={"data": stmt.excluded.data, "expires_at": stmt.excluded.expires_at},
+    )
+
+
+class SqlStore:
+    """Store backed by the ``session_state`` table, shared by all replicas.
+
+    Each method uses the given session (set and pop commit it), or a
+    short-lived one of its own.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        sessionmaker: async_sessionmaker[AsyncSession] = async_session,
+    ) -> None:
+        self.namespace = namespace
+        self.ttl = ttl
+        self._sessionmaker = sessionmaker
+
+    @asynccontextmanager
+    async def _session(self, session: AsyncSession | None) -> AsyncIterator[AsyncSession]:
+        if session is not None:
+            yield session
+            return
+        async with self._sessionmaker() as own:
+            yield own
+
+    async def get(self, key: int, session: AsyncSession | None = None) -> dict | None:
+        async with self._session(session) as session:
+            result = await session.execute(
+                select(SessionState.data).where(
+                    SessionState.namespace == self.namespace,
+                    SessionState.key == key,
+                    SessionState.expires_at > datetime.now(UTC),
+                )
+            )
+            return result.scalar_one_or_none()
+
+    async def set(self, key: int, value: dict, session: AsyncSession | None = None) -> None:
+        expires_at = datetime.now(UTC) + timedelta(seconds=self.ttl)
+        async with self._session(session) as session:
+            await session.execute(
+                _upsert(session.get_bind().dialect.name),
+                {"namespace": self.namespace, "key": key, "data": value, "expires_at": expires_at},
+            )
+            await session.commit()
+
+    async def pop(self, key: int, session: AsyncSession | None = None) -> dict | None:
+        async with self._session(session) as session:
+            result = await session.execute(
+                delete(SessionState)
+                .where(SessionState.namespace == self.namespace, SessionState.key == key)
+                .returning(SessionState.data, SessionState.expires_at)
+            )
+            row = result.one_or_none()
+            await session.commit()
+        if row is None or row.expires_at.replace(tzinfo=UTC) <= datetime.now(UTC):
+            return None
+        return row.data
+
+
+def create_store(namespace: str) -> StateStore:
+    ttl = settings.session_ttl_hours * 3600
+    if settings.session_store == "sql":
+        return SqlStore(namespace, ttl)
+    return MemoryStore(ttl, settings.session_memory_max_entries)
+
+
+async def prune_session_state(session: AsyncSession) -> int:
+    """Delete expired rows of the SQL backend. Returns the number of deleted rows."""
+    result = await session.execute(
+        delete(SessionState).where(SessionState.expires_at <= datetime.now(UTC))
+    )
+    await session.commit()
+    return result.rowcount or 0
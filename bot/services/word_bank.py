@@ -1,6 +1,7 @@
 """Pre-built word bank for onboarding quiz. No LLM calls needed."""
 
 import random
+from collections.abc import Iterable
 
 WORD_BANK: list[dict[str, str | list[str]]] = [
     {
@@ -252,9 +253,17 @@ WORD_BANK: list[dict[str, str | list[str]]] = [
 ]
 
 
-def get_random_words(count: int = 30, exclude: list[str] | None = None) -> list[dict]:
-    """Get random words from the bank, excluding already shown ones."""
-    exclude_set = {w.lower() for w in (exclude or [])}
-    available = [w for w in WORD_BANK if w["word"].lower() not in exclude_set]
+def random_indices(count: int = 30, exclude: Iterable[int] = ()) -> list[int]:
+    """Get random positions in WORD_BANK, excluding already shown ones."""
+    exclude_set = set(exclude)
+    available = [i for i in range(len(WORD_BANK)) if i not in exclude_set]
     random.shuffle(available)
     return available[:count]
+
+
+_WORDS_BY_NAME = {entry["word"]: entry for entry in WORD_BANK}
+
+
+def lookup_word(word: str) -> dict | None:
+    """Find a bank entry by word (case-insensitive)."""
+    return _WORDS_BY_NAME.get(word.strip().lower())
@@ -0,0 +1,201 @@
+"""Per-handler latency and DB query metrics, exported in the Prometheus text format.
+
+``MetricsMiddleware`` (bot/middlewares/metrics.py) opens an ``UpdateTrace`` for
+every handled update. The engine hooks installed by ``instrument_engine``
+record each query into the trace of the update that runs it. Aggregates are
+kept per handler, in process. Services export their own counters and gauges
+(cache hits, LLM limiter queue, circuit breaker) with ``register_metric``.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from aiohttp import web
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_TRACED_QUERIES = 50  # Statements kept per update for the slow-update log
+
+
+@dataclass(slots=True)
+class UpdateTrace:
+    handler: str
+    started_at: float = field(default_factory=time.perf_counter)
+    query_count: int = 0
+    db_seconds: float = 0.0
+    queries: list[tuple[str, float]] = field(default_factory=list)
+
+    def add_query(self, statement: str, seconds: float) -> None:
+        self.query_count += 1
+        self.db_seconds += seconds
+        if len(self.queries) < MAX_TRACED_QUERIES:
+            self.queries.append((statement, seconds))
+
+
+@dataclass(slots=True)
+class HandlerStats:
+    count: int = 0
+    errors: int = 0
+    slow: int = 0
+    seconds: float = 0.0
+    queries: int = 0
+    db_seconds: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+
+    def observe(self, seconds: float, trace: UpdateTrace, failed: bool, slow: bool) -> None:
+        self.count += 1
+        self.errors += failed
+        self.slow += slow
+        self.seconds += seconds
+        self.queries += trace.query_count
+        self.db_seconds += trace.db_seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+
+current_trace: ContextVar[UpdateTrace | None] = ContextVar("current_trace", default=None)
+handler_stats: dict[str, HandlerStats] = defaultdict(HandlerStats)
+
+
+# name -> (type, help text, [(labels, read the current value)])
+_registered: dict[str, tuple[str, str, list[tuple[str, Callable[[], float]]]]] = {}
+
+
+def register_metric(
+    name: str,
+    kind: str,
+    help_text: str,
+    read: Callable[[], float],
+    labels: dict[str, str] | None = None,
+) -> None:
+    """Export a process-wide value (``kind`` "counter" or "gauge"), read at scrape time.
+
+    Register the same name again with other ``labels`` to add a series.
+    """
+    label_text = ",".join(f"{key}={_quote(value)}" for key, value in (labels or {}).items())
+    series = _registered.setdefault(name, (kind, help_text, []))[2]
+    series[:] = [entry for entry in series if entry[0] != label_text]
+    series.append((label_text, read))
+
+
+def reset_metrics() -> None:
+    handler_stats.clear()
+
+
+def record_update(trace: UpdateTrace, failed: bool, slow_seconds: float) -> float:
+    """Add a finished update to the aggregates; log it if it took longer than slow_seconds.
+
+    Returns the update's duration in seconds.
+    """
+    seconds = time.perf_counter() - trace.started_at
+    slow = seconds >= slow_seconds
+    handler_stats[trace.handler].observe(seconds, trace, failed, slow)
+    if slow:
+        queries = "\n".join(
+            f"  {ms * 1000:7.1f} ms  {' '.join(statement.split())[:200]}"
+            for statement, ms in trace.queries
+        )
+        logger.warning(
+            "Slow update in %s: %.0f ms, %d queries, %.0f ms in DB\n%s",
+            trace.handler,
+            seconds * 1000,
+            trace.query_count,
+            trace.db_seconds * 1000,
+            queries,
+        )
+    return seconds
+
+
+# The start time is kept on the statement's execution context, so nothing is
+# left behind on the connection when a statement fails
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if current_trace.get() is not None:
+        context._query_started_at = time.perf_counter()
+
+
+def _record_query(context, statement: str) -> None:
+    trace = current_trace.get()
+    started = getattr(context, "_query_started_at", None)
+    if trace is not None and started is not None:
+        trace.add_query(statement, time.perf_counter() - started)
+        context._query_started_at = None
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _record_query(context, statement)
+
+
+def _handle_error(exception_context) -> None:
+    # Failed statements count too, e.g. an IntegrityError from a duplicate insert
+    if exception_context.execution_context is not None:
+        _record_query(exception_context.execution_context, exception_context.statement)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute the engine's queries to the update being handled (pass engine.sync_engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _quote(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _labels(handler: str) -> str:
+    return f"handler={_quote(handler)}"
+
+
+def render_metrics() -> str:
+    """All handler aggregates and registered metrics in the Prometheus text format."""
+    families = [
+        ("bot_handler_duration_seconds", "histogram", "Time spent handling an update"),
+        ("bot_handler_errors_total", "counter", "Updates whose handler raised"),
+        ("bot_handler_slow_total", "counter", "Updates slower than slow_update_seconds"),
+        ("bot_handler_queries_total", "counter", "DB queries run by the handler"),
+        ("bot_handler_db_seconds_total", "counter", "Time spent in DB queries"),
+    ]
+    lines: list[str] = []
+    for name, kind, help_text in families:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for handler, stats in sorted(handler_stats.items()):
+            labels = _labels(handler)
+            if kind == "histogram":
+                for bound, count in zip(BUCKETS, stats.buckets, strict=True):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats.count}')
+                lines.append(f"{name}_sum{{{labels}}} {stats.seconds:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {stats.count}")
+                continue
+            value = {
+                "bot_handler_errors_total": stats.errors,
+                "bot_handler_slow_total": stats.slow,
+                "bot_handler_queries_total": stats.queries,
+                "bot_handler_db_seconds_total": round(stats.db_seconds, 6),
+            }[name]
+            lines.append(f"{name}{{{labels}}} {value}")
+    for name, (kind, help_text, series) in sorted(_registered.items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, read in series:
+            value = read()
+            value = round(value, 6) if isinstance(value, float) else value
+            lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_view(request: web.Request) -> web.Response:
+    return web.Response(
+        text=render_metrics(), headers={"Content-Type": "text/plain; version=0.0.4"}
+    )
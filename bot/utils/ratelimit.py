@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, up to ``burst`` stored."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available.
+
+        Returns 0 on success, otherwise the number of seconds until one will be.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        while (delay := self.try_acquire()) > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class LimiterStats:
+    in_flight: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    acquired: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "avg_wait_seconds": round(self.total_wait / self.acquired, 4) if self.acquired else 0,
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+class FairLimiter:
+    """Bounded concurrency plus a token bucket, with round-robin fairness.
+
+    Waiters are queued per key (e.g. telegram_id) and slots are handed out to
+    keys in turn, so one key with many queued requests cannot starve the rest.
+    """
+
+    def __init__(self, max_in_flight: int, rate: float, burst: int) -> None:
+        self.max_in_flight = max_in_flight
+        self.stats = LimiterStats()
+        self._bucket = TokenBucket(rate, burst)
+        self._queues: OrderedDict[Hashable, deque[asyncio.Future[None]]] = OrderedDict()
+        self._timer: asyncio.TimerHandle | None = None
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable = None) -> AsyncIterator[None]:
+        started = time.monotonic()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(waiter)
+        self.stats.queue_depth += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queue_depth)
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just before cancellation — give it back
+                self._release()
+            else:
+                self._discard(key, waiter)
+            raise
+
+        waited = time.monotonic() - started
+        self.stats.acquired += 1
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self.stats.in_flight -= 1
+        self._dispatch()
+
+    def _discard(self, key: Hashable, waiter: asyncio.Future[None]) -> None:
+        queue = self._queues.get(key)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[key]
+        self.stats.queue_depth -= 1
+
+    def _dispatch(self) -> None:
+        while self._queues and self.stats.in_flight < self.max_in_flight:
+            delay = self._bucket.try_acquire()
+            if delay > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            self.stats.queue_depth -= 1
+            self.stats.in_flight += 1
+            waiter.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
@@ -0,0 +1,88 @@
+import asyncio
+import enum
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is known to be down."""
+
+
+class CircuitState(enum.StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and every
+    call is rejected for ``reset_timeout`` seconds. Then a single trial call is
+    let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.reset()
+
+    def reset(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def before_call(self) -> None:
+        if self.state is CircuitState.CLOSED:
+            return
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            raise CircuitOpenError(f"Circuit is {self.state}")
+        # Let one trial call through; the others keep failing fast until it finishes
+        # (or until another reset_timeout passes, should the trial never report back)
+        self.state = CircuitState.HALF_OPEN
+        self._opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state is CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state is not CircuitState.OPEN:
+                logger.warning("Circuit opened after %d failures", self.failures)
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+
+async def retry_with_backoff(
+    func: Callable[[], Awaitable[T]],
+    *,
+    attempts: int,
+    base_delay: float,
+    max_delay: float,
+    is_retryable: Callable[[BaseException], bool],
+) -> T:
+    """Call ``func`` until it succeeds, retrying retryable errors with full jitter.
+
+    The n-th retry sleeps a random time in ``[0, min(max_delay, base_delay * 2**n)]``.
+    """
+    for attempt in range(attempts):
+        try:
+            return await func()
+        except Exception as exc:
+            if attempt == attempts - 1 or not is_retryable(exc):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            logger.warning(
+                "Retrying after %r (attempt %d), sleeping %.2fs", exc, attempt + 1, delay
+            )
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
@@ -15,6 +15,27 @@ from sqlalchemy.ext.asyncio import (  # noqa: E402
 )
 
 from bot.models import Base  # noqa: E402
+from bot.services import llm  # noqa: E402
+from bot.services.dictionary import clear_user_id_cache  # noqa: E402
+from bot.utils.ratelimit import FairLimiter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def reset_llm_state():
+    """Drop the shared GigaChat client so each test patches a fresh one."""
+    llm._client = None
+    llm.breaker.reset()
+    llm.limiter = FairLimiter(max_in_flight=100, rate=1000, burst=1000)
+    yield
+    llm._client = None
+
+
+@pytest.fixture(autouse=True)
+def reset_user_id_cache():
+    """Each test has its own database, so ids cached by another test are wrong."""
+    clear_user_id_cache()
+    yield
+    clear_user_id_cache()
 
 
 @pytest.fixture
@@ -27,12 +48,31 @@ async def engine():
 
 
 @pytest.fixture
-async def session(engine):
-    async_sess = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_sess() as sess:
+def sessionmaker(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def session(sessionmaker):
+    async with sessionmaker() as sess:
         yield sess
 
 
+@pytest.fixture
+async def file_sessionmaker(tmp_path):
+    """A file database with a connection per session, so concurrent workers are isolated.
+
+    The in-memory engine shares one connection, which lets one worker's rollback
+    undo another worker's uncommitted changes.
+    """
+    eng = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/bot.db")
+    async with eng.begin() as conn:
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(eng, class_=AsyncSession, expire_on_commit=False)
+    await eng.dispose()
+
+
 @pytest.fixture
 def mock_gigachat():
     mock_message = MagicMock()
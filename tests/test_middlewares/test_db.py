@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from bot.middlewares.db import DbSessionMiddleware
+
+
+async def _call(callback) -> dict:
+    data = {"handler": HandlerObject(callback=callback)}
+
+    async def handler(event, data):
+        return data
+
+    with patch("bot.middlewares.db.async_session") as sessionmaker:
+        result = await DbSessionMiddleware()(handler, object(), data)
+    result["sessionmaker_calls"] = sessionmaker.call_count
+    return result
+
+
+async def test_session_opened_for_handler_that_takes_it():
+    async def cmd_words(message, session):
+        pass
+
+    data = await _call(cmd_words)
+
+    assert data["sessionmaker_calls"] == 1
+    assert "session" in data
+
+
+async def test_no_session_for_handler_without_db():
+    async def cmd_help(message):
+        pass
+
+    data = await _call(cmd_help)
+
+    assert data["sessionmaker_calls"] == 0
+    assert "session" not in data
@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+from aiogram.dispatcher.event.handler import HandlerObject
+
+from bot.middlewares.user import UserIdMiddleware
+from bot.services.dictionary import get_or_create_user
+
+
+async def _call(callback, data: dict) -> dict:
+    data = {"handler": HandlerObject(callback=callback), **data}
+
+    async def handler(event, data):
+        return data
+
+    return await UserIdMiddleware()(handler, object(), data)
+
+
+async def test_user_id_injected_for_handler_that_takes_it(session):
+    async def cmd_stats(message, session, user_id):
+        pass
+
+    sender = SimpleNamespace(id=777)
+    data = await _call(cmd_stats, {"event_from_user": sender, "session": session})
+
+    user = await get_or_create_user(session, 777)
+    assert data["user_id"] == user.id
+
+
+async def test_no_lookup_for_handler_without_user_id():
+    async def cmd_help(message):
+        pass
+
+    # No session in data, so a lookup would query the app engine, which has no tables
+    data = await _call(cmd_help, {"event_from_user": SimpleNamespace(id=777)})
+
+    assert "user_id" not in data
@@ -0,0 +1,36 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from bot import scheduler
+from bot.models import Word
+from bot.services.dictionary import add_word, get_or_create_user, get_words_without_distractors
+
+
+async def test_backfill_runs_on_one_replica_and_keeps_skipped_words(
+    file_sessionmaker, monkeypatch
+):
+    async with file_sessionmaker() as session:
+        user = await get_or_create_user(session, telegram_id=117)
+        done = await add_word(session, user.id, "calm", "спокойный", "")
+        skipped = await add_word(session, user.id, "odd", "странный", "")
+
+    pool = file_sessionmaker.kw["bind"].sync_engine.pool
+
+    async def generate(items):
+        assert pool.checkedout() == 0  # No connection held during the LLM call
+        await asyncio.sleep(0.05)
+        return [["тихий", "грустный", "злой"], []]
+
+    llm = AsyncMock(side_effect=generate)
+    monkeypatch.setattr(scheduler, "async_session", file_sessionmaker)
+    monkeypatch.setattr(scheduler, "generate_distractors_batch", llm)
+
+    await asyncio.gather(scheduler.backfill_distractors(), scheduler.backfill_distractors())
+
+    assert llm.await_count == 1
+    async with file_sessionmaker() as session:
+        missing = await get_words_without_distractors(session)
+        assert [w.id for w in missing] == [skipped.id]
+        assert missing[0].distractor_attempts == 1
+        stored = await session.get(Word, done.id)
+        assert stored.distractors == ["тихий", "грустный", "злой"]
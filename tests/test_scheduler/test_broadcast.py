@@ -0,0 +1,176 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import update
+
+from bot.config import settings
+from bot.db.session import _pool_options
+from bot.models import BroadcastLease
+from bot.scheduler import setup_scheduler, skipped_slots
+from bot.scheduler.broadcast import iter_quiz_audience, run_broadcast, run_sharded_broadcast
+from bot.scheduler.leases import checkpoint, claim_shard, ensure_run, run_key_for
+from bot.services.dictionary import add_word, get_or_create_user, quiz_audience_query
+from bot.services.quiz import get_session, remove_session
+from bot.services.quiz_schedule import reschedule_users, slot_bounds
+
+
+async def _make_users(session, count: int, words: int) -> list[int]:
+    telegram_ids = []
+    for i in range(count):
+        user = await get_or_create_user(session, telegram_id=50_000 + i)
+        for j in range(words):
+            await add_word(session, user.id, f"w{i}-{j}", f"t{i}-{j}", "")
+        telegram_ids.append(user.telegram_id)
+    return telegram_ids
+
+
+@pytest.mark.parametrize("from_counter", [False, True])
+async def test_iter_quiz_audience(session, sessionmaker, monkeypatch, from_counter):
+    monkeypatch.setattr(settings, "quiz_audience_from_counter", from_counter)
+    eligible = await _make_users(session, 5, 2)
+    await get_or_create_user(session, telegram_id=60_001)  # no words
+
+    chunks = [chunk async for chunk in iter_quiz_audience(sessionmaker, chunk_size=2)]
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert [row.telegram_id for chunk in chunks for row in chunk] == eligible
+
+
+async def test_run_broadcast_sends_to_eligible_users(session, sessionmaker, monkeypatch):
+    monkeypatch.setattr(settings, "broadcast_concurrency", 3)
+    monkeypatch.setattr(settings, "broadcast_chunk_size", 2)
+    eligible = await _make_users(session, 4, 3)
+    user = await get_or_create_user(session, telegram_id=60_000)
+    await add_word(session, user.id, "lonely", "одинокий", "")
+
+    bot = AsyncMock()
+    stats = await run_broadcast(bot, sessionmaker)
+
+    # The user with a single word is not part of the audience at all
+    assert stats.scanned == 4
+    assert stats.sent == 4
+    assert stats.skipped == 0
+    assert stats.failed == 0
+    assert {c.kwargs["chat_id"] for c in bot.send_message.await_args_list} == set(eligible)
+    for telegram_id in eligible:
+        assert await get_session(telegram_id) is not None
+        await remove_session(telegram_id)
+
+
+async def test_run_broadcast_counts_failures(session, sessionmaker):
+    telegram_ids = await _make_users(session, 2, 2)
+
+    bot = AsyncMock()
+    bot.send_message.side_effect = RuntimeError("network down")
+    stats = await run_broadcast(bot, sessionmaker)
+
+    assert stats.failed == 2
+    assert all([await get_session(t) is None for t in telegram_ids])
+
+
+async def test_sharded_broadcast_sends_once_across_workers(file_sessionmaker, monkeypatch):
+    monkeypatch.setattr(settings, "broadcast_shards", 3)
+    monkeypatch.setattr(settings, "broadcast_chunk_size", 2)
+    async with file_sessionmaker() as session:
+        eligible = await _make_users(session, 7, 2)
+
+    bot = AsyncMock()
+    results = await asyncio.gather(
+        run_sharded_broadcast(bot, "run", file_sessionmaker, owner="a"),
+        run_sharded_broadcast(bot, "run", file_sessionmaker, owner="b"),
+    )
+
+    assert sum(stats.sent for stats in results) == 7
+    chat_ids = [c.kwargs["chat_id"] for c in bot.send_message.await_args_list]
+    assert sorted(chat_ids) == sorted(eligible)
+    for telegram_id in eligible:
+        await remove_session(telegram_id)
+
+
+async def test_sharded_broadcast_resumes_after_checkpoint(session, sessionmaker, monkeypatch):
+    monkeypatch.setattr(settings, "broadcast_shards", 1)
+    monkeypatch.setattr(settings, "broadcast_chunk_size", 2)
+    eligible = await _make_users(session, 5, 2)
+
+    # A worker died after checkpointing the first chunk
+    await ensure_run(session, "run", 1)
+    dead = await claim_shard(session, "run", "dead", 60)
+    users = [chunk async for chunk in iter_quiz_audience(sessionmaker, chunk_size=2)]
+    await checkpoint(session, dead, users[0][-1][0], 60)
+    await session.execute(
+        update(BroadcastLease).values(lease_until=datetime.now(UTC) - timedelta(seconds=1))
+    )
+    await session.commit()
+
+    bot = AsyncMock()
+    stats = await run_sharded_broadcast(bot, "run", sessionmaker, owner="heir")
+
+    assert stats.sent == 3
+    assert [c.kwargs["chat_id"] for c in bot.send_message.await_args_list] == eligible[2:]
+    for telegram_id in eligible:
+        await remove_session(telegram_id)
+
+
+async def test_sharded_broadcast_sends_due_slot_and_reschedules(session, sessionmaker):
+    slot = datetime(2026, 10, 18, 10, 0, tzinfo=UTC)
+    telegram_ids = await _make_users(session, 3, 2)
+    users = [await get_or_create_user(session, t) for t in telegram_ids]
+    users[0].next_quiz_at = slot - timedelta(seconds=30)  # Due in this slot
+    users[1].next_quiz_at = slot - timedelta(minutes=1, seconds=30)  # Previous slot
+    users[2].next_quiz_at = slot + timedelta(seconds=30)  # Next slot
+    await session.commit()
+
+    async def send(run_slot: datetime) -> list[int]:
+        async def reschedule(session, rows):
+            await reschedule_users(session, rows, run_slot)
+
+        bot = AsyncMock()
+        await run_sharded_broadcast(
+            bot,
+            run_key_for(run_slot),
+            sessionmaker,
+            owner="a",
+            audience=quiz_audience_query(due=slot_bounds(run_slot)),
+            on_chunk=reschedule,
+        )
+        return [call.kwargs["chat_id"] for call in bot.send_message.await_args_list]
+
+    # Runs of different slots never share users, whatever order they run in
+    assert await send(slot) == [telegram_ids[0]]
+    await session.refresh(users[0])
+    assert users[0].next_quiz_at.replace(tzinfo=UTC) > slot
+    assert await send(slot - timedelta(minutes=1)) == [telegram_ids[1]]
+    assert await send(slot + timedelta(minutes=1)) == [telegram_ids[2]]
+    assert await send(slot) == []
+    for telegram_id in telegram_ids:
+        await remove_session(telegram_id)
+
+
+async def test_skipped_slots_are_those_without_a_run(session, monkeypatch):
+    monkeypatch.setattr(settings, "broadcast_resume_minutes", 4)
+    slot = datetime(2026, 10, 18, 10, 0, tzinfo=UTC)
+    await ensure_run(session, run_key_for(slot - timedelta(minutes=2)), 2)
+
+    assert await skipped_slots(session, slot) == [
+        slot - timedelta(minutes=3),
+        slot - timedelta(minutes=1),
+    ]
+
+
+def test_scheduler_runs_late_ticks_once():
+    scheduler = setup_scheduler(AsyncMock())
+    job = scheduler.get_job("scheduled_quizzes")
+    assert job.max_instances == 1
+    assert job.coalesce is True
+    assert job.misfire_grace_time is None
+
+
+def test_pool_leaves_room_for_handlers_during_a_broadcast(monkeypatch):
+    monkeypatch.setattr(settings, "broadcast_concurrency", 32)
+
+    options = _pool_options("postgresql+asyncpg://localhost/bot")
+
+    # Every worker and the audience cursor, plus the handlers' share
+    assert options["pool_size"] == 32 + 1 + settings.db_pool_size
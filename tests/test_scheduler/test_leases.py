@@ -0,0 +1,96 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from bot.models import BroadcastLease
+from bot.scheduler.leases import (
+    LeaseLostError,
+    abandoned_runs,
+    checkpoint,
+    claim_shard,
+    claim_singleton,
+    ensure_run,
+    finish_shard,
+    run_key_for,
+    slot_for_run_key,
+)
+
+
+async def _expire(session, run_key: str, shard: int) -> None:
+    await session.execute(
+        update(BroadcastLease)
+        .where(BroadcastLease.run_key == run_key, BroadcastLease.shard == shard)
+        .values(lease_until=datetime.now(UTC) - timedelta(seconds=1))
+    )
+    await session.commit()
+
+
+def test_run_key_round_trip():
+    slot = datetime(2026, 10, 18, 10, 7, tzinfo=UTC)
+    assert run_key_for(slot) == "quiz:2026-10-18T10:07"
+    assert slot_for_run_key(run_key_for(slot)) == slot
+
+
+async def test_ensure_run_is_idempotent(session):
+    await ensure_run(session, "run", 3)
+    await ensure_run(session, "run", 3)
+
+    first = await claim_shard(session, "run", "a", 60)
+    assert first is not None
+    assert first.shards == 3
+
+
+async def test_each_shard_has_one_owner(session):
+    await ensure_run(session, "run", 2)
+
+    a = await claim_shard(session, "run", "a", 60)
+    b = await claim_shard(session, "run", "b", 60)
+
+    assert {a.shard, b.shard} == {0, 1}
+    assert await claim_shard(session, "run", "c", 60) is None
+
+
+async def test_expired_lease_is_taken_over_from_checkpoint(session):
+    await ensure_run(session, "run", 1)
+    dead = await claim_shard(session, "run", "dead", 60)
+    await checkpoint(session, dead, 42, 60)
+    await _expire(session, "run", 0)
+
+    assert await abandoned_runs(session, datetime.now(UTC) - timedelta(hours=1)) == ["run"]
+    heir = await claim_shard(session, "run", "heir", 60)
+
+    assert heir.shard == 0
+    assert heir.cursor == 42
+    with pytest.raises(LeaseLostError):
+        await checkpoint(session, dead, 50, 60)
+    with pytest.raises(LeaseLostError):
+        await finish_shard(session, dead)
+
+
+async def test_finished_shard_is_not_claimed_again(session):
+    await ensure_run(session, "run", 1)
+    lease = await claim_shard(session, "run", "a", 60)
+    await finish_shard(session, lease)
+    await _expire(session, "run", 0)
+
+    assert await claim_shard(session, "run", "b", 60) is None
+    assert await abandoned_runs(session, datetime.now(UTC) - timedelta(hours=1)) == []
+
+
+async def test_singleton_run_has_one_owner(session):
+    first = await claim_singleton(session, "job:1", "a", 60)
+    assert first is not None
+    assert first.shards == 1
+    assert await claim_singleton(session, "job:1", "b", 60) is None
+
+    await finish_shard(session, first)
+    assert await claim_singleton(session, "job:1", "b", 60) is None
+
+
+async def test_abandoned_runs_by_prefix(session):
+    await ensure_run(session, "quiz:x", 1)
+    await ensure_run(session, "job:x", 1)
+    since = datetime.now(UTC) - timedelta(hours=1)
+
+    assert await abandoned_runs(session, since, "quiz:") == ["quiz:x"]
@@ -0,0 +1,94 @@
+import asyncio
+
+from bot.models import User, Word
+from bot.services.answer_buffer import AnswerBuffer
+from bot.services.dictionary import Answer, add_word, apply_answers, get_or_create_user
+
+
+async def _word(session, telegram_id: int = 901) -> Word:
+    user = await get_or_create_user(session, telegram_id)
+    return await add_word(session, user.id, f"word{telegram_id}", "слово", "")
+
+
+async def test_apply_answers_chains_reviews_in_order(session):
+    word = await _word(session)
+    other = await _word(session, telegram_id=902)
+    answers = [
+        Answer(word.user_id, word.id, True, 10),
+        Answer(other.user_id, other.id, True, 10),
+        Answer(word.user_id, word.id, True, 20),
+        Answer(word.user_id, word.id, False, 0),
+        Answer(other.user_id, word.id, True, 10),  # Not this user's word: no review
+    ]
+
+    await apply_answers(session, answers)
+
+    await session.refresh(word)
+    assert (word.review_count, word.correct_count, word.interval_days) == (3, 2, 0)
+    await session.refresh(other)
+    assert (other.review_count, other.interval_days) == (1, 1)
+    assert (await session.get(User, word.user_id)).score == 30
+
+
+async def test_buffer_flushes_when_full(session, sessionmaker):
+    word = await _word(session)
+    buffer = AnswerBuffer(sessionmaker, interval=60, max_events=2)
+    buffer.start()
+
+    buffer.add(Answer(word.user_id, word.id, True, 10))
+    await asyncio.sleep(0.05)
+    assert len(buffer) == 1
+
+    buffer.add(Answer(word.user_id, word.id, True, 10))
+    for _ in range(50):
+        if not len(buffer):
+            break
+        await asyncio.sleep(0.01)
+    await buffer.close()
+
+    await session.refresh(word)
+    assert word.review_count == 2
+
+
+async def test_close_flushes_remaining(session, sessionmaker):
+    word = await _word(session)
+    buffer = AnswerBuffer(sessionmaker, interval=60, max_events=100)
+    buffer.start()
+    buffer.add(Answer(word.user_id, word.id, False, 0))
+
+    await buffer.close()
+
+    await session.refresh(word)
+    assert word.review_count == 1
+
+
+async def test_failed_flush_keeps_answers(session, sessionmaker):
+    word = await _word(session)
+
+    def broken():
+        raise ConnectionError("db down")
+
+    buffer = AnswerBuffer(broken, interval=60, max_events=100)  # type: ignore[arg-type]
+    buffer.add(Answer(word.user_id, word.id, True, 10))
+    assert await buffer.flush() == 0
+    assert len(buffer) == 1
+
+    buffer._sessionmaker = sessionmaker
+    assert await buffer.flush() == 1
+
+
+async def test_answers_are_dropped_after_max_retries(session):
+    word = await _word(session)
+
+    def broken():
+        raise ConnectionError("db down")
+
+    buffer = AnswerBuffer(broken, interval=60, max_events=100, max_retries=2)  # type: ignore[arg-type]
+    buffer.add(Answer(word.user_id, word.id, True, 10))
+    for _ in range(2):
+        assert await buffer.flush() == 0
+        assert len(buffer) == 1
+
+    buffer.add(Answer(word.user_id, word.id, False, 0))
+    assert await buffer.flush() == 0
+    assert len(buffer) == 0
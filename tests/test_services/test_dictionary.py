@@ -1,14 +1,30 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from bot.models import User, Word
+from bot.services import dictionary
 from bot.services.dictionary import (
     add_word,
     delete_word,
     get_or_create_user,
     get_stats,
+    get_user_id,
     get_word_count,
     get_words,
     get_words_for_review,
+    get_words_without_distractors,
+    quiz_audience_query,
+    record_answer,
+    record_skipped_distractors,
+    sample_translations,
+    set_word_distractors,
     update_user_score,
     update_word_review,
 )
+from bot.services.srs import INITIAL_EASE, schedule_review
 
 
 async def test_get_or_create_user(session):
@@ -22,6 +38,15 @@ async def test_get_or_create_user(session):
     assert same_user.id == user.id
 
 
+async def test_get_user_id_is_cached(session):
+    user_id = await get_user_id(session, telegram_id=12345)
+    user = await get_or_create_user(session, telegram_id=12345)
+    assert user_id == user.id
+
+    # Served from the cache: the session is not used any more
+    assert await get_user_id(MagicMock(), telegram_id=12345) == user_id
+
+
 async def test_add_and_get_words(session):
     user = await get_or_create_user(session, telegram_id=111)
 
@@ -35,6 +60,27 @@ async def test_add_and_get_words(session):
     assert count == 2
 
 
+async def test_get_words_pages_by_cursor(session):
+    user = await get_or_create_user(session, telegram_id=113)
+    base = datetime(2026, 1, 1, 12, 0, 0, 250_000, tzinfo=UTC)
+    # Ties on created_at, including across a page boundary, are broken by id
+    for i, minute in enumerate([0, 0, 1, 1, 1, 2, 2]):
+        word = await add_word(session, user.id, f"w{i}", "", "")
+        word.created_at = base + timedelta(minutes=minute)
+    await session.commit()
+
+    pages = []
+    cursor = None
+    while words := await get_words(session, user.id, limit=3, after=cursor):
+        pages.append([w.word for w in words])
+        cursor = (words[-1].created_at, words[-1].id)
+    assert pages == [["w6", "w5", "w4"], ["w3", "w2", "w1"], ["w0"]]
+
+    w3 = next(w for w in await get_words(session, user.id) if w.word == "w3")
+    previous = await get_words(session, user.id, limit=3, before=(w3.created_at, w3.id))
+    assert [w.word for w in previous] == ["w6", "w5", "w4"]
+
+
 async def test_add_word_with_translations(session):
     user = await get_or_create_user(session, telegram_id=112)
     word = await add_word(
@@ -82,6 +128,52 @@ async def test_update_word_review(session):
     assert word.last_reviewed_at is not None
 
 
+async def test_update_word_review_follows_schedule_review(session):
+    user = await get_or_create_user(session, telegram_id=556)
+    word = await add_word(session, user.id, "pear", "груша", "")
+    ease, interval = INITIAL_EASE, 0
+
+    for is_correct in (True, True, True, False, True):
+        now = datetime.now(UTC)
+        await update_word_review(session, word.id, is_correct)
+        await session.refresh(word)
+
+        expected = schedule_review(ease, interval, is_correct, now)
+        assert word.interval_days == expected.interval_days
+        assert word.ease == pytest.approx(expected.ease)
+        assert abs(word.due_at.replace(tzinfo=UTC) - expected.due_at) < timedelta(seconds=5)
+        ease, interval = expected.ease, expected.interval_days
+
+
+async def test_update_word_review_only_for_owner(session):
+    owner = await get_or_create_user(session, telegram_id=557)
+    other = await get_or_create_user(session, telegram_id=558)
+    word = await add_word(session, owner.id, "plum", "слива", "")
+
+    assert await update_word_review(session, word.id, True, user_id=other.id) is False
+    assert await update_word_review(session, word.id, True, user_id=owner.id) is True
+
+
+async def test_concurrent_answers_are_all_counted(file_sessionmaker):
+    async with file_sessionmaker() as session:
+        user = await get_or_create_user(session, telegram_id=559)
+        word = await add_word(session, user.id, "fig", "инжир", "")
+
+    async def answer(is_correct: bool) -> None:
+        async with file_sessionmaker() as session:
+            points = 10 if is_correct else 0
+            await record_answer(session, user.id, word.id, is_correct, points)
+
+    await asyncio.gather(*(answer(i % 2 == 0) for i in range(10)))
+
+    async with file_sessionmaker() as session:
+        word = await session.get(Word, word.id)
+        user = await session.get(User, user.id)
+    assert word.review_count == 10
+    assert word.correct_count == 5
+    assert user.score == 50
+
+
 async def test_get_words_for_review(session):
     user = await get_or_create_user(session, telegram_id=666)
     await add_word(session, user.id, "cat", "кот", "")
@@ -125,3 +217,108 @@ async def test_get_stats(session):
     assert stats["total_correct"] == 1
     assert stats["accuracy"] == 50.0
     assert stats["score"] == 10
+
+
+async def test_add_word_with_distractors(session):
+    user = await get_or_create_user(session, telegram_id=114)
+    word = await add_word(session, user.id, "eager", "нетерпеливый", "", distractors=["a", "b"])
+    assert word.distractors == ["a", "b"]
+
+    plain = await add_word(session, user.id, "calm", "спокойный", "")
+    assert plain.distractors is None
+
+
+async def test_backfill_distractors_helpers(session):
+    user = await get_or_create_user(session, telegram_id=115)
+    w1 = await add_word(session, user.id, "one", "один", "")
+    await add_word(session, user.id, "two", "два", "", distractors=["три", "пять", "шесть"])
+
+    missing = await get_words_without_distractors(session)
+    assert [w.id for w in missing] == [w1.id]
+
+    await set_word_distractors(session, {w1.id: ["семь", "восемь", "девять"]})
+    await session.refresh(w1)
+    assert w1.distractors == ["семь", "восемь", "девять"]
+    assert await get_words_without_distractors(session) == []
+
+
+async def test_skipped_distractors_are_retried_then_given_up(session, monkeypatch):
+    monkeypatch.setattr(dictionary.settings, "distractors_max_attempts", 2)
+    user = await get_or_create_user(session, telegram_id=116)
+    word = await add_word(session, user.id, "odd", "странный", "")
+
+    await record_skipped_distractors(session, [word.id])
+    assert [w.id for w in await get_words_without_distractors(session)] == [word.id]
+
+    await record_skipped_distractors(session, [word.id])
+    await session.refresh(word)
+    assert (word.distractors, word.distractor_attempts) == ([], 2)
+    assert await get_words_without_distractors(session) == []
+
+
+async def test_review_moves_word_to_back_of_queue(session):
+    user = await get_or_create_user(session, telegram_id=669)
+    first = await add_word(session, user.id, "first", "первый", "")
+    await add_word(session, user.id, "second", "второй", "")
+
+    await update_word_review(session, first.id, is_correct=True)
+    await session.refresh(first)
+    assert first.interval_days == 1
+
+    words = await get_words_for_review(session, user.id, limit=2)
+    assert [w.word for w in words] == ["second", "first"]
+
+
+async def test_sample_translations(session):
+    user = await get_or_create_user(session, telegram_id=888)
+    other = await get_or_create_user(session, telegram_id=889)
+    await add_word(session, other.id, "foreign", "чужой", "")
+    for i in range(20):
+        await add_word(session, user.id, f"word{i}", f"слово{i}", "")
+
+    sample = await sample_translations(session, user.id, 5)
+
+    assert 1 <= len(sample) <= 5
+    assert len({word_id for word_id, _ in sample}) == len(sample)
+    assert all(translation.startswith("слово") for _, translation in sample)
+
+
+async def test_sample_translations_empty(session):
+    user = await get_or_create_user(session, telegram_id=890)
+    assert await sample_translations(session, user.id, 3) == []
+
+
+async def test_sample_translations_large_dictionary(session, monkeypatch):
+    monkeypatch.setattr(dictionary, "SAMPLE_SCAN_LIMIT", 5)
+    user = await get_or_create_user(session, telegram_id=891)
+    for i in range(30):
+        await add_word(session, user.id, f"word{i}", f"слово{i}", "")
+
+    sample = await sample_translations(session, user.id, 4)
+
+    assert 1 <= len(sample) <= 4
+    assert len({word_id for word_id, _ in sample}) == len(sample)
+
+
+async def test_word_count_counter(session):
+    user = await get_or_create_user(session, telegram_id=892)
+    word = await add_word(session, user.id, "up", "вверх", "")
+    await add_word(session, user.id, "down", "вниз", "")
+    await session.refresh(user)
+    assert user.word_count == 2
+
+    await delete_word(session, word.id, user.id)
+    await session.refresh(user)
+    assert user.word_count == 1
+
+
+async def test_quiz_audience_query(session):
+    rich = await get_or_create_user(session, telegram_id=893)
+    poor = await get_or_create_user(session, telegram_id=894)
+    await add_word(session, rich.id, "a", "а", "")
+    await add_word(session, rich.id, "b", "б", "")
+    await add_word(session, poor.id, "c", "в", "")
+
+    for from_counter in (False, True):
+        result = await session.execute(quiz_audience_query(from_counter=from_counter))
+        assert [row.telegram_id for row in result] == [893]
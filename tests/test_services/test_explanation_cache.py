@@ -0,0 +1,247 @@
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import settings
+from bot.models.explanation_cache import ExplanationCache
+from bot.services.explanation_cache import (
+    clear_memory_cache,
+    explain_word_cached,
+    get_cache_stats,
+    get_cached_explanation,
+    normalize_word,
+    prune_explanation_cache,
+    stats,
+    store_explanation,
+    stream_explanation_cached,
+)
+from bot.services.llm import WordExplanation
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    clear_memory_cache()
+    stats.memory_hits = stats.db_hits = stats.misses = stats.fallbacks = 0
+    yield
+    clear_memory_cache()
+
+
+def _explanation(translation: str = "пример") -> WordExplanation:
+    return WordExplanation(
+        translation=translation,
+        translations=[translation],
+        distractors=[],
+        corrected_word=None,
+        meanings=[],
+        examples=[],
+        collocations=[],
+        raw_text=f"<b>word</b> — {translation}",
+    )
+
+
+def test_normalize_word():
+    assert normalize_word("  Ambiguous \n") == "ambiguous"
+
+
+async def test_explain_word_cached_calls_llm_once(session, mock_gigachat):
+    first = await explain_word_cached(session, "example")
+    second = await explain_word_cached(session, " Example ")
+
+    assert second == first
+    mock_gigachat.return_value.achat.assert_awaited_once()
+    assert get_cache_stats()["misses"] == 1
+    assert get_cache_stats()["memory_hits"] == 1
+
+
+async def test_connection_released_before_llm_call(session, mock_gigachat):
+    achat = mock_gigachat.return_value.achat
+    response = achat.return_value
+    in_transaction = []
+
+    async def check_transaction(chat):
+        in_transaction.append(session.in_transaction())
+        return response
+
+    achat.side_effect = check_transaction
+
+    await explain_word_cached(session, "example")
+
+    assert in_transaction == [False]
+
+
+async def test_db_hit_after_memory_cleared(session):
+    await store_explanation(session, "resilient", _explanation("стойкий"))
+    clear_memory_cache()
+
+    cached = await get_cached_explanation(session, "RESILIENT")
+    assert cached is not None
+    assert cached.translation == "стойкий"
+    assert stats.db_hits == 1
+
+    # Promoted back into memory
+    await get_cached_explanation(session, "resilient")
+    assert stats.memory_hits == 1
+
+
+async def test_expired_entry_is_a_miss(session):
+    await store_explanation(session, "old", _explanation())
+    clear_memory_cache()
+    await session.execute(
+        update(ExplanationCache).values(
+            created_at=datetime.now(UTC) - timedelta(days=settings.explanation_cache_ttl_days + 1)
+        )
+    )
+    await session.commit()
+
+    assert await get_cached_explanation(session, "old") is None
+    assert stats.misses == 1
+
+
+async def test_memory_entry_expires_with_its_row(session, monkeypatch):
+    await store_explanation(session, "aging", _explanation())
+    clear_memory_cache()
+    # One second of TTL left when the row is loaded into memory
+    created_at = datetime.now(UTC) - timedelta(days=settings.explanation_cache_ttl_days)
+    await session.execute(
+        update(ExplanationCache).values(created_at=created_at + timedelta(seconds=1))
+    )
+    await session.commit()
+    assert await get_cached_explanation(session, "aging") is not None
+
+    monotonic = time.monotonic() + 2
+    monkeypatch.setattr("bot.services.explanation_cache.time.monotonic", lambda: monotonic)
+    await get_cached_explanation(session, "aging")
+    # Not served from memory: the in-memory copy expired together with the row
+    assert stats.memory_hits == 0
+    assert stats.db_hits == 2
+
+
+async def test_memory_lru_is_bounded(session, monkeypatch):
+    monkeypatch.setattr(settings, "explanation_cache_memory_size", 2)
+    for word in ("one", "two", "three"):
+        await store_explanation(session, word, _explanation(word))
+
+    assert get_cache_stats()["memory_size"] == 2
+
+
+async def test_prune_keeps_newest_rows(session, monkeypatch):
+    monkeypatch.setattr(settings, "explanation_cache_max_rows", 2)
+    now = datetime.now(UTC)
+    for i, word in enumerate(("a", "b", "c")):
+        session.add(
+            ExplanationCache(key=word, data={}, created_at=now - timedelta(minutes=10 - i))
+        )
+    await session.commit()
+
+    deleted = await prune_explanation_cache(session)
+    assert deleted == 1
+
+    result = await session.execute(select(func.count()).select_from(ExplanationCache))
+    assert result.scalar_one() == 2
+    assert await session.get(ExplanationCache, "a") is None
+
+
+async def test_concurrent_stores_of_same_word(engine, session):
+    async def store(translation: str) -> None:
+        async with AsyncSession(engine) as own_session:
+            await store_explanation(own_session, "example", _explanation(translation))
+
+    await asyncio.gather(store("первый"), store("второй"))
+
+    row = await session.get(ExplanationCache, "example")
+    assert row.data["translation"] in ("первый", "второй")
+
+
+async def test_fallback_to_stale_cache_when_llm_fails(session, mock_gigachat):
+    await store_explanation(session, "example", _explanation("старый"))
+    clear_memory_cache()
+    await session.execute(
+        update(ExplanationCache).values(created_at=datetime.now(UTC) - timedelta(days=365))
+    )
+    await session.commit()
+    mock_gigachat.return_value.achat.side_effect = ValueError("down")
+
+    explanation = await explain_word_cached(session, "example")
+
+    assert explanation.translation == "старый"
+    assert stats.fallbacks == 1
+
+
+async def test_fallback_to_word_bank_when_llm_fails(session, mock_gigachat):
+    mock_gigachat.return_value.achat.side_effect = ValueError("down")
+
+    explanation = await explain_word_cached(session, "Ambiguous")
+
+    assert explanation.translation == "двусмысленный"
+    assert len(explanation.distractors) == 3
+
+
+async def test_no_fallback_raises(session, mock_gigachat):
+    mock_gigachat.return_value.achat.side_effect = ValueError("down")
+
+    with pytest.raises(ValueError):
+        await explain_word_cached(session, "qwertyuiop")
+
+
+async def test_stream_explanation_cached_stores_final_result(session, mock_gigachat):
+    client = mock_gigachat.return_value
+    content = client.achat.return_value.choices[0].message.content
+
+    async def chunks():
+        for i in range(0, len(content), 10):
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = content[i : i + 10]
+            yield chunk
+
+    client.astream = MagicMock(return_value=chunks())
+
+    partials = [p async for p in stream_explanation_cached(session, "example")]
+    assert len(partials) > 1
+
+    clear_memory_cache()
+    cached = await get_cached_explanation(session, "example")
+    assert cached == partials[-1]
+    client.achat.assert_not_awaited()
+
+
+async def test_stream_falls_back_to_regular_call(session, mock_gigachat):
+    client = mock_gigachat.return_value
+    client.astream = MagicMock(side_effect=ValueError("stream unsupported"))
+
+    partials = [p async for p in stream_explanation_cached(session, "example")]
+
+    assert len(partials) == 1
+    assert partials[0].translation == "пример"
+    client.achat.assert_awaited_once()
+
+
+async def test_concurrent_streams_share_one_llm_call(file_sessionmaker, mock_gigachat):
+    client = mock_gigachat.return_value
+    content = client.achat.return_value.choices[0].message.content
+
+    async def chunks(_chat):
+        for i in range(0, len(content), 10):
+            await asyncio.sleep(0.001)
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = content[i : i + 10]
+            yield chunk
+
+    client.astream = MagicMock(side_effect=chunks)
+
+    async def lookup() -> WordExplanation:
+        async with file_sessionmaker() as session:
+            return [p async for p in stream_explanation_cached(session, "example")][-1]
+
+    results = await asyncio.gather(*(lookup() for _ in range(5)))
+
+    assert client.astream.call_count == 1
+    client.achat.assert_not_awaited()
+    assert all(r == results[0] for r in results)
+    assert results[0].translation == "пример"
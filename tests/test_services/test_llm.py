@@ -1,6 +1,20 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
-from bot.services.llm import explain_word, format_explanation, generate_random_words
+import pytest
+
+from bot.config import settings
+from bot.services.llm import (
+    _parse_partial_json,
+    close_client,
+    explain_word,
+    format_explanation,
+    generate_distractors_batch,
+    generate_random_words,
+    get_client,
+    stream_explain_word,
+)
+from bot.utils.resilience import CircuitOpenError
 
 
 async def test_explain_word(mock_gigachat):
@@ -95,3 +109,147 @@ def test_format_explanation():
     assert "тест" in text
     assert "This is a test" in text
     assert "test case" in text
+
+
+async def test_client_is_shared_between_calls(mock_gigachat):
+    """The GigaChat client is created once and reused for subsequent requests."""
+    await explain_word("example")
+    await explain_word("example")
+
+    mock_gigachat.assert_called_once()
+    assert mock_gigachat.return_value.achat.await_count == 2
+
+
+async def test_close_client(mock_gigachat):
+    client = get_client()
+    await close_client()
+
+    client.aclose.assert_awaited_once()
+
+    # A new client is created lazily after shutdown
+    get_client()
+    assert mock_gigachat.call_count == 2
+
+
+async def test_explain_word_coalesces_concurrent_requests(mock_gigachat):
+    """Concurrent requests for the same word result in a single LLM call."""
+    client = mock_gigachat.return_value
+    response = client.achat.return_value
+
+    async def slow_achat(_chat):
+        await asyncio.sleep(0.01)
+        return response
+
+    client.achat.side_effect = slow_achat
+
+    results = await asyncio.gather(*(explain_word(w) for w in ["example", "Example ", "example"]))
+
+    assert client.achat.await_count == 1
+    assert all(r is results[0] for r in results)
+
+
+async def test_explain_word_retries_transient_errors(mock_gigachat, monkeypatch):
+    monkeypatch.setattr(settings, "llm_retry_base_delay", 0)
+    client = mock_gigachat.return_value
+    response = client.achat.return_value
+    client.achat.side_effect = [TimeoutError(), response]
+
+    result = await explain_word("example")
+
+    assert result.translation == "пример"
+    assert client.achat.await_count == 2
+
+
+async def test_explain_word_fails_fast_when_circuit_open(mock_gigachat, monkeypatch):
+    monkeypatch.setattr(settings, "llm_retry_attempts", 1)
+    client = mock_gigachat.return_value
+    client.achat.side_effect = ValueError("upstream down")
+
+    for _ in range(settings.llm_breaker_failure_threshold):
+        with pytest.raises(ValueError):
+            await explain_word("example")
+
+    with pytest.raises(CircuitOpenError):
+        await explain_word("example")
+    assert client.achat.await_count == settings.llm_breaker_failure_threshold
+
+
+def _stream_chunks(text: str, size: int):
+    async def gen():
+        for i in range(0, len(text), size):
+            chunk = MagicMock()
+            chunk.choices = [MagicMock()]
+            chunk.choices[0].delta.content = text[i : i + size]
+            yield chunk
+
+    return gen()
+
+
+def test_parse_partial_json():
+    text = '```json\n{"corrected_word": "ex", "translation": "при\\"мер", "translations": ["a", "b'
+    assert _parse_partial_json(text) == {"corrected_word": "ex", "translation": 'при"мер'}
+
+    nested = '{"a": 1, "m": [{"x": "}"}], "c": {"d": 2}}'
+    assert _parse_partial_json(nested) == {"a": 1, "m": [{"x": "}"}], "c": {"d": 2}}
+
+    assert _parse_partial_json("no json yet") == {}
+
+
+async def test_stream_explain_word_yields_growing_explanations(mock_gigachat):
+    client = mock_gigachat.return_value
+    content = client.achat.return_value.choices[0].message.content
+    client.astream = MagicMock(return_value=_stream_chunks(content, 7))
+
+    partials = [p async for p in stream_explain_word("example")]
+
+    assert partials[0].translation == "пример"
+    assert partials[0].meanings == []
+    assert partials[-1].collocations == [{"en": "set an example", "ru": "подать пример"}]
+    assert partials[-1].raw_text == (await explain_word("example")).raw_text
+
+
+async def test_stream_deadline_does_not_span_the_consumer(mock_gigachat, monkeypatch):
+    monkeypatch.setattr(settings, "llm_deadline_seconds", 0.05)
+    client = mock_gigachat.return_value
+    content = client.achat.return_value.choices[0].message.content
+    client.astream = MagicMock(return_value=_stream_chunks(content, 7))
+
+    partials = []
+    async for partial in stream_explain_word("example"):
+        partials.append(partial)
+        await asyncio.sleep(0.03)  # e.g. editing the Telegram message
+
+    assert partials[-1].collocations == [{"en": "set an example", "ru": "подать пример"}]
+
+
+async def test_stream_deadline_raises_timeout(mock_gigachat, monkeypatch):
+    monkeypatch.setattr(settings, "llm_deadline_seconds", 0.05)
+
+    async def stalled(_chat):
+        chunk = MagicMock()
+        chunk.choices = [MagicMock()]
+        chunk.choices[0].delta.content = '{"translation": "пример", '
+        yield chunk
+        await asyncio.sleep(1)
+
+    mock_gigachat.return_value.astream = MagicMock(side_effect=stalled)
+
+    async def consume():
+        async for _ in stream_explain_word("example"):
+            await asyncio.sleep(0.1)
+
+    # A TimeoutError the caller can handle, not a cancellation of its task
+    with pytest.raises(TimeoutError):
+        await consume()
+
+
+async def test_generate_distractors_batch(mock_gigachat):
+    client = mock_gigachat.return_value
+    client.achat.return_value.choices[
+        0
+    ].message.content = '{"1": ["ленивый", "тихий", "грустный"], "2": ["only one"]}'
+
+    result = await generate_distractors_batch([("eager", "нетерпеливый"), ("calm", "спокойный")])
+
+    assert result == [["ленивый", "тихий", "грустный"], []]
+    client.achat.assert_awaited_once()
@@ -4,24 +4,35 @@ from bot.services.onboarding import (
     get_next_word_with_options,
     get_session,
     remove_session,
+    save_session,
 )
 
 
-def test_create_and_get_session():
-    session = create_session(telegram_id=111, user_id=1)
+async def test_create_and_get_session():
+    session = await create_session(telegram_id=111, user_id=1)
     assert session.user_id == 1
     assert session.unknown_count == 0
     assert session.target_unknown == 10
 
-    retrieved = get_session(111)
-    assert retrieved is session
+    retrieved = await get_session(111)
+    assert retrieved == session
 
-    remove_session(111)
-    assert get_session(111) is None
+    await remove_session(111)
+    assert await get_session(111) is None
 
 
-def test_remove_nonexistent_session():
-    remove_session(999)  # should not raise
+async def test_session_changes_need_save():
+    session = await create_session(telegram_id=112, user_id=1)
+    get_next_word_with_options(session)
+    assert (await get_session(112)).current_word is None
+
+    await save_session(112, session)
+    assert (await get_session(112)).current_word == session.current_word
+    await remove_session(112)
+
+
+async def test_remove_nonexistent_session():
+    await remove_session(999)  # should not raise
 
 
 def test_get_next_word_with_options():
@@ -58,3 +69,16 @@ def test_session_tracks_shown_words():
 
     assert len(words) == 5  # all unique
     assert len(session.shown_words) == 5
+
+
+def test_session_round_trips_through_dict():
+    session = OnboardingSession(user_id=1)
+    get_next_word_with_options(session)
+    get_next_word_with_options(session)
+
+    restored = OnboardingSession.from_dict(session.to_dict())
+
+    assert restored == session
+    assert restored.current_options == session.current_options
+    assert restored.current_options[restored.correct_index] == restored.current_translation
+    assert not hasattr(restored, "__dict__")  # Slotted
@@ -0,0 +1,139 @@
+"""Every query of bot.services.dictionary must be served by an index.
+
+The statements are captured while the service functions run and then passed
+to SQLite's EXPLAIN QUERY PLAN. A full scan of users or words fails the test.
+"""
+
+import re
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from bot.models import User, Word
+from bot.services.dictionary import (
+    SAMPLE_SCAN_LIMIT,
+    Answer,
+    add_word,
+    apply_answers,
+    delete_word,
+    get_or_create_user,
+    get_stats,
+    get_user_id,
+    get_word_count,
+    get_words,
+    get_words_for_review,
+    get_words_without_distractors,
+    quiz_audience_query,
+    record_answer,
+    sample_translations,
+    set_word_distractors,
+    update_user_score,
+    update_word_review,
+    word_exists,
+)
+
+# Walking the partial index of words without distractors reads only those rows
+FULL_SCAN = re.compile(r"\bSCAN (users|words)\b(?! USING INDEX ix_words_missing_distractors\b)")
+
+
+@pytest.fixture
+def statements(engine):
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def _seed(engine, users: int, now: datetime) -> None:
+    """Other users and their words, analyzed so that SQLite plans as on a real table."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    "id": 10_000 + i,
+                    "telegram_id": 10_000 + i,
+                    "word_count": 2,
+                    "next_quiz_at": now + timedelta(minutes=i),
+                }
+                for i in range(users)
+            ],
+        )
+        await conn.execute(
+            insert(Word),
+            [
+                {
+                    "user_id": 10_000 + i,
+                    "word": f"seed{i}-{j}",
+                    "translation": "",
+                    "explanation": "",
+                    "distractors": ["a", "b"],
+                }
+                for i in range(users)
+                for j in range(2)
+            ],
+        )
+        await conn.exec_driver_sql("ANALYZE")
+
+
+async def test_dictionary_queries_use_indexes(engine, session, statements):
+    now = datetime.now(UTC)
+    await _seed(engine, 1000, now)
+    user = await get_or_create_user(session, telegram_id=700)
+    await get_user_id(session, telegram_id=701)
+    words = [
+        await add_word(session, user.id, f"word{i}", f"t{i}", "", distractors=["a", "b"])
+        for i in range(SAMPLE_SCAN_LIMIT + 1)
+    ]
+    await add_word(session, user.id, "WORD0", "t0", "")  # duplicate
+    first, last = words[0], words[-1]
+
+    await get_words(session, user.id, limit=10)
+    await get_words(session, user.id, limit=10, after=(last.created_at, last.id))
+    await get_words(session, user.id, limit=10, before=(first.created_at, first.id))
+    await get_word_count(session, user.id)
+    await word_exists(session, user.id, "Word1")
+    await get_words_for_review(session, user.id, exclude_word_ids=[first.id])
+    await sample_translations(session, user.id, 3)
+    await get_words_without_distractors(session)
+    await set_word_distractors(session, {first.id: ["c", "d"]})
+    await update_word_review(session, first.id, True, user_id=user.id)
+    await update_user_score(session, user.id, 10)
+    await record_answer(session, user.id, first.id, False, 0)
+    await apply_answers(session, [Answer(user.id, last.id, True, 10)])
+    await get_stats(session, user.id)
+    await delete_word(session, last.id, user.id)
+    for from_counter in (False, True):
+        await session.execute(
+            quiz_audience_query(from_counter=from_counter, due=(now, now + timedelta(minutes=1)))
+        )
+
+    assert len(statements) > 20
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plan = [row[-1] for row in result]
+            scans = [step for step in plan if FULL_SCAN.search(step)]
+            assert not scans, f"{statement}\n{plan}"
+
+
+async def test_words_are_unique_per_user_ignoring_case(session, engine):
+    user = await get_or_create_user(session, telegram_id=702)
+    saved = await add_word(session, user.id, "Cat", "кошка", "")
+
+    again = await add_word(session, user.id, "cat", "кот", "")
+
+    assert again.id == saved.id
+    assert again.translation == "кошка"
+    assert await get_word_count(session, user.id) == 1
+    async with engine.connect() as conn:
+        count = await conn.scalar(
+            text("SELECT word_count FROM users WHERE id = :id"), {"id": user.id}
+        )
+    assert count == 1
@@ -5,6 +5,8 @@ from bot.services.quiz import (
     generate_quiz,
     get_session,
     remove_session,
+    save_session,
+    start_session,
 )
 
 
@@ -62,21 +64,23 @@ async def test_generate_quiz_random_translation(session):
         assert quiz["all_correct"] == ["бежать", "бегать", "работать"]
 
 
-def test_quiz_session_lifecycle():
+async def test_quiz_session_lifecycle():
     telegram_id = 9999
 
-    assert get_session(telegram_id) is None
+    assert await get_session(telegram_id) is None
 
-    qs = create_session(telegram_id, user_id=1, total_questions=5)
+    qs = await create_session(telegram_id, user_id=1, total_questions=5)
     assert qs.total_questions == 5
     assert qs.current_question == 0
     assert qs.score == 0
 
-    assert get_session(telegram_id) is qs
+    assert await get_session(telegram_id) == qs
 
-    removed = remove_session(telegram_id)
-    assert removed is qs
-    assert get_session(telegram_id) is None
+    qs.score = 30
+    await save_session(telegram_id, qs)
+    removed = await remove_session(telegram_id)
+    assert removed.score == 30
+    assert await get_session(telegram_id) is None
 
 
 def test_calculate_points():
@@ -88,3 +92,62 @@ def test_calculate_points():
     assert calculate_points(3) == 15  # 10 + 5*1
     assert calculate_points(4) == 20  # 10 + 5*2
     assert calculate_points(5) == 25  # 10 + 5*3
+
+
+async def test_generate_quiz_uses_stored_distractors(session):
+    user = await get_or_create_user(session, telegram_id=1006)
+    await add_word(
+        session,
+        user.id,
+        "eager",
+        "нетерпеливый",
+        "",
+        distractors=["ленивый", "тихий", "грустный"],
+    )
+
+    # The only word, so its options can come from nowhere but its stored distractors
+    quiz = await generate_quiz(session, user.id)
+    assert quiz is not None
+    assert quiz["word"] == "eager"
+    assert set(quiz["options"]) == {"нетерпеливый", "ленивый", "тихий", "грустный"}
+
+
+async def test_start_session_plans_all_questions(session):
+    user = await get_or_create_user(session, telegram_id=1007)
+    for word, translation in [("sun", "солнце"), ("moon", "луна"), ("star", "звезда")]:
+        await add_word(session, user.id, word, translation, "")
+
+    qs = await start_session(session, 1007, user.id, total_questions=10)
+    assert qs is not None
+    assert qs.total_questions == 3  # Capped by the number of words
+    assert len(qs.questions) == 3
+    assert len({q.word_id for q in qs.questions}) == 3
+    for question in qs.questions:
+        assert question.correct_answer in question.options
+        assert len(question.options) == 3
+    stored = await get_session(1007)
+    assert stored.questions == qs.questions
+    await remove_session(1007)
+
+
+async def test_asked_question_is_stored_with_the_session(session):
+    user = await get_or_create_user(session, telegram_id=1009)
+    for word, translation in [("sun", "солнце"), ("moon", "луна")]:
+        await add_word(session, user.id, word, translation, "")
+    qs = await start_session(session, 1009, user.id)
+
+    qs.asked = qs.questions.pop(0)
+    await save_session(1009, qs)
+
+    stored = await get_session(1009)
+    assert stored.asked == qs.asked
+    assert stored.questions == qs.questions
+    await remove_session(1009)
+
+
+async def test_start_session_not_enough_words(session):
+    user = await get_or_create_user(session, telegram_id=1008)
+    await add_word(session, user.id, "alone", "один", "")
+
+    assert await start_session(session, 1008, user.id) is None
+    assert await get_session(1008) is None
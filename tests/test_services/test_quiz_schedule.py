@@ -0,0 +1,83 @@
+from datetime import UTC, datetime, timedelta
+
+from bot.config import settings
+from bot.services.dictionary import get_or_create_user
+from bot.services.quiz_schedule import (
+    is_valid_timezone,
+    next_quiz_time,
+    schedule_pending_users,
+    set_quiz_preferences,
+    spread_offset,
+)
+
+
+def test_spread_offset_is_stable_and_within_window(monkeypatch):
+    monkeypatch.setattr(settings, "quiz_spread_minutes", 60)
+    offsets = [spread_offset(telegram_id) for telegram_id in range(1_000, 4_000)]
+
+    assert offsets[0] == spread_offset(1_000)
+    assert all(timedelta(0) <= o < timedelta(minutes=60) for o in offsets)
+    # Evenly spread: every 10-minute bucket gets a fair share of users
+    buckets = [
+        sum(1 for o in offsets if i * 600 <= o.total_seconds() < (i + 1) * 600) for i in range(6)
+    ]
+    assert min(buckets) > 400
+
+
+def test_next_quiz_time_uses_local_hours(monkeypatch):
+    monkeypatch.setattr(settings, "quiz_spread_minutes", 0)
+    now = datetime(2026, 10, 18, 5, 0, tzinfo=UTC)  # 08:00 in Moscow (UTC+3)
+
+    at = next_quiz_time(now, 1, "Europe/Moscow", [9, 20])
+
+    assert at == datetime(2026, 10, 18, 6, 0, tzinfo=UTC)
+
+
+def test_next_quiz_time_rolls_over_to_tomorrow(monkeypatch):
+    monkeypatch.setattr(settings, "quiz_spread_minutes", 0)
+    now = datetime(2026, 10, 18, 21, 0, tzinfo=UTC)
+
+    assert next_quiz_time(now, 1, "UTC", [9, 20]) == datetime(2026, 10, 19, 9, 0, tzinfo=UTC)
+
+
+def test_next_quiz_time_defaults(monkeypatch):
+    monkeypatch.setattr(settings, "quiz_spread_minutes", 0)
+    monkeypatch.setattr(settings, "quiz_hours", [10])
+    now = datetime(2026, 10, 18, 9, 0, tzinfo=UTC)
+
+    # Unknown timezone falls back to UTC, no hours to settings.quiz_hours
+    assert next_quiz_time(now, 1, "Mars/Olympus", None) == datetime(2026, 10, 18, 10, tzinfo=UTC)
+
+
+def test_is_valid_timezone():
+    assert is_valid_timezone("Asia/Tokyo")
+    assert not is_valid_timezone("Mars/Olympus")
+    assert not is_valid_timezone("")
+
+
+async def test_schedule_pending_users(session):
+    now = datetime.now(UTC)
+    fresh = await get_or_create_user(session, telegram_id=901)
+    stale = await get_or_create_user(session, telegram_id=902)
+    upcoming = await get_or_create_user(session, telegram_id=903)
+    stale.next_quiz_at = now - timedelta(days=1)
+    upcoming.next_quiz_at = now + timedelta(hours=1)
+    await session.commit()
+
+    assert await schedule_pending_users(session, now) == 2
+
+    for user in (fresh, stale, upcoming):
+        await session.refresh(user)
+        assert user.next_quiz_at.replace(tzinfo=UTC) > now
+
+
+async def test_set_quiz_preferences(session, monkeypatch):
+    monkeypatch.setattr(settings, "quiz_spread_minutes", 0)
+    user = await get_or_create_user(session, telegram_id=904)
+
+    next_at = await set_quiz_preferences(session, user, timezone="Asia/Tokyo", hours=[21, 7, 7])
+
+    await session.refresh(user)
+    assert user.timezone == "Asia/Tokyo"
+    assert user.quiz_hours == [7, 21]
+    assert next_at.astimezone(UTC).hour in (22, 12)  # 07:00 / 21:00 in Tokyo
@@ -0,0 +1,31 @@
+from datetime import UTC, datetime, timedelta
+
+from bot.services.srs import INITIAL_EASE, MIN_EASE, RELEARN_DELAY, schedule_review
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def test_correct_answers_grow_interval():
+    first = schedule_review(INITIAL_EASE, 0, is_correct=True, now=NOW)
+    assert first.interval_days == 1
+    assert first.due_at == NOW + timedelta(days=1)
+
+    second = schedule_review(first.ease, first.interval_days, is_correct=True, now=NOW)
+    assert second.interval_days == 6
+
+    third = schedule_review(second.ease, second.interval_days, is_correct=True, now=NOW)
+    assert third.interval_days == round(6 * second.ease)
+
+
+def test_wrong_answer_resets_interval_and_lowers_ease():
+    result = schedule_review(INITIAL_EASE, 15, is_correct=False, now=NOW)
+    assert result.interval_days == 0
+    assert result.due_at == NOW + RELEARN_DELAY
+    assert result.ease < INITIAL_EASE
+
+
+def test_ease_has_lower_bound():
+    ease = INITIAL_EASE
+    for _ in range(10):
+        ease = schedule_review(ease, 0, is_correct=False, now=NOW).ease
+    assert ease == MIN_EASE
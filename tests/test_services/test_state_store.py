@@ -0,0 +1,86 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from bot.models import SessionState
+from bot.services.state_store import MemoryStore, SqlStore, prune_session_state
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, sessionmaker):
+    if request.param == "memory":
+        return MemoryStore(ttl=60, max_entries=100)
+    return SqlStore("test", ttl=60, sessionmaker=sessionmaker)
+
+
+async def test_set_get_pop(store):
+    assert await store.get(1) is None
+
+    await store.set(1, {"step": 1, "words": ["a"]})
+    await store.set(1, {"step": 2, "words": ["a", "b"]})
+
+    assert await store.get(1) == {"step": 2, "words": ["a", "b"]}
+    assert await store.pop(1) == {"step": 2, "words": ["a", "b"]}
+    assert await store.pop(1) is None
+    assert await store.get(1) is None
+
+
+async def test_returned_value_is_a_copy(store):
+    await store.set(1, {"words": ["a"]})
+
+    value = await store.get(1)
+    value["words"].append("b")
+
+    assert await store.get(1) == {"words": ["a"]}
+
+
+async def test_memory_store_evicts_least_recently_used():
+    store = MemoryStore(ttl=60, max_entries=2)
+    await store.set(1, {})
+    await store.set(2, {})
+    await store.get(1)
+    await store.set(3, {})
+
+    assert len(store) == 2
+    assert await store.get(2) is None
+    assert await store.get(1) == {}
+
+
+async def test_memory_store_expires():
+    store = MemoryStore(ttl=0, max_entries=10)
+    await store.set(1, {"a": 1})
+
+    assert await store.get(1) is None
+    assert await store.pop(1) is None
+
+
+async def test_sql_store_namespaces_and_expiry(session, sessionmaker):
+    quiz = SqlStore("quiz", ttl=60, sessionmaker=sessionmaker)
+    onboarding = SqlStore("onboarding", ttl=60, sessionmaker=sessionmaker)
+    await quiz.set(1, {"kind": "quiz"})
+    await onboarding.set(1, {"kind": "onboarding"})
+    assert await quiz.get(1) == {"kind": "quiz"}
+
+    await session.execute(
+        update(SessionState)
+        .where(SessionState.namespace == "quiz")
+        .values(expires_at=datetime.now(UTC) - timedelta(seconds=1))
+    )
+    await session.commit()
+
+    assert await quiz.get(1) is None
+    assert await prune_session_state(session) == 1
+    assert await onboarding.get(1) == {"kind": "onboarding"}
+
+
+async def test_sql_store_uses_the_callers_session(session):
+    def no_second_connection():
+        raise AssertionError("opened a session of its own")
+
+    store = SqlStore("test", ttl=60, sessionmaker=no_second_connection)  # type: ignore[arg-type]
+    await store.set(1, {"step": 1}, session)
+
+    assert await store.get(1, session) == {"step": 1}
+    assert await store.pop(1, session) == {"step": 1}
+    assert await store.get(1, session) is None
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+
+import pytest
+from aiogram.dispatcher.event.handler import HandlerObject
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from bot.middlewares.metrics import MetricsMiddleware
+from bot.services import explanation_cache, llm
+from bot.utils.metrics import (
+    UpdateTrace,
+    current_trace,
+    handler_stats,
+    instrument_engine,
+    register_metric,
+    render_metrics,
+    reset_metrics,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+async def test_queries_are_counted_for_the_current_update_only(engine, session):
+    instrument_engine(engine.sync_engine)
+    await session.execute(text("SELECT 1"))
+
+    trace = UpdateTrace(handler="h")
+    token = current_trace.set(trace)
+    try:
+        await session.execute(text("SELECT 2"))
+        await session.execute(text("SELECT 3"))
+    finally:
+        current_trace.reset(token)
+
+    assert trace.query_count == 2
+    assert [statement for statement, _ in trace.queries] == ["SELECT 2", "SELECT 3"]
+    assert trace.db_seconds > 0
+
+
+async def test_failed_queries_are_counted(engine, session):
+    instrument_engine(engine.sync_engine)
+
+    trace = UpdateTrace(handler="h")
+    token = current_trace.set(trace)
+    try:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                await session.execute(text("SELECT * FROM no_such_table"))
+            await session.rollback()
+        await session.execute(text("SELECT 1"))
+    finally:
+        current_trace.reset(token)
+
+    assert trace.query_count == 4
+    assert trace.queries[-1][0] == "SELECT 1"
+
+
+async def test_middleware_records_handler_stats(engine, session):
+    instrument_engine(engine.sync_engine)
+
+    async def handle_thing(event, data):
+        await session.execute(text("SELECT 1"))
+        return "done"
+
+    async def call(event, data):
+        return await handle_thing(event, data)
+
+    middleware = MetricsMiddleware()
+    data = {"handler": HandlerObject(callback=handle_thing)}
+    assert await middleware(call, object(), data) == "done"
+    assert await middleware(call, object(), data) == "done"
+
+    stats = handler_stats["handle_thing"]
+    assert stats.count == 2
+    assert stats.queries == 2
+    assert stats.errors == 0
+
+
+async def test_middleware_counts_errors_and_logs_slow_updates(caplog, monkeypatch):
+    monkeypatch.setattr("bot.config.settings.slow_update_seconds", 0.0)
+
+    async def broken(event, data):
+        raise ValueError("boom")
+
+    middleware = MetricsMiddleware()
+    with caplog.at_level(logging.WARNING), pytest.raises(ValueError):
+        await middleware(broken, object(), {"handler": HandlerObject(callback=broken)})
+
+    assert handler_stats["broken"].errors == 1
+    assert handler_stats["broken"].slow == 1
+    assert "Slow update in broken" in caplog.text
+
+
+def test_render_metrics():
+    trace = UpdateTrace(handler="cmd_quiz")
+    trace.add_query("SELECT 1", 0.002)
+    handler_stats["cmd_quiz"].observe(0.3, trace, failed=False, slow=False)
+
+    output = render_metrics()
+
+    assert "# TYPE bot_handler_duration_seconds histogram" in output
+    assert 'bot_handler_duration_seconds_bucket{handler="cmd_quiz",le="0.25"} 0' in output
+    assert 'bot_handler_duration_seconds_bucket{handler="cmd_quiz",le="0.5"} 1' in output
+    assert 'bot_handler_duration_seconds_bucket{handler="cmd_quiz",le="+Inf"} 1' in output
+    assert 'bot_handler_duration_seconds_count{handler="cmd_quiz"} 1' in output
+    assert 'bot_handler_queries_total{handler="cmd_quiz"} 1' in output
+    assert 'bot_handler_db_seconds_total{handler="cmd_quiz"} 0.002' in output
+
+
+async def test_render_metrics_includes_service_metrics(mock_gigachat):
+    await asyncio.gather(*(llm.explain_word("example") for _ in range(3)))
+    explanation_cache.stats.misses += 1
+    register_metric("bot_test_gauge", "gauge", "A test gauge", lambda: 7, labels={"kind": "x"})
+
+    output = render_metrics()
+
+    assert "# TYPE bot_llm_queue_depth gauge" in output
+    assert "bot_llm_acquired_total 1" in output
+    assert "bot_llm_coalesced_total" in output
+    assert 'bot_llm_circuit_state{state="closed"} 1' in output
+    assert 'bot_llm_circuit_state{state="open"} 0' in output
+    assert "# TYPE bot_explanation_cache_misses_total counter" in output
+    assert 'bot_test_gauge{kind="x"} 7' in output
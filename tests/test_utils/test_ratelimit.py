@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from bot.utils.ratelimit import FairLimiter, TokenBucket
+
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+
+    delay = bucket.try_acquire()
+    assert 0 < delay <= 0.1
+
+
+async def test_limiter_bounds_concurrency():
+    limiter = FairLimiter(max_in_flight=2, rate=1000, burst=1000)
+    running = 0
+    peak = 0
+
+    async def task() -> None:
+        nonlocal running, peak
+        async with limiter.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(task() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.stats.acquired == 6
+    assert limiter.stats.max_queue_depth >= 4
+    assert limiter.stats.in_flight == 0
+    assert limiter.stats.queue_depth == 0
+
+
+async def test_limiter_is_fair_between_keys():
+    limiter = FairLimiter(max_in_flight=1, rate=1000, burst=1000)
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    async def task(key: str) -> None:
+        async with limiter.slot(key):
+            if not gate.is_set():
+                await gate.wait()
+            order.append(key)
+
+    blocker = asyncio.create_task(task("blocker"))
+    await asyncio.sleep(0)
+    spam = [asyncio.create_task(task("spammer")) for _ in range(3)]
+    await asyncio.sleep(0)
+    other = asyncio.create_task(task("other"))
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocker, *spam, other)
+
+    # "other" is served right after the spammer's first request, not after all of them
+    assert order == ["blocker", "spammer", "other", "spammer", "spammer"]
+
+
+async def test_limiter_applies_rate():
+    limiter = FairLimiter(max_in_flight=10, rate=50, burst=1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def task() -> None:
+        async with limiter.slot():
+            pass
+
+    await asyncio.gather(*(task() for _ in range(3)))
+
+    # One token up front, two more at 50/s
+    assert loop.time() - started >= 0.035
+    assert limiter.stats.max_wait > 0
+
+
+async def test_cancelled_waiter_leaves_queue():
+    limiter = FairLimiter(max_in_flight=1, rate=1000, burst=1000)
+    release = asyncio.Event()
+
+    async def holder() -> None:
+        async with limiter.slot("a"):
+            await release.wait()
+
+    async def waiter() -> None:
+        async with limiter.slot("b"):
+            pass
+
+    held = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    assert limiter.stats.queue_depth == 1
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    assert limiter.stats.queue_depth == 0
+
+    release.set()
+    await held
+    assert limiter.stats.in_flight == 0
@@ -0,0 +1,79 @@
+import pytest
+
+from bot.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    retry_with_backoff,
+)
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_breaker_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+
+    breaker.before_call()  # reset timeout elapsed — trial call allowed
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+    for _ in range(5):
+        breaker.record_failure()
+    breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+
+
+async def test_retry_until_success():
+    calls = 0
+
+    async def flaky() -> str:
+        nonlocal calls
+        calls += 1
+        if calls < 3:
+            raise TimeoutError
+        return "ok"
+
+    result = await retry_with_backoff(
+        flaky, attempts=3, base_delay=0, max_delay=0, is_retryable=lambda e: True
+    )
+    assert result == "ok"
+    assert calls == 3
+
+
+async def test_retry_gives_up_on_non_retryable():
+    calls = 0
+
+    async def broken() -> str:
+        nonlocal calls
+        calls += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await retry_with_backoff(
+            broken,
+            attempts=5,
+            base_delay=0,
+            max_delay=0,
+            is_retryable=lambda e: isinstance(e, TimeoutError),
+        )
+    assert calls == 1
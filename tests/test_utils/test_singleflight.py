@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from bot.utils.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight: SingleFlight[str] = SingleFlight()
+    calls = 0
+
+    async def work() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+
+    assert results == ["done"] * 10
+    assert calls == 1
+    assert flight.coalesced == 9
+    assert len(flight) == 0
+
+
+async def test_different_keys_run_separately():
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def work(value: str) -> str:
+        await asyncio.sleep(0)
+        return value
+
+    a, b = await asyncio.gather(
+        flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b"))
+    )
+    assert (a, b) == ("a", "b")
+    assert flight.coalesced == 0
+
+
+async def test_exception_is_shared_and_key_released():
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def fail() -> str:
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def ok() -> str:
+        return "ok"
+
+    # A later call starts a fresh execution
+    assert await flight.do("key", ok) == "ok"
+
+
+async def test_cancelled_caller_does_not_cancel_others():
+    flight: SingleFlight[str] = SingleFlight()
+    started = asyncio.Event()
+
+    async def work() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first